@@ -0,0 +1,217 @@
+"""
+Author: Bilal Vandenberge
+Date: October 2026
+-> the file with the BatchGame class (N games of 2048 stepped together with numpy)
+"""
+
+
+from game import GameError, spawn_rates
+import numpy as np
+
+
+def slide_lines(lines: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    slide every line toward its first cell with the same rules as Game._left
+    return the new lines, the score won and the biggest merged exponent per line
+    ARG:
+        - lines: (R, L) array of exponents (index 0 is the wall)
+    """
+    number, length = lines.shape
+    rows = np.arange(number)
+    out = np.zeros_like(lines)
+    top = np.zeros(number, dtype=np.intp) # number of tiles already stacked
+    score = np.zeros(number, dtype=np.int64)
+    max_merge = np.zeros(number, dtype=lines.dtype)
+    for column in range(length):
+        tiles = lines[:, column]
+        filled = tiles != 0
+        previous = out[rows, np.maximum(top - 1, 0)]
+        merge = filled & (top > 0) & (previous == tiles)
+        # merge with the last stacked tile
+        merged_rows, merged_cells = rows[merge], top[merge] - 1
+        out[merged_rows, merged_cells] += 1
+        merged = out[merged_rows, merged_cells]
+        score[merge] += np.left_shift(1, merged.astype(np.int64))
+        max_merge[merge] = np.maximum(max_merge[merge], merged)
+        # or stack the tile
+        push = filled & ~merge
+        out[rows[push], top[push]] = tiles[push]
+        top += push
+    return out, score, max_merge
+
+
+class BatchGame:
+    """represent N games of 2048 of the same size played in lockstep"""
+
+    # methods:
+    def __init__(self, number: int, width: int = 4, height: int = 4, seed: int = None):
+        if number < 1 or width < 2 or height < 2:
+            raise GameError(f"invalid batch shape: {(number, height, width)}")
+        self._number = number
+        self._width = width
+        self._height = height
+        self._size = width * height
+        self._rng = np.random.default_rng(seed)
+        self._build_grids()
+
+    def _build_grids(self) -> None:
+        """
+        build the grids, scores and biggest tiles of the games
+        """
+        self._grids = np.zeros((self._number, self._height, self._width), dtype=np.uint8)
+        self._scores = np.zeros(self._number, dtype=np.int64)
+        self._max_tiles = np.ones(self._number, dtype=np.uint8)
+
+    def reset(self, mask: np.ndarray = None) -> None:
+        """
+        restart the selected games with two new tiles
+        ARG:
+            - mask: the boolean array of the games to restart (all if None)
+        """
+        if mask is None:
+            mask = np.ones(self._number, dtype=bool)
+        self._grids[mask] = 0
+        self._scores[mask] = 0
+        self._max_tiles[mask] = 1
+        self.spawn_random(2, "start", mask)
+
+    def _lines(self, grids: np.ndarray, orientation: int) -> np.ndarray:
+        """
+        return the grids as lines that fall toward their first cell
+        """
+        match orientation:
+            case 0: # up
+                lines = grids.transpose(0, 2, 1)
+            case 1: # down
+                lines = grids.transpose(0, 2, 1)[:, :, ::-1]
+            case 2: # left
+                lines = grids
+            case 3: # right
+                lines = grids[:, :, ::-1]
+        return np.ascontiguousarray(lines).reshape(-1, lines.shape[2])
+
+    def _grids_from_lines(self, lines: np.ndarray, orientation: int) -> np.ndarray:
+        """
+        return the grids built from lines (see _lines)
+        """
+        if orientation < 2:
+            lines = lines.reshape(-1, self._width, self._height)
+            return (lines if orientation == 0 else lines[:, :, ::-1]).transpose(0, 2, 1)
+        lines = lines.reshape(-1, self._height, self._width)
+        return lines if orientation == 2 else lines[:, :, ::-1]
+
+    def change_gravity(self, orientations) -> tuple[np.ndarray, np.ndarray]:
+        """
+        update every grid with its new gravity
+        return the score won and if there was any change, per game
+        ARG:
+            - orientations: one index of Game.AVAILABLE_DIRECTIONS per game
+            (or a single index for all games)
+        """
+        orientations = np.broadcast_to(np.asarray(orientations), (self._number,))
+        score = np.zeros(self._number, dtype=np.int64)
+        changed = np.zeros(self._number, dtype=bool)
+        for orientation in range(4):
+            selected = np.flatnonzero(orientations == orientation)
+            if not len(selected):
+                continue
+            grids = self._grids[selected]
+            lines, line_score, line_merge = slide_lines(self._lines(grids, orientation))
+            new = self._grids_from_lines(lines, orientation)
+            self._grids[selected] = new
+            score[selected] = line_score.reshape(len(selected), -1).sum(1)
+            changed[selected] = (new != grids).any((1, 2))
+            self._max_tiles[selected] = np.maximum(
+                self._max_tiles[selected], line_merge.reshape(len(selected), -1).max(1)
+            )
+        self._scores += score
+        return score, changed
+
+    def spawn_random(self, number: int, mode: str = "normal", mask: np.ndarray = None) -> None:
+        """
+        spawn randoms tiles on the grids (see Game.spawn_random)
+        ARGS:
+            - number: the number of tiles to spawn per game
+            - mode: the mode of the spawn (supported: start, normal and hell)
+            - mask: the boolean array of the games that get new tiles (all if None)
+        """
+        rates = spawn_rates(mode)
+        thresholds = np.array([threshold for threshold, _ in rates])
+        powers = np.array([power for _, power in rates], dtype=np.uint8)
+        selected = np.ones(self._number, dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+        rows = np.arange(self._number)
+        flat = self._grids.reshape(self._number, self._size)
+        # one draw for every tile: a key per cell (the biggest free one wins) and a value
+        draws = self._rng.random((number, self._number, self._size + 1))
+        for tile in range(number):
+            keys = np.where(flat == 0, draws[tile, :, :self._size], -1.0)
+            pos = keys.argmax(1)
+            spawn = selected & (keys[rows, pos] >= 0)
+            values = powers[np.searchsorted(thresholds, draws[tile, :, self._size])]
+            flat[rows[spawn], pos[spawn]] = values[spawn]
+
+    def is_lost(self) -> np.ndarray:
+        """
+        return if each game is in a dead end
+        """
+        grids = self._grids
+        full = (grids != 0).all((1, 2))
+        horizontal = (grids[:, :, 1:] == grids[:, :, :-1]).any((1, 2))
+        vertical = (grids[:, 1:, :] == grids[:, :-1, :]).any((1, 2))
+        return full & ~horizontal & ~vertical
+
+    def step(self, orientations, mode: str = "normal", spawns: int = 2) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        play one turn on every game (move, then spawn where the grid changed)
+        return the score won, if there was any change and if the game is lost, per game
+        ARGS:
+            - orientations: one index of Game.AVAILABLE_DIRECTIONS per game
+            - mode: the mode of the spawn
+            - spawns: the number of tiles to spawn after a move
+        """
+        score, changed = self.change_gravity(orientations)
+        self.spawn_random(spawns, mode, changed)
+        return score, changed, self.is_lost()
+
+    # getters:
+    @property
+    def number(self) -> int:
+        """
+        return the number of games
+        """
+        return self._number
+
+    @property
+    def width(self) -> int:
+        """
+        return the width of the game grids
+        """
+        return self._width
+
+    @property
+    def height(self) -> int:
+        """
+        return the height of the game grids
+        """
+        return self._height
+
+    @property
+    def grids(self) -> np.ndarray:
+        """
+        return the (N, height, width) array of exponents
+        """
+        return self._grids
+
+    @property
+    def scores(self) -> np.ndarray:
+        """
+        return the score of each game
+        """
+        return self._scores
+
+    @property
+    def max_tiles(self) -> np.ndarray:
+        """
+        return the biggest merged tile of each game
+        """
+        return self._max_tiles
@@ -0,0 +1,283 @@
+"""
+Author: Bilal Vandenberge
+Date: October 2026
+-> the file with the CompactGame class (a game of 2048 in a flat bytearray)
+"""
+
+
+from game import Game, GameError, SpawnStream, spawn_rates, line_events, EVENT_SPAWN
+from operator import eq
+
+
+_TRAVERSALS = {} # (width, height) -> (lines per direction, neighbour pairs)
+REJECTION_DRAWS = 4 # random cells tried before listing the free ones
+
+
+def traversal(width: int, height: int) -> tuple[tuple, tuple]:
+    """
+    return the traversal index maps of a grid size (shared by all the games
+    of that size):
+        - for each direction, the slices of the lines ordered from the wall
+        - the pairs of neighbour cells
+    ARGS:
+        - width: the width of the grid
+        - height: the height of the grid
+    """
+    key = (width, height)
+    if key not in _TRAVERSALS:
+        last = (height - 1) * width
+        lines = (
+            tuple(slice(x, None, width) for x in range(width)), # up
+            tuple(slice(x + last, None, -width) for x in range(width)), # down
+            tuple(slice(y, y + width) for y in range(0, last + 1, width)), # left
+            tuple(slice(y + width - 1, y - 1 if y else None, -1) for y in range(0, last + 1, width)) # right
+        )
+        pairs = tuple(
+            [(pos, pos + 1) for pos in range(width * height) if pos % width != width - 1]
+            + [(pos, pos + width) for pos in range(last)]
+        )
+        _TRAVERSALS[key] = (lines, pairs)
+    return _TRAVERSALS[key]
+
+
+class CompactGame:
+    """represent a game of 2048 stored in a flat bytearray of exponents"""
+
+    __slots__ = (
+        "_width", "_height", "_score", "_max_tile", "_stream", "_cells", "_lines", "_pairs",
+        "_journal", "_redo", "_deltas"
+    )
+
+    AVAILABLE_DIRECTIONS = Game.AVAILABLE_DIRECTIONS
+    JOURNAL_LIMIT = Game.JOURNAL_LIMIT
+
+    # methods:
+    def __init__(self, width: int = 4, height: int = 4, seed: int = None, game_id: int = 0, journal: bool = False):
+        if width < 1 or height < 1:
+            raise GameError(f"invalid grid size: {width}x{height}")
+        self._width = width
+        self._height = height
+        self._score = 0
+        self._max_tile = 1 # the value of the biggest tile on the grid
+        self._stream = SpawnStream(seed, game_id)
+        self._lines, self._pairs = traversal(width, height)
+        self._build_grid()
+        self._build_journal(journal)
+
+    def _build_grid(self) -> None:
+        """
+        build the grid of the game
+        """
+        self._cells = bytearray(self._width * self._height)
+
+    frame = Game.frame
+    display = Game.display
+    release = Game.release
+    random_pow = Game.random_pow
+    _draw_power = Game._draw_power
+    _build_journal = Game._build_journal
+    _push_entry = Game._push_entry
+    undo = Game.undo
+    redo = Game.redo
+
+    def _revert(self, deltas: list) -> None:
+        """
+        undo the changes of the cells of a move (slice or position, old, new)
+        """
+        cells = self._cells
+        for key, old, new in reversed(deltas):
+            cells[key] = old
+
+    def _replay(self, deltas: list) -> None:
+        """
+        redo the changes of the cells of a move (slice or position, old, new)
+        """
+        cells = self._cells
+        for key, old, new in deltas:
+            cells[key] = new
+
+    def is_lost(self) -> bool:
+        """
+        return if the game is in a dead end
+        """
+        cells = self._cells
+        if 0 in cells:
+            return False
+        for a, b in self._pairs:
+            if cells[a] == cells[b]:
+                return False
+        return True
+
+    def legal_moves(self) -> int:
+        """
+        return the mask of the directions that change the grid
+        (bit i is set if AVAILABLE_DIRECTIONS[i] is legal)
+        """
+        cells = self._cells
+        mask = 0
+        for orientation in range(4):
+            for line in self._lines[orientation]:
+                old = cells[line]
+                tiles = old.replace(b"\x00", b"")
+                if not old.startswith(tiles) or any(map(eq, tiles, tiles[1:])):
+                    mask |= 1 << orientation
+                    break
+        return mask
+
+    def is_full(self) -> bool:
+        """
+        return if the grid is full
+        """
+        return 0 not in self._cells
+
+    def load(self, grid: list[list[int]], score: int = 0, max_tile: int = 1,
+    stream_state: tuple[int, int] = None, free_order: list[int] = None) -> None:
+        """
+        replace the position of the game (see Game.load, the spawns do not
+        depend on the order of the free spots)
+        """
+        if len(grid) != self._height or any(len(line) != self._width for line in grid):
+            raise GameError(f"the grid does not fit a {self._width}x{self._height} game")
+        self._cells = bytearray(tile for line in grid for tile in line)
+        self._score = score
+        self._max_tile = max_tile
+        if stream_state is not None:
+            self._stream.seek(stream_state)
+        self._build_journal(self._journal is not None)
+
+    def spawn_random(self, number: int, mode: str = "normal", events: list = None) -> list[tuple[int, int]]:
+        """
+        spawn randoms tiles on the grid (see Game.spawn_random)
+        return the spawned tiles (position, exponent)
+        ARGS:
+            - number: the number of tiles to spawn
+            - mode: the mode of the spawn (supported: normal and hell)
+            - events: the list where the EVENT_SPAWN events are added (none if None)
+        """
+        rates = spawn_rates(mode)
+        rand = self._stream.random
+        cells = self._cells
+        size = len(cells)
+        spawned = []
+        for tile in range(number):
+            # a few random draws are enough on a sparse grid (still uniform)
+            for _ in range(REJECTION_DRAWS):
+                pos = int(rand() * size)
+                if not cells[pos]:
+                    break
+            else:
+                free = [pos for pos in range(size) if not cells[pos]]
+                if not free:
+                    break # Will stop after reaching the full grid completion
+                pos = free[int(rand() * len(free))]
+            cells[pos] = self._draw_power(rates)
+            if self._deltas is not None:
+                self._deltas.append((pos, 0, cells[pos]))
+            spawned.append((pos, cells[pos]))
+        if events is not None:
+            events.extend((EVENT_SPAWN, pos, power) for pos, power in spawned)
+        return spawned
+
+    def change_gravity(self, orientation: int = 0, events: list = None) -> bool:
+        """
+        update the grid with a new gravity (see Game.change_gravity)
+        return if there was any change
+        """
+        assert isinstance(orientation, int) and 0 <= orientation < 4
+        cells = self._cells
+        journal = self._journal is not None
+        if journal:
+            before = (self._score, self._max_tile, self._stream.state)
+        deltas = []
+        score = 0
+        max_merge = 0
+        for line in self._lines[orientation]:
+            old = cells[line]
+            tiles = old.replace(b"\x00", b"")
+            if not tiles:
+                continue
+            if any(map(eq, tiles, tiles[1:])):
+                # the same rules as Game._left: a tile merges with the last stacked one
+                stack = []
+                for tile in tiles:
+                    if stack and stack[-1] == tile:
+                        stack[-1] = tile + 1
+                        score += 1 << (tile + 1)
+                        if tile >= max_merge:
+                            max_merge = tile + 1
+                    else:
+                        stack.append(tile)
+                tiles = bytes(stack)
+            new = tiles + bytes(len(old) - len(tiles))
+            if new != old:
+                if events is not None:
+                    line_events(range(len(cells))[line], old, events)
+                cells[line] = new
+                deltas.append((line, old, new))
+        if score:
+            self._score += score
+            self._max_tile = max(self._max_tile, max_merge)
+        if deltas and journal:
+            self._deltas = deltas
+            self._push_entry(before)
+        else:
+            self._deltas = None
+        return bool(deltas)
+
+    # getters:
+    @property
+    def width(self) -> int:
+        """
+        return the width of the game grid
+        """
+        return self._width
+
+    @property
+    def height(self) -> int:
+        """
+        return the height of the game grid
+        """
+        return self._height
+
+    @property
+    def score(self) -> int:
+        """
+        return the score of the game
+        """
+        return self._score
+
+    @property
+    def stream(self) -> SpawnStream:
+        """
+        return the random stream of the spawns
+        """
+        return self._stream
+
+    @property
+    def cells(self) -> bytearray:
+        """
+        return the flat grid of exponents (line by line)
+        """
+        return self._cells
+
+    @property
+    def grid(self) -> list[list]:
+        """
+        return the grid of the game (built from the flat grid)
+        """
+        cells, width = self._cells, self._width
+        return [list(cells[y:y + width]) for y in range(0, len(cells), width)]
+
+    @property
+    def free_spots(self) -> set:
+        """
+        return the set of free spots (without a tile)
+        """
+        return {pos for pos, tile in enumerate(self._cells) if not tile}
+
+    @property
+    def max_tile(self) -> int:
+        """
+        return the value of the biggest merged tile
+        """
+        return self._max_tile
@@ -0,0 +1,315 @@
+"""
+Author: Bilal Vandenberge
+Date: October 2026
+-> the file with the self-play datasets (growable .npy files written by a background thread)
+"""
+
+
+from game import Game, GameError
+from bitboard import BitGame
+import simulation
+import argparse as ap
+import numpy as np
+import threading
+import random
+import queue
+import ast
+import os
+
+
+# each column of a dataset is a .npy file (name -> dtype, if it holds a board)
+COLUMNS = {
+    "boards": (np.uint8, True), # the exponents before the move
+    "actions": (np.uint8, False), # the index of the move in Game.AVAILABLE_DIRECTIONS
+    "rewards": (np.int32, False), # the score won by the move
+    "afterstates": (np.uint8, True), # the exponents after the move, before the spawns
+    "done": (np.bool_, False) # if the game is lost after the spawns
+}
+NPY_HEADER_SIZE = 128 # fixed, so the shape can be rewritten in place
+INITIAL_ROWS = 1 << 16
+BATCH_ROWS = 4096 # records sent at once to the writer thread
+QUEUE_BATCHES = 8 # batches waiting for the disk before the simulation blocks
+
+
+def _npy_header(dtype: np.dtype, shape: tuple) -> bytes:
+    """
+    return the .npy (version 1.0) header of an array, padded to NPY_HEADER_SIZE
+    """
+    text = repr({"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": shape})
+    padding = NPY_HEADER_SIZE - 10 - len(text) - 1
+    if padding < 0:
+        raise GameError(f"the shape {shape} does not fit in a .npy header")
+    text = (text + " " * padding + "\n").encode("latin1")
+    return b"\x93NUMPY\x01\x00" + len(text).to_bytes(2, "little") + text
+
+
+class NpyColumn:
+    """represent a .npy file that grows by appending rows (written through a memmap)"""
+
+    # methods:
+    def __init__(self, path: str, dtype, row_shape: tuple = (), capacity: int = INITIAL_ROWS):
+        """
+        ARGS:
+            - path: the path of the file (appended to if it exists)
+            - dtype: the type of the values
+            - row_shape: the shape of a row
+            - capacity: the number of rows preallocated
+        """
+        self._path = path
+        self._dtype = np.dtype(dtype)
+        self._row_shape = tuple(row_shape)
+        self._rows = 0
+        if os.path.exists(path):
+            with open(path, mode="rb") as f:
+                header = f.read(NPY_HEADER_SIZE)
+            shape = ast.literal_eval(header[10:].decode("latin1"))["shape"]
+            if len(header) != NPY_HEADER_SIZE or shape[1:] != self._row_shape:
+                raise GameError(f"{path} is not a column of this dataset")
+            self._rows = shape[0]
+        self._map = None
+        self._capacity = 0
+        self._grow(max(capacity, self._rows))
+
+    def _grow(self, capacity: int) -> None:
+        """
+        resize the file to hold a number of rows and map it again
+        """
+        if self._map is not None:
+            self._map.flush()
+            del self._map
+        row_bytes = self._dtype.itemsize * int(np.prod(self._row_shape, dtype=np.int64))
+        with open(self._path, mode="ab") as f:
+            f.truncate(NPY_HEADER_SIZE + capacity * row_bytes)
+        self._capacity = capacity
+        self._map = np.memmap(self._path, self._dtype, "r+", NPY_HEADER_SIZE, (capacity, *self._row_shape))
+        self._write_header()
+
+    def _write_header(self) -> None:
+        """
+        write the number of rows in the header (the file is then a valid .npy)
+        """
+        with open(self._path, mode="r+b") as f:
+            f.write(_npy_header(self._dtype, (self._rows, *self._row_shape)))
+
+    def append(self, rows: np.ndarray) -> None:
+        """
+        copy rows at the end of the file
+        """
+        if self._rows + len(rows) > self._capacity:
+            self._grow(max(2 * self._capacity, self._rows + len(rows)))
+        self._map[self._rows:self._rows + len(rows)] = rows
+        self._rows += len(rows)
+
+    def flush(self) -> None:
+        """
+        write the rows on the disk and update the header
+        """
+        self._map.flush()
+        self._write_header()
+
+    def close(self) -> None:
+        """
+        flush the rows and cut the preallocated space
+        """
+        if self._map is None:
+            return
+        self.flush()
+        del self._map
+        self._map = None
+        row_bytes = self._dtype.itemsize * int(np.prod(self._row_shape, dtype=np.int64))
+        with open(self._path, mode="r+b") as f:
+            f.truncate(NPY_HEADER_SIZE + self._rows * row_bytes)
+
+    # getters:
+    @property
+    def rows(self) -> int:
+        """
+        return the number of rows written
+        """
+        return self._rows
+
+
+class DatasetWriter:
+    """represent a dataset of self-play records written by a background thread"""
+
+    # methods:
+    def __init__(self, directory: str, width: int = 4, height: int = 4):
+        """
+        ARGS:
+            - directory: the directory of the .npy files (appended to if they exist)
+            - width: the width of the boards
+            - height: the height of the boards
+        """
+        os.makedirs(directory, exist_ok=True)
+        self._columns = {
+            name: NpyColumn(os.path.join(directory, name + ".npy"), dtype, (width * height,) if board else ())
+            for name, (dtype, board) in COLUMNS.items()
+        }
+        self._size = width * height
+        self._queue = queue.Queue(QUEUE_BATCHES)
+        self._error = None
+        self._new_batch()
+        self._thread = threading.Thread(target=self._run, name="dataset-writer", daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> "DatasetWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _new_batch(self) -> None:
+        """
+        allocate the arrays of the next batch of records
+        """
+        self._batch = {
+            name: np.empty((BATCH_ROWS, self._size) if board else BATCH_ROWS, dtype)
+            for name, (dtype, board) in COLUMNS.items()
+        }
+        self._batch_rows = 0
+
+    def _run(self) -> None:
+        """
+        append the batches to the files until the None batch
+        """
+        try:
+            while (item := self._queue.get()) is not None:
+                batch, rows = item
+                for name, column in self._columns.items():
+                    column.append(batch[name][:rows])
+        except Exception as error:
+            self._error = error
+            while self._queue.get() is not None: # unblock the simulation
+                pass
+
+    def _send(self) -> None:
+        """
+        send the current batch to the writer thread (blocks if the queue is full)
+        """
+        if self._error is not None:
+            raise GameError(f"the dataset writer failed: {self._error}")
+        if self._batch_rows:
+            self._queue.put((self._batch, self._batch_rows))
+            self._new_batch()
+
+    def add(self, board: bytes, action: int, reward: int, afterstate: bytes, done: bool) -> None:
+        """
+        add a record
+        ARGS:
+            - board: the exponents before the move (line by line)
+            - action: the index of the move in Game.AVAILABLE_DIRECTIONS
+            - reward: the score won by the move
+            - afterstate: the exponents after the move, before the spawns
+            - done: if the game is lost after the spawns
+        """
+        batch, row = self._batch, self._batch_rows
+        batch["boards"][row] = np.frombuffer(board, np.uint8)
+        batch["actions"][row] = action
+        batch["rewards"][row] = reward
+        batch["afterstates"][row] = np.frombuffer(afterstate, np.uint8)
+        batch["done"][row] = done
+        self._batch_rows += 1
+        if self._batch_rows == BATCH_ROWS:
+            self._send()
+
+    def close(self) -> None:
+        """
+        write the last records, stop the thread and close the files
+        """
+        if not self._thread.is_alive():
+            return
+        self._send()
+        self._queue.put(None)
+        self._thread.join()
+        for column in self._columns.values():
+            column.close()
+        if self._error is not None:
+            raise GameError(f"the dataset writer failed: {self._error}")
+
+    # getters:
+    @property
+    def rows(self) -> int:
+        """
+        return the number of records on the disk
+        """
+        return self._columns["actions"].rows
+
+
+def _cells(g: Game) -> bytes:
+    """
+    return the exponents of a game, line by line
+    """
+    return bytes(tile for line in g.grid for tile in line)
+
+
+def export(directory: str, games: int, policy, engine: type = BitGame, mode: str = "normal", seed: int = None) -> int:
+    """
+    play games and append every move to a dataset
+    return the number of records written
+    ARGS:
+        - directory: the directory of the dataset (see DatasetWriter)
+        - games: the number of games
+        - policy: the function that chooses the moves (see simulation.build_policy)
+        - engine: the class of the games
+        - mode: the spawn mode of the games
+        - seed: the root seed of the games (game i uses the stream (seed, i))
+    """
+    if seed is None:
+        seed = random.getrandbits(63)
+    rows = 0
+    with DatasetWriter(directory) as writer:
+        for game_id in range(games):
+            g = engine(seed=seed, game_id=game_id)
+            g.spawn_random(2, "start")
+            board = _cells(g)
+            while not g.is_lost():
+                orientation = policy(g)
+                if orientation == -1:
+                    break
+                score = g.score
+                if not g.change_gravity(orientation):
+                    continue
+                afterstate = _cells(g)
+                reward = g.score - score
+                g.spawn_random(2, mode)
+                after_spawn = _cells(g)
+                writer.add(board, orientation, reward, afterstate, g.is_lost())
+                board = after_spawn
+                rows += 1
+    return rows
+
+
+def load(directory: str) -> dict[str, np.ndarray]:
+    """
+    return the columns of a dataset mapped in memory (slices do not copy)
+    """
+    return {name: np.load(os.path.join(directory, name + ".npy"), mmap_mode="r") for name in COLUMNS}
+
+
+def build_parser() -> ap.ArgumentParser:
+    """
+    build the argument parser
+    """
+    parser = ap.ArgumentParser(description="export self-play games of 2048 to a .npy dataset")
+    parser.add_argument("directory", help="the directory of the dataset (appended to if it exists)")
+    parser.add_argument("--games", help="the number of games", type=int, default=100)
+    parser.add_argument("--policy", help="the player (see simulation.AVAILABLE_POLICIES)", default="random")
+    parser.add_argument("--budget", help="the time per move of the expectimax policy (ms)", type=float, default=50)
+    parser.add_argument("--seed", help="the seed of the games", type=int)
+    parser.add_argument("--difficulty", help="set the game difficulty", default="normal")
+    return parser
+
+
+def main() -> None:
+    """
+    export the games and print the size of the dataset
+    """
+    args = build_parser().parse_args()
+    random.seed(args.seed)
+    with simulation.build_policy(args.policy, args.difficulty, args.budget) as policy:
+        rows = export(args.directory, args.games, policy, BitGame, args.difficulty, args.seed)
+    print(f"{rows} records added ({len(load(args.directory)["actions"])} in {args.directory})")
+
+
+if __name__ == "__main__":
+    main()
@@ -23,15 +23,30 @@ ALLS = {
         "    --azerty            start a game with the Z Q S D keys as directional keys\n"
         "    --qwerty            start a game with the W A S D keys as directional keys\n"
         "    --vim               start a game as a gigachad (VIM keys)\n"
+        "    u / r               undo / redo a move during the game (not with --record)\n"
         "  languages:\n"
         "    --english, -en      set the language to English\n"
         "    --french, -fr       set the language to French\n"
         "    --chinese, -zh      set the language to Mandarin Chinese\n"
         "  extras:\n"
         "    --theme 'my_theme'  start a game with custom theme (all available in the themes directory)\n"
+        "    --color-depth D     set the colors of the terminal (available: truecolor, 256, 16, none; default: detected)\n"
+        "    --list-themes       show a preview of every theme of the themes directory\n"
         "    --clear             clear all datas about the user (best score etc.)\n"
         "    --best-score        print the best score of the local player\n"
         "    --difficulty 'diff' set the game difficulty (available: normal, hell)\n"
+        "    --engine 'engine'   set the game engine (available: classic, bitboard, compact)\n"
+        "    --record 'file'     record the game in a replay file (see source/replay.py)\n"
+        "    --resume            resume the last unfinished game (saved after each move)\n"
+        "    --hints             show the best move found by the solver while you think (4x4 grids)\n"
+        "  simulation:\n"
+        "    --simulate N        play N games without display and print statistics\n"
+        "    --policy 'policy'   set the player (available: random, greedy, expectimax, montecarlo)\n"
+        "    --budget MS         set the time per move of the expectimax player (default: 50)\n"
+        "    --rollouts K        set the rollouts per move of the montecarlo player (default: 100)\n"
+        "    --workers W         set the processes of the montecarlo player (default: all) and of the expectimax player (default: 1)\n"
+        "    --seed S            set the seed of the simulated games\n"
+        "    --position-db [F]   reuse the positions solved by the expectimax player (default: memory/positions.db)\n"
         "\n"
         "credits:\n"
         "  the author of the game is Gabriele Cirulli\n"
@@ -48,15 +63,30 @@ ALLS = {
         "    --azerty            débute une partie en utilisant les touches Z Q S D\n"
         "    --qwerty            débute une partie en utilisant les touches W A S D\n"
         "    --vim               devient un gigachad (touches VIM)\n"
+        "    u / r               annule / rétablit un coup pendant la partie (pas avec --record)\n"
         "  langues:\n"
         "    --english, -en      règle la langue sur Anglais\n"
         "    --french, -fr       règle la langue sur Français\n"
         "    --chinese, -zh      règle la langue sur Mandarin\n"
         "  extras:\n"
         "    --theme 'mon_theme' débute une partie avec un thème personnalisé (tous sont disponibles dans le dossier themes)\n"
+        "    --color-depth D     règle les couleurs du terminal (disponibles: truecolor, 256, 16, none; défaut: détectées)\n"
+        "    --list-themes       affiche un aperçu de chaque thème du dossier themes\n"
         "    --clear             supprime toutes les données enregistrées (meilleur score etc.)\n"
         "    --best-score        affiche le meilleur score du joueur locale\n"
         "    --difficulty 'diff' règle la difficulté de la partie (disponibles: normal, hell)\n"
+        "    --engine 'moteur'   règle le moteur du jeu (disponibles: classic, bitboard, compact)\n"
+        "    --record 'fichier'  enregistre la partie dans un fichier de replay (voir source/replay.py)\n"
+        "    --resume            reprend la dernière partie non terminée (sauvée à chaque coup)\n"
+        "    --hints             affiche le meilleur coup trouvé par le solveur pendant que vous réfléchissez (grilles 4x4)\n"
+        "  simulation:\n"
+        "    --simulate N        joue N parties sans affichage et affiche leurs statistiques\n"
+        "    --policy 'joueur'   règle le joueur (disponibles: random, greedy, expectimax, montecarlo)\n"
+        "    --budget MS         règle le temps par coup du joueur expectimax (défaut: 50)\n"
+        "    --rollouts K        règle le nombre de parties aléatoires par coup du joueur montecarlo (défaut: 100)\n"
+        "    --workers W         règle le nombre de processus du joueur montecarlo (défaut: tous) et du joueur expectimax (défaut: 1)\n"
+        "    --seed S            règle la graine des parties simulées\n"
+        "    --position-db [F]   réutilise les positions résolues par le joueur expectimax (défaut: memory/positions.db)\n"
         "\n"
         "crédits:\n"
         "  l'auteur du jeu est Gabriele Cirulli\n"
@@ -73,15 +103,30 @@ ALLS = {
         "    --azerty            用 Z Q S D 键作为方向键开始游戏\n"
         "    --qwerty            用 W A S D 键作为方向键开始游戏\n"
         "    --vim               使用 VIM 方向键开始游戏\n"
+        "    u / r               在游戏中撤销 / 重做一步 (--record 时不可用)\n"
         "  语言:\n"
         "    --english, -en      将语言设置为英语\n"
         "    --french, -fr       将语言设置为法语\n"
         "    --chinese, -zh      将语言设置为普通话\n"
         "  更多:\n"
         "    --theme 'my_theme'  使用自定义主题（所有主题均可在主题文件夹中找到）开始游戏\n"
+        "    --color-depth D     设置终端的颜色 (可用: truecolor, 256, 16, none; 默认: 自动检测)\n"
+        "    --list-themes       预览主题文件夹中的所有主题\n"
         "    --clear             删除所有保存的数据（最佳成绩等）。\n"
         "    --best-score        打印本地玩家的最好成绩。\n"
         "    --difficulty 'diff' 设置游戏难度 (可用: normal, hell)\n"
+        "    --engine 'engine'   设置游戏引擎 (可用: classic, bitboard, compact)\n"
+        "    --record 'file'     将游戏录制到回放文件中 (见 source/replay.py)\n"
+        "    --resume            继续上一局未完成的游戏 (每步自动保存)\n"
+        "    --hints             在你思考时显示求解器找到的最佳一步 (4x4 网格)\n"
+        "  模拟:\n"
+        "    --simulate N        无显示地进行 N 局游戏并打印统计数据\n"
+        "    --policy 'policy'   设置玩家 (可用: random, greedy, expectimax, montecarlo)\n"
+        "    --budget MS         设置 expectimax 玩家每步的时间 (默认: 50)\n"
+        "    --rollouts K        设置 montecarlo 玩家每步的随机对局数 (默认: 100)\n"
+        "    --workers W         设置 montecarlo 玩家 (默认: 全部) 和 expectimax 玩家 (默认: 1) 的进程数\n"
+        "    --seed S            设置模拟游戏的随机种子\n"
+        "    --position-db [F]   复用 expectimax 玩家已求解的局面 (默认: memory/positions.db)\n"
         "\n"
         "学分:\n"
         "  游戏的作者是加布里埃尔-西鲁利（Gabriele Cirulli\n"
@@ -102,6 +147,36 @@ ALLS = {
         "Touches directionnelles:",
         "方向键:"
     ],
+    "themes":
+    [
+        "Available themes:",
+        "Thèmes disponibles:",
+        "可用主题:"
+    ],
+    "invalid_theme":
+    [
+        "invalid theme",
+        "thème invalide",
+        "无效主题"
+    ],
+    "hint":
+    [
+        "Hint",
+        "Conseil",
+        "提示"
+    ],
+    "depth":
+    [
+        "depth",
+        "profondeur",
+        "深度"
+    ],
+    "undo_redo":
+    [
+        "Undo / redo:",
+        "Annuler / rétablir:",
+        "撤销 / 重做:"
+    ],
     "won_msg":
     [
         "You won! Do you want to continue {yes/no}: ",
@@ -0,0 +1,216 @@
+"""
+Author: Bilal Vandenberge
+Date: October 2026
+-> the file with the Env and VecEnv classes (reset/step environments for reinforcement learning)
+"""
+
+
+from game import Game, GameError, spawn_rates
+import numpy as np
+import random
+
+
+# legal moves mask (see Game.legal_moves) -> one boolean per direction
+MASK_TO_LEGAL = np.array([[bool(mask >> direction & 1) for direction in range(4)] for mask in range(16)])
+
+
+def _observe(g: Game, out: np.ndarray) -> None:
+    """
+    copy the exponents of a game in a (height, width) uint8 array
+    """
+    cells = getattr(g, "cells", None) # the flat grid of the CompactGame
+    if cells is not None:
+        out.reshape(-1)[:] = np.frombuffer(cells, np.uint8)
+    else:
+        out[:] = g.grid
+
+
+class Env:
+    """represent one game of 2048 seen as an environment (observation, reward, done, legal moves)"""
+
+    # methods:
+    def __init__(self, width: int = 4, height: int = 4, engine: type = Game, mode: str = "normal", spawns: int = 2):
+        """
+        ARGS:
+            - width: the width of the grid
+            - height: the height of the grid
+            - engine: the class of the game
+            - mode: the spawn mode of the game
+            - spawns: the number of tiles spawned after each move
+        """
+        spawn_rates(mode) # check the mode
+        self._width = width
+        self._height = height
+        self._engine = engine
+        self._mode = mode
+        self._spawns = spawns
+        self._observation = np.zeros((height, width), dtype=np.uint8)
+        self._game = None
+
+    def reset(self, seed: int = None, game_id: int = 0) -> np.ndarray:
+        """
+        start a new game
+        return the observation (the array is reused by the next steps)
+        ARGS:
+            - seed: the root seed of the game (random if None)
+            - game_id: the id of the game in the stream of the seed
+        """
+        self._game = self._engine(self._width, self._height, seed, game_id)
+        self._game.spawn_random(2, "start")
+        _observe(self._game, self._observation)
+        return self._observation
+
+    def step(self, action: int) -> tuple[np.ndarray, int, bool, np.ndarray]:
+        """
+        play a move (a move that does not change the grid only returns a zero reward)
+        return the observation, the score won, if the game is lost and the legal moves
+        ARG:
+            - action: the index of the move in Game.AVAILABLE_DIRECTIONS
+        """
+        if self._game is None:
+            raise GameError("the environment must be reset before the first step")
+        g = self._game
+        score = g.score
+        if g.change_gravity(int(action)):
+            g.spawn_random(self._spawns, self._mode)
+            _observe(g, self._observation)
+        legal = g.legal_moves()
+        return self._observation, g.score - score, not legal, MASK_TO_LEGAL[legal]
+
+    # getters:
+    @property
+    def game(self) -> Game:
+        """
+        return the current game
+        """
+        return self._game
+
+    @property
+    def observation(self) -> np.ndarray:
+        """
+        return the (height, width) array of exponents
+        """
+        return self._observation
+
+    @property
+    def legal(self) -> np.ndarray:
+        """
+        return the legal moves (one boolean per direction)
+        """
+        return MASK_TO_LEGAL[self._game.legal_moves()]
+
+
+class VecEnv:
+    """represent K environments stepped in lockstep (the finished games restart on their own)"""
+
+    # methods:
+    def __init__(self, number: int, width: int = 4, height: int = 4, engine: type = Game,
+    mode: str = "normal", spawns: int = 2):
+        """
+        ARGS:
+            - number: the number of environments
+            - width: the width of the grids
+            - height: the height of the grids
+            - engine: the class of the games
+            - mode: the spawn mode of the games
+            - spawns: the number of tiles spawned after each move
+        """
+        if number < 1:
+            raise GameError(f"invalid number of environments: {number}")
+        spawn_rates(mode) # check the mode
+        self._number = number
+        self._width = width
+        self._height = height
+        self._engine = engine
+        self._mode = mode
+        self._spawns = spawns
+        # one contiguous buffer for all the observations (reused by every step)
+        self._observations = np.zeros((number, height, width), dtype=np.uint8)
+        self._rewards = np.zeros(number, dtype=np.int64)
+        self._dones = np.zeros(number, dtype=bool)
+        self._legal = np.zeros((number, 4), dtype=bool)
+        self._final_scores = np.zeros(number, dtype=np.int64)
+        self._games = [None] * number
+        self._seed = None
+        self._episodes = 0
+
+    def _start(self, index: int) -> None:
+        """
+        start the next game of the stream in an environment
+        """
+        g = self._engine(self._width, self._height, self._seed, self._episodes)
+        self._episodes += 1
+        g.spawn_random(2, "start")
+        self._games[index] = g
+        _observe(g, self._observations[index])
+        self._legal[index] = MASK_TO_LEGAL[g.legal_moves()]
+
+    def reset(self, seed: int = None) -> np.ndarray:
+        """
+        start new games in all the environments (game i of the stream of the
+        seed, then the next ids when games restart)
+        return the (K, height, width) observations
+        """
+        self._seed = random.getrandbits(63) if seed is None else seed
+        self._episodes = 0
+        for index in range(self._number):
+            self._start(index)
+        return self._observations
+
+    def step(self, actions) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        play a move in every environment, the lost games restart at once
+        (see final_scores)
+        return the observations, the scores won, if the games were lost and the
+        legal moves (the arrays are reused by the next step)
+        ARG:
+            - actions: one index of Game.AVAILABLE_DIRECTIONS per environment
+        """
+        if self._seed is None:
+            raise GameError("the environments must be reset before the first step")
+        rewards, dones, legal = self._rewards, self._dones, self._legal
+        self._final_scores[:] = 0
+        mode, spawns = self._mode, self._spawns
+        for index, (g, action) in enumerate(zip(self._games, np.asarray(actions).tolist())):
+            score = g.score
+            if g.change_gravity(action):
+                g.spawn_random(spawns, mode)
+                _observe(g, self._observations[index])
+            rewards[index] = g.score - score
+            mask = g.legal_moves()
+            dones[index] = not mask
+            if mask:
+                legal[index] = MASK_TO_LEGAL[mask]
+            else:
+                self._final_scores[index] = g.score
+                self._start(index)
+        return self._observations, rewards, dones, legal
+
+    # getters:
+    @property
+    def number(self) -> int:
+        """
+        return the number of environments
+        """
+        return self._number
+
+    @property
+    def games(self) -> list[Game]:
+        """
+        return the current game of each environment
+        """
+        return self._games
+
+    @property
+    def observations(self) -> np.ndarray:
+        """
+        return the (K, height, width) array of exponents
+        """
+        return self._observations
+
+    @property
+    def final_scores(self) -> np.ndarray:
+        """
+        return the final score of the games lost in the last step (0 for the others)
+        """
+        return self._final_scores
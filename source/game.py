@@ -6,6 +6,8 @@ Date: June 2024
 
 
 from read_theme import Theme
+from collections import deque
+from array import array
 import random
 
 
@@ -30,6 +32,200 @@ INDEX_TO_POWER = [
     131072
 ]
 
+# for each mode, the cumulative spawn probabilities and their powers:
+SPAWN_RATES = {
+    "start": ((1.0, 1),),
+    "normal": ((0.1, 2), (1.0, 1)),
+    "hell": ((0.05, 6), (0.2, 2), (1.0, 1))
+}
+
+
+def spawn_rates(mode: str) -> tuple:
+    """
+    return the table of SPAWN_RATES of a mode
+    ARG:
+        - mode: the mode of the spawn (supported: start, normal and hell)
+    """
+    if mode not in SPAWN_RATES:
+        raise GameError(f"unkown game mode: {mode[:32]}{"..." if len(mode) > 32 else ""}")
+    return SPAWN_RATES[mode]
+
+
+class SpawnStream:
+    """represent a reproducible stream of random numbers, drawn in blocks"""
+
+    __slots__ = ("_seed", "_game_id", "_block_number", "_offset", "_block")
+
+    BLOCK_SIZE = 256
+
+    # methods:
+    def __init__(self, seed: int = None, game_id: int = 0):
+        """
+        ARGS:
+            - seed: the root seed (drawn from the random module if None)
+            - game_id: the id of the game, each id gets an independent stream
+        """
+        self._seed = random.getrandbits(63) if seed is None else seed
+        self._game_id = game_id
+        self._block_number = 0
+        self._offset = 0
+        self._block = None # the numbers of the current block (drawn by the first random call)
+
+    def _draw_block(self, number: int) -> array:
+        """
+        return the block of random numbers of an index (each block has its
+        own generator so any position of the stream can be reached directly)
+        """
+        rand = random.Random(f"{self._seed}/{self._game_id}/{number}").random
+        return array("d", [rand() for _ in range(SpawnStream.BLOCK_SIZE)])
+
+    def random(self) -> float:
+        """
+        return the next random number of the stream, in [0, 1)
+        """
+        if self._offset == SpawnStream.BLOCK_SIZE:
+            self._block_number += 1
+            self._offset = 0
+            self._block = None
+        if self._block is None:
+            self._block = self._draw_block(self._block_number)
+        self._offset += 1
+        return self._block[self._offset - 1]
+
+    def seek(self, state: tuple[int, int]) -> None:
+        """
+        move the stream to a position returned by the state getter
+        """
+        block_number, self._offset = state
+        if block_number != self._block_number:
+            self._block_number = block_number
+            self._block = None
+
+    def release(self) -> None:
+        """
+        forget the current block (2 KB), drawn again by the next random call:
+        an idle game only keeps the position of its stream
+        """
+        self._block = None
+
+    # getters:
+    @property
+    def seed(self) -> int:
+        """
+        return the root seed of the stream
+        """
+        return self._seed
+
+    @property
+    def game_id(self) -> int:
+        """
+        return the game id of the stream
+        """
+        return self._game_id
+
+    @property
+    def state(self) -> tuple[int, int]:
+        """
+        return the position of the stream (block index, offset in the block)
+        """
+        return self._block_number, self._offset
+
+
+class FreeSpots:
+    """represent the free positions of a grid (O(1) add, remove and random pick)"""
+
+    # methods:
+    def __init__(self, size: int):
+        self._spots = list(range(size)) # dense array of the free positions
+        self._index = list(range(size)) # position -> index in _spots (-1 if taken)
+
+    def add(self, pos: int) -> None:
+        """
+        mark a position as free
+        """
+        if self._index[pos] == -1:
+            self._index[pos] = len(self._spots)
+            self._spots.append(pos)
+
+    def remove(self, pos: int) -> None:
+        """
+        mark a position as taken (swap with the last free position, then pop)
+        """
+        index = self._index[pos]
+        if index == -1:
+            raise KeyError(pos)
+        last = self._spots.pop()
+        if last != pos:
+            self._spots[index] = last
+            self._index[last] = index
+        self._index[pos] = -1
+
+    def reorder(self, order: list[int]) -> None:
+        """
+        replace the order of the free positions (the picks depend on it)
+        ARG:
+            - order: the same free positions, in their new order
+        """
+        if sorted(order) != sorted(self._spots):
+            raise GameError("the new order must hold the same free positions")
+        self._spots = list(order)
+        for index, pos in enumerate(self._spots):
+            self._index[pos] = index
+
+    def choice(self, rand_val: float) -> int:
+        """
+        return a free position picked by a random number in [0, 1)
+        """
+        return self._spots[int(rand_val * len(self._spots))]
+
+    def __contains__(self, pos: int) -> bool:
+        """
+        return pos in self
+        """
+        return self._index[pos] != -1
+
+    def __len__(self) -> int:
+        """
+        return len(self)
+        """
+        return len(self._spots)
+
+    def __iter__(self):
+        """
+        return iter(self)
+        """
+        return iter(self._spots)
+
+# the events of a move or a spawn (see Game.change_gravity and Game.spawn_random),
+# positions are line * width + column:
+EVENT_MOVE = 0 # (EVENT_MOVE, from, to): a tile slides
+EVENT_MERGE = 1 # (EVENT_MERGE, from, into, exponent): a tile merges, the result has the exponent
+EVENT_SPAWN = 2 # (EVENT_SPAWN, position, exponent): a tile appears
+
+
+def line_events(positions, tiles, events: list, max_exponent: int = None) -> None:
+    """
+    add the events of a line that slides toward its first cell (same rules
+    as Game._left: a tile merges with the last stacked one)
+    ARGS:
+        - positions: the positions of the cells of the line, from the wall
+        - tiles: the exponents of the cells before the move
+        - events: the list of the events
+        - max_exponent: the biggest exponent that cannot merge anymore (None if there is none)
+    """
+    stack = [] # [exponent, position] of the stacked tiles
+    for pos, tile in zip(positions, tiles):
+        if not tile:
+            continue
+        if stack and stack[-1][0] == tile and (max_exponent is None or tile < max_exponent):
+            stack[-1][0] = tile + 1
+            events.append((EVENT_MERGE, pos, stack[-1][1], tile + 1))
+        else:
+            target = positions[len(stack)]
+            stack.append([tile, target])
+            if target != pos:
+                events.append((EVENT_MOVE, pos, target))
+
 
 class GameError(Exception):
     """represent a 2048 game intended exception"""
@@ -40,50 +236,158 @@ class Game:
     """represent a game of 2048"""
 
     AVAILABLE_DIRECTIONS = ["up", "down", "left", "right"]
+    JOURNAL_LIMIT = 10000 # the number of moves that can be undone
 
     # methods:
-    def __init__(self, width: int = 4, height: int = 4):
+    def __init__(self, width: int = 4, height: int = 4, seed: int = None, game_id: int = 0, journal: bool = False):
+        """
+        ARGS:
+            - width: the width of the grid
+            - height: the height of the grid
+            - seed: the root seed of the spawns (see SpawnStream)
+            - game_id: the id of the game in the stream of the seed
+            - journal: if the moves are journaled for undo and redo (the
+            interactive game only, the other callers do not pay for it)
+        """
         self._width = width
         self._height = height
         self._size = width * height
         self._score = 0
         self._max_tile = 1 # the value of the biggest tile on the grid
+        self._stream = SpawnStream(seed, game_id)
+        self._events = None # the list of the events of the current move (None if nobody listens)
         self._build_grid()
+        self._build_journal(journal)
 
     def _build_grid(self) -> None:
         """
         build the grid of the game
         """
         self._grid = [[0 for _ in range(self._width)] for _ in range(self._height)]
-        self._free_spots = set(range(self._width * self._height))
+        self._free_spots = FreeSpots(self._width * self._height)
+        self._legal = 0 # the mask of legal_moves (None if the grid changed since it was computed)
+
+    def _build_journal(self, enabled: bool) -> None:
+        """
+        build the journal of the moves (see undo and redo), None if the moves are not journaled
+        """
+        # entries: (changes of the cells, score, max tile, stream state) before the move
+        self._journal = deque(maxlen=self.JOURNAL_LIMIT) if enabled else None
+        self._redo = [] if enabled else None
+        self._deltas = None # the changes of the last move (None if they are not journaled)
+
+    def _set_cell(self, line: int, column: int, value: int) -> None:
+        """
+        set the exponent of a cell (the legal moves are computed again when asked)
+        ARGS:
+            - line: the line of the cell
+            - column: the column of the cell
+            - value: the new exponent of the cell
+        """
+        if self._deltas is not None:
+            self._deltas.append((line * self._width + column) << 16 | self._grid[line][column] << 8 | value)
+        self._grid[line][column] = value
+        self._legal = None
+
+    def load(self, grid: list[list[int]], score: int = 0, max_tile: int = 1,
+    stream_state: tuple[int, int] = None, free_order: list[int] = None) -> None:
+        """
+        replace the position of the game
+        ARGS:
+            - grid: the grid of exponents (same size as the game)
+            - score: the score of the position
+            - max_tile: the biggest merged tile of the position
+            - stream_state: the position of the spawn stream (see SpawnStream.state)
+            - free_order: the order of the free spots (see FreeSpots.reorder),
+            needed to draw the same spawns as the saved game
+        """
+        if len(grid) != self._height or any(len(line) != self._width for line in grid):
+            raise GameError(f"the grid does not fit a {self._width}x{self._height} game")
+        self._build_grid()
+        for line in range(self._height):
+            for column in range(self._width):
+                if grid[line][column]:
+                    self._free_spots.remove(line * self._width + column)
+                    self._set_cell(line, column, grid[line][column])
+        if free_order is not None:
+            self._free_spots.reorder(free_order)
+        self._score = score
+        self._max_tile = max_tile
+        if stream_state is not None:
+            self._stream.seek(stream_state)
+        self._build_journal(self._journal is not None)
+
+    def frame(self, theme: Theme = None) -> list:
+        """
+        return the lines of the grid of the game: a string per line without
+        theme, a (cells, width of a cell) tuple per line with a theme
+        (see renderer.Renderer)
+        """
+        if theme is None:
+            return [" ".join([str(INDEX_TO_POWER[e]) for e in line]) for line in self.grid]
+        max_len = len(str(INDEX_TO_POWER[self.max_tile])) + 1
+        cells = theme.cells(max_len)
+        return [([cells[e] for e in line], max_len) for line in self.grid]
 
     def display(self, theme: Theme = None) -> None:
         """
         show in the terminal the grid of the game
         """
-        max_len = len(str(INDEX_TO_POWER[self._max_tile])) + 1
-        if theme is None:
-            for line in self._grid:
-                print(" ".join([str(INDEX_TO_POWER[e]) for e in line]))
-        else:
-            for line in self._grid:
-                for e in line:
-                    colors = theme.index(e)
-                    print(colors[1].fg(colors[0].bg(str(INDEX_TO_POWER[e]).rjust(max_len))), end="")
-                print()
+        for line in self.frame(theme):
+            print(line if isinstance(line, str) else "".join(line[0]))
+
+    def release(self) -> None:
+        """
+        forget the block of the spawn stream of an idle game (drawn again by
+        the next spawn), for the callers that keep a lot of live games
+        """
+        self._stream.release()
 
     def is_lost(self) -> bool:
         """
-        return if the game is in a dead end
+        return if the game is in a dead end (never with a free cell, an empty
+        grid has no legal move but is not lost)
         """
-        if self.is_full():
-            for y in range(self._width - 1):
-                for x in range(self._height - 1):
-                    if self._grid[x][y] == self._grid[x][y + 1] or self._grid[x][y] == self._grid[x + 1][y]:
-                        return False
-            return True
-        else:
+        if len(self._free_spots):
             return False
+        return not self.legal_moves()
+
+    def legal_moves(self) -> int:
+        """
+        return the mask of the directions that change the grid
+        (bit i is set if AVAILABLE_DIRECTIONS[i] is legal), computed once per
+        position: a tile next to a gap or to an equal tile
+        """
+        if self._legal is not None:
+            return self._legal
+        mask = 0
+        grid = self._grid
+        for line in grid: # left (4) and right (8)
+            for first, second in zip(line, line[1:]):
+                if first:
+                    if first == second:
+                        mask |= 12
+                        break
+                    if not second:
+                        mask |= 8
+                elif second:
+                    mask |= 4
+            if mask & 12 == 12:
+                break
+        for upper, lower in zip(grid, grid[1:]): # up (1) and down (2)
+            for first, second in zip(upper, lower):
+                if first:
+                    if first == second:
+                        mask |= 3
+                        break
+                    if not second:
+                        mask |= 2
+                elif second:
+                    mask |= 1
+            if mask & 3 == 3:
+                break
+        self._legal = mask
+        return mask
 
     def is_full(self) -> bool:
         """
@@ -98,28 +402,21 @@ class Game:
         ARG:
             - mode: the mode of the spawn (supported: start, normal and hell)
         """
-        rand_val = random.random()
-        match mode:
-            case "start":
-                return 1
-            case "normal":
-                if rand_val <= 0.1:
-                    return 2
-                else:
-                    return 1
-            case "hell":
-                if rand_val <= 0.05:
-                    return 6
-                elif rand_val <= 0.2:
-                    return 2
-                else:
-                    return 1
-            case _:
-                raise GameError(f"unkown game mode: {mode[:32]}{"..." if len(mode) > 32 else ""}")
+        return self._draw_power(spawn_rates(mode))
+
+    def _draw_power(self, rates: tuple) -> int:
+        """
+        return a random power using a table of SPAWN_RATES
+        """
+        rand_val = self._stream.random()
+        for threshold, power in rates:
+            if rand_val <= threshold:
+                return power
 
-    def spawn_random(self, number: int, mode: str = "normal") -> None:
+    def spawn_random(self, number: int, mode: str = "normal", events: list = None) -> list[tuple[int, int]]:
         """
         spawn randoms 2 and 4 tiles on the grid
+        return the spawned tiles (position, exponent)
         SPAWN RATE (start mode):
             - 2: 100%
         SPAWN RATE (normal mode):
@@ -132,31 +429,115 @@ class Game:
         ARGS:
             - number: the number of tiles to spawn
             - mode: the mode of the spawn (supported: normal and hell)
+            - events: the list where the EVENT_SPAWN events are added (none if None)
         """
+        rates = spawn_rates(mode)
         if len(self._free_spots) < number:
             # raise GameError("not enough space to spawn new tiles")
             number = len(self._free_spots) # Will stop after reaching the full grid completion
+        spawned = []
         for tile in range(number):
             # 1. find a line + column
-            pos = random.choice(list(self._free_spots))
+            pos = self._free_spots.choice(self._stream.random())
             # 2. choose a value for the tile
-            val = self.random_pow(mode)
+            val = self._draw_power(rates)
             # 3. update the grid, tiles number, free spots
             self._free_spots.remove(pos)
-            self._grid[pos // self._width][pos % self._width] = val
+            self._set_cell(pos // self._width, pos % self._width, val)
+            spawned.append((pos, val))
+        if events is not None:
+            events.extend((EVENT_SPAWN, pos, val) for pos, val in spawned)
+        return spawned
 
-    def change_gravity(self, orientation: int = 0) -> None:
+    def change_gravity(self, orientation: int = 0, events: list = None) -> None:
         """
         update the grid with a new gravity (down, up, left, right)
-        ARG:
+        ARGS:
             - orientation: the index of the new orientation in the AVAILABLE_DIRECTIONS:
                 0 -> up
                 1 -> down
                 2 -> left
                 3 -> right
+            - events: the list where the EVENT_MOVE and EVENT_MERGE events are
+            added, in an order that turns the old grid into the new one (none if None)
         """
         assert isinstance(orientation, int) and 0 <= orientation < 4
-        return (self._up, self._down, self._left, self._right)[orientation]()
+        if self._journal is not None:
+            before = (self._score, self._max_tile, self._stream.state)
+            self._deltas = []
+        self._events = events
+        try:
+            changed = (self._up, self._down, self._left, self._right)[orientation]()
+        finally:
+            self._events = None
+        if changed and self._journal is not None:
+            self._push_entry(before)
+        else:
+            self._deltas = None
+        return changed
+
+    def _push_entry(self, before: tuple) -> None:
+        """
+        journal the last move (its spawns are added until the next move)
+        ARG:
+            - before: the score, the max tile and the stream state before the move
+        """
+        self._journal.append((self._deltas, *before))
+        self._redo.clear()
+
+    def _revert(self, deltas: list) -> None:
+        """
+        undo the changes of the cells of a move (see _set_cell)
+        """
+        for delta in reversed(deltas):
+            pos, old, new = delta >> 16, (delta >> 8) & 0xFF, delta & 0xFF
+            self._set_cell(pos // self._width, pos % self._width, old)
+            if not old:
+                self._free_spots.add(pos)
+            elif not new:
+                self._free_spots.remove(pos)
+
+    def _replay(self, deltas: list) -> None:
+        """
+        redo the changes of the cells of a move (see _set_cell)
+        """
+        for delta in deltas:
+            pos, old, new = delta >> 16, (delta >> 8) & 0xFF, delta & 0xFF
+            self._set_cell(pos // self._width, pos % self._width, new)
+            if not new:
+                self._free_spots.add(pos)
+            elif not old:
+                self._free_spots.remove(pos)
+
+    def undo(self) -> bool:
+        """
+        cancel the last move and its spawns in O(changed cells)
+        return if there was a move to undo (never without a journal)
+        """
+        if not self._journal:
+            return False
+        deltas, score, max_tile, state = self._journal.pop()
+        self._deltas = None
+        self._redo.append((deltas, self._score, self._max_tile, self._stream.state))
+        self._revert(deltas)
+        self._score, self._max_tile = score, max_tile
+        self._stream.seek(state)
+        return True
+
+    def redo(self) -> bool:
+        """
+        play again the last undone move and its spawns
+        return if there was a move to redo (never without a journal)
+        """
+        if not self._redo:
+            return False
+        deltas, score, max_tile, state = self._redo.pop()
+        self._deltas = None
+        self._journal.append((deltas, self._score, self._max_tile, self._stream.state))
+        self._replay(deltas)
+        self._score, self._max_tile = score, max_tile
+        self._stream.seek(state)
+        return True
 
     def _down(self) -> bool:
         """
@@ -164,33 +545,43 @@ class Game:
         return if there was any change
         """
         changed = False
+        events = self._events
         for column in range(self._width):
             for case in range(self._height - 2, -1, -1):
                 y_pos = case
                 # stop if case is empty
                 pos = column + case * self._width
-                if pos in self._free_spots:
+                if not self._grid[case][column]:
                     continue
                 # the tile falls
-                while y_pos < self._height - 1 and pos + self._width in self._free_spots:
+                while y_pos < self._height - 1 and not self._grid[y_pos + 1][column]:
                     y_pos += 1
                     pos += self._width
                 if case != y_pos:
                     changed = True
                     # update position in the grid
-                    self._grid[case][column], self._grid[y_pos][column] = self._grid[y_pos][column], self._grid[case][column]
+                    self._set_cell(y_pos, column, self._grid[case][column])
+                    self._set_cell(case, column, 0)
                     # update free_spots
                     self._free_spots.remove(pos)
                     self._free_spots.add(case * self._width + column)
+                    if events is not None:
+                        events.append((EVENT_MOVE, case * self._width + column, pos))
                 # merge with the bottom tile if the values are identical
                 if y_pos < self._height - 1 and self._grid[y_pos][column] == self._grid[y_pos + 1][column]:
                     changed = True
-                    self._grid[y_pos][column] = 0
-                    self._grid[y_pos + 1][column] += 1
+                    self._set_cell(y_pos, column, 0)
+                    self._set_cell(y_pos + 1, column, self._grid[y_pos + 1][column] + 1)
                     add_to_score = self._grid[y_pos + 1][column]
                     self._score += INDEX_TO_POWER[add_to_score]
                     self._max_tile = max(self._max_tile, add_to_score)
                     self._free_spots.add(pos)
+                    if events is not None:
+                        event = (EVENT_MERGE, case * self._width + column, pos + self._width, add_to_score)
+                        if case != y_pos:
+                            events[-1] = event # the tile slid before merging
+                        else:
+                            events.append(event)
         return changed
 
     def _up(self) -> bool:
@@ -199,33 +590,43 @@ class Game:
         return if there was any change
         """
         changed = False
+        events = self._events
         for column in range(self._width):
             for case in range(1, self._height):
                 y_pos = case
                 # stop if case is empty
                 pos = column + case * self._width
-                if pos in self._free_spots:
+                if not self._grid[case][column]:
                     continue
                 # the tile falls
-                while y_pos > 0 and pos - self._width in self._free_spots:
+                while y_pos > 0 and not self._grid[y_pos - 1][column]:
                     y_pos -= 1
                     pos -= self._width
                 if case != y_pos:
                     changed = True
                     # update position in the grid
-                    self._grid[case][column], self._grid[y_pos][column] = self._grid[y_pos][column], self._grid[case][column]
+                    self._set_cell(y_pos, column, self._grid[case][column])
+                    self._set_cell(case, column, 0)
                     # update free_spots
                     self._free_spots.remove(pos)
                     self._free_spots.add(case * self._width + column)
+                    if events is not None:
+                        events.append((EVENT_MOVE, case * self._width + column, pos))
                 # merge with the bottom tile if the values are identical
                 if y_pos > 0 and self._grid[y_pos][column] == self._grid[y_pos - 1][column]:
                     changed = True
-                    self._grid[y_pos][column] = 0
-                    self._grid[y_pos - 1][column] += 1
+                    self._set_cell(y_pos, column, 0)
+                    self._set_cell(y_pos - 1, column, self._grid[y_pos - 1][column] + 1)
                     add_to_score = self._grid[y_pos - 1][column]
                     self._score += INDEX_TO_POWER[add_to_score]
                     self._max_tile = max(self._max_tile, add_to_score)
                     self._free_spots.add(pos)
+                    if events is not None:
+                        event = (EVENT_MERGE, case * self._width + column, pos - self._width, add_to_score)
+                        if case != y_pos:
+                            events[-1] = event # the tile slid before merging
+                        else:
+                            events.append(event)
         return changed
 
     def _left(self) -> bool:
@@ -234,34 +635,44 @@ class Game:
         return if there was any change
         """
         changed = False
+        events = self._events
         for line in range(self._height):
             y_pos = line * self._width
             for case in range(1, self._width):
                 x_pos = case
                 # stop if case is empty
                 pos = y_pos + x_pos
-                if pos in self._free_spots:
+                if not self._grid[line][case]:
                     continue
                 # the tile falls
-                while x_pos > 0 and pos - 1 in self._free_spots:
+                while x_pos > 0 and not self._grid[line][x_pos - 1]:
                     x_pos -= 1
                     pos -= 1
                 if case != x_pos:
                     changed = True
                     # update position in the grid
-                    self._grid[line][case], self._grid[line][x_pos] = self._grid[line][x_pos], self._grid[line][case]
+                    self._set_cell(line, x_pos, self._grid[line][case])
+                    self._set_cell(line, case, 0)
                     # update free_spots
                     self._free_spots.remove(y_pos + x_pos)
                     self._free_spots.add(y_pos + case)
+                    if events is not None:
+                        events.append((EVENT_MOVE, y_pos + case, pos))
                 # merge with the bottom tile if the values are identical
                 if x_pos > 0 and self._grid[line][x_pos] == self._grid[line][x_pos - 1]:
                     changed = True
-                    self._grid[line][x_pos] = 0
-                    self._grid[line][x_pos - 1] += 1
+                    self._set_cell(line, x_pos, 0)
+                    self._set_cell(line, x_pos - 1, self._grid[line][x_pos - 1] + 1)
                     add_to_score = self._grid[line][x_pos - 1]
                     self._score += INDEX_TO_POWER[add_to_score]
                     self._max_tile = max(self._max_tile, add_to_score)
                     self._free_spots.add(y_pos + x_pos)
+                    if events is not None:
+                        event = (EVENT_MERGE, y_pos + case, pos - 1, add_to_score)
+                        if case != x_pos:
+                            events[-1] = event # the tile slid before merging
+                        else:
+                            events.append(event)
         return changed
 
     def _right(self) -> bool:
@@ -270,34 +681,44 @@ class Game:
         return if there was any change
         """
         changed = False
+        events = self._events
         for line in range(self._height):
             y_pos = line * self._width
             for case in range(self._width - 2, -1, -1):
                 x_pos = case
                 # stop if case is empty
                 pos = y_pos + x_pos
-                if pos in self._free_spots:
+                if not self._grid[line][case]:
                     continue
                 # the tile falls
-                while x_pos < self._width - 1 and pos + 1 in self._free_spots:
+                while x_pos < self._width - 1 and not self._grid[line][x_pos + 1]:
                     x_pos += 1
                     pos += 1
                 if case != x_pos:
                     changed = True
                     # update position in the grid
-                    self._grid[line][case], self._grid[line][x_pos] = self._grid[line][x_pos], self._grid[line][case]
+                    self._set_cell(line, x_pos, self._grid[line][case])
+                    self._set_cell(line, case, 0)
                     # update free_spots
                     self._free_spots.remove(y_pos + x_pos)
                     self._free_spots.add(y_pos + case)
+                    if events is not None:
+                        events.append((EVENT_MOVE, y_pos + case, pos))
                 # merge with the bottom tile if the values are identical
                 if x_pos < self._width - 1 and self._grid[line][x_pos] == self._grid[line][x_pos + 1]:
                     changed = True
-                    self._grid[line][x_pos] = 0
-                    self._grid[line][x_pos + 1] += 1
+                    self._set_cell(line, x_pos, 0)
+                    self._set_cell(line, x_pos + 1, self._grid[line][x_pos + 1] + 1)
                     add_to_score = self._grid[line][x_pos + 1]
                     self._score += INDEX_TO_POWER[add_to_score]
                     self._max_tile = max(self._max_tile, add_to_score)
                     self._free_spots.add(y_pos + x_pos)
+                    if events is not None:
+                        event = (EVENT_MERGE, y_pos + case, pos + 1, add_to_score)
+                        if case != x_pos:
+                            events[-1] = event # the tile slid before merging
+                        else:
+                            events.append(event)
         return changed
 
     # getters:
@@ -322,6 +743,13 @@ class Game:
         """
         return self._score
 
+    @property
+    def stream(self) -> SpawnStream:
+        """
+        return the random stream of the spawns
+        """
+        return self._stream
+
     @property
     def grid(self) -> list[list]:
         """
@@ -330,9 +758,9 @@ class Game:
         return self._grid
 
     @property
-    def free_spots(self) -> list[list]:
+    def free_spots(self) -> FreeSpots:
         """
-        return the list of free spots (without a tile)
+        return the free spots (without a tile)
         """
         return self._free_spots
 
@@ -393,6 +821,8 @@ class GameSettings:
             - layout: the layout type (see AVAILABLE above)
             - crosses: ONLY if layout == custom, is the manual layout of the keys
         """
+        self._layout_name = layout
+        self._custom_UDLR = custom_UDLR
         match layout:
             case "cross": # ex: wasd on Qwerty keyboards
                 self._layout = f"   [{self.up_key.upper()}]   \n[{self.left_key.upper()}][{self.down_key.upper()}][{self.right_key.upper()}]"
@@ -511,6 +941,20 @@ class GameSettings:
         """
         return self._layout
 
+    @property
+    def layout_name(self) -> str:
+        """
+        return the name of the layout of the keys (see AVAILABLE_LAYOUTS)
+        """
+        return self._layout_name
+
+    @property
+    def custom_UDLR(self) -> str:
+        """
+        return the manual layout of the keys (None if the layout is not custom)
+        """
+        return self._custom_UDLR
+
     @property
     def language(self) -> str:
         """
@@ -0,0 +1,153 @@
+"""
+Author: Bilal Vandenberge
+Date: October 2026
+-> the file with the Heuristic class (board evaluation from precomputed row tables)
+"""
+
+
+from game import GameError
+import bitboard
+import zlib
+
+
+# the terms of a line of 4 exponents (the bigger, the better for the player):
+#   alive: 1 for every line, keeps any living position above a dead end
+#   empty: the number of empty cells
+#   merges: the tiles that can merge with a neighbour (ignoring the gaps)
+#   monotonicity: minus the smallest of the increases and decreases along the line
+#   smoothness: minus the differences between neighbour tiles (ignoring the gaps)
+#   sum: minus the sum of the tiles (each exponent to the sum power)
+#   corner: the biggest exponent of the line if it is at one of its ends
+# each term is the same for a line and its reverse, so the 8 symmetric boards
+# have the same value (see symmetry.py)
+TERMS = ("alive", "empty", "merges", "monotonicity", "smoothness", "sum", "corner")
+DEFAULT_WEIGHTS = {
+    "alive": 200000.0,
+    "empty": 270.0,
+    "merges": 700.0,
+    "monotonicity": 47.0,
+    "smoothness": 0.0,
+    "sum": 11.0,
+    "corner": 0.0
+}
+MONOTONICITY_POWER = 4.0
+SUM_POWER = 3.5
+
+_TERM_TABLES = {} # (monotonicity power, sum power) -> one table of 65536 values per term
+
+
+def row_terms(cells: list[int], monotonicity_power: float = MONOTONICITY_POWER, sum_power: float = SUM_POWER) -> tuple[float, ...]:
+    """
+    return the terms of a line (same order as TERMS)
+    ARGS:
+        - cells: the exponents of the line
+        - monotonicity_power: the power of the exponents in the monotonicity
+        - sum_power: the power of the exponents in the sum
+    """
+    tiles = [e for e in cells if e]
+    merges = 0
+    counter = 0
+    for previous, e in zip(tiles, tiles[1:]):
+        if e == previous:
+            counter += 1
+        elif counter:
+            merges += 1 + counter
+            counter = 0
+    if counter:
+        merges += 1 + counter
+    left = right = 0.0
+    for previous, e in zip(cells, cells[1:]):
+        if previous > e:
+            left += previous ** monotonicity_power - e ** monotonicity_power
+        else:
+            right += e ** monotonicity_power - previous ** monotonicity_power
+    biggest = max(cells)
+    return (
+        1.0,
+        float(cells.count(0)),
+        float(merges),
+        -min(left, right),
+        -float(sum(abs(e - previous) for previous, e in zip(tiles, tiles[1:]))),
+        -sum(e ** sum_power for e in cells),
+        float(biggest) if biggest in (cells[0], cells[-1]) else 0.0
+    )
+
+
+def term_tables(monotonicity_power: float = MONOTONICITY_POWER, sum_power: float = SUM_POWER) -> tuple[list[float], ...]:
+    """
+    return the table of every term for the 65536 packed lines (computed once
+    per pair of powers)
+    """
+    key = (monotonicity_power, sum_power)
+    if key not in _TERM_TABLES:
+        rows = [
+            row_terms([(row >> 4 * i) & bitboard.CELL_MASK for i in range(bitboard.SIDE)], monotonicity_power, sum_power)
+            for row in range(65536)
+        ]
+        _TERM_TABLES[key] = tuple(map(list, zip(*rows)))
+    return _TERM_TABLES[key]
+
+
+class Heuristic:
+    """represent a weighted board evaluation (a lookup per line and per column)"""
+
+    # methods:
+    def __init__(self, weights: dict[str, float] = None, monotonicity_power: float = MONOTONICITY_POWER,
+    sum_power: float = SUM_POWER):
+        """
+        ARGS:
+            - weights: the weight of some TERMS (the others keep DEFAULT_WEIGHTS)
+            - monotonicity_power: the power of the exponents in the monotonicity
+            - sum_power: the power of the exponents in the sum
+        """
+        self._weights = dict(DEFAULT_WEIGHTS)
+        self._powers = (monotonicity_power, sum_power)
+        self.set_weights(weights or {})
+
+    def set_weights(self, weights: dict[str, float]) -> None:
+        """
+        change the weight of some terms and rebuild the table of the lines
+        """
+        for name in weights:
+            if name not in DEFAULT_WEIGHTS:
+                raise GameError(f"unknown heuristic term - {name}")
+        self._weights.update(weights)
+        used = [(self._weights[name], table) for name, table in zip(TERMS, term_tables(*self._powers)) if self._weights[name]]
+        rows = [0.0] * 65536
+        for weight, table in used:
+            rows = [value + weight * term for value, term in zip(rows, table)]
+        self._rows = rows
+
+    def evaluate(self, board: int) -> float:
+        """
+        return the value of a packed board (sum of its lines and columns)
+        """
+        rows = self._rows
+        t = bitboard.transpose(board)
+        return (rows[board & 0xFFFF] + rows[(board >> 16) & 0xFFFF]
+        + rows[(board >> 32) & 0xFFFF] + rows[board >> 48]
+        + rows[t & 0xFFFF] + rows[(t >> 16) & 0xFFFF]
+        + rows[(t >> 32) & 0xFFFF] + rows[t >> 48])
+
+    # getters:
+    @property
+    def weights(self) -> dict[str, float]:
+        """
+        return the weight of each term
+        """
+        return dict(self._weights)
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        return a short hash of the weights and powers (two heuristics with the
+        same fingerprint give the same values)
+        """
+        return f"{zlib.crc32(repr((sorted(self._weights.items()), self._powers)).encode()):08x}"
+
+    @property
+    def rows(self) -> list[float]:
+        """
+        return the value of every packed line
+        """
+        return self._rows
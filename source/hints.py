@@ -0,0 +1,99 @@
+"""
+Author: Bilal Vandenberge
+Date: October 2026
+-> the file with the HintEngine class (a solver thread that searches while the player thinks)
+"""
+
+
+from solver import Solver, to_board
+import threading
+
+
+class HintEngine:
+    """represent a solver thread that searches the shown position until the next key"""
+
+    # methods:
+    def __init__(self, on_update, mode: str = "normal", spawns: int = 2, max_depth: int = 8, database=None):
+        """
+        ARGS:
+            - on_update: the function called with (depth, best move, value)
+            after each completed iteration of the search (from the thread)
+            - mode: the spawn mode of the game
+            - spawns: the number of tiles spawned after each move
+            - max_depth: the deepest iteration (the thread then waits)
+            - database: the PositionDB of the solver (see position_db.py)
+        """
+        self._solver = Solver(mode=mode, spawns=spawns, max_depth=max_depth, database=database)
+        self._on_update = on_update
+        self._condition = threading.Condition()
+        self._board = None # the next position to search
+        self._cancel = threading.Event() # the event of the current search
+        self._generation = 0 # changed by every search and cancel
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="hint-engine", daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> "HintEngine":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def search(self, position) -> None:
+        """
+        stop the current search and search a new position (returns at once)
+        ARG:
+            - position: a 4x4 Game, grid of exponents or packed board
+        """
+        board = to_board(position)
+        with self._condition:
+            self._cancel.set()
+            self._cancel = threading.Event()
+            self._board = board
+            self._generation += 1
+            self._condition.notify()
+
+    def cancel(self) -> None:
+        """
+        stop the current search (on_update is not called anymore once it returns)
+        """
+        with self._condition:
+            self._cancel.set()
+            self._board = None
+            self._generation += 1
+
+    def close(self) -> None:
+        """
+        stop the search and the thread
+        """
+        with self._condition:
+            self._cancel.set()
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+    def _run(self) -> None:
+        """
+        search the positions given by search until close
+        """
+        while True:
+            with self._condition:
+                while self._board is None and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                board, cancel, generation = self._board, self._cancel, self._generation
+                self._board = None
+            for depth, orientation, value in self._solver.iterate(board, None, cancel):
+                with self._condition: # an update never follows a search or a cancel
+                    if generation != self._generation:
+                        break
+                    self._on_update(depth, orientation, value)
+
+    # getters:
+    @property
+    def solver(self) -> Solver:
+        """
+        return the solver of the thread
+        """
+        return self._solver
@@ -8,21 +8,23 @@ import shutil as st
 import os
 from getkey import getkey
 import argparse as ap
+import random
 
 import read_theme
+import theme_registry
 import dictionnary
 import game
+import simulation
+import replay
+import save
+import renderer
 import loading_screen
 
 
-def clear_terminal() -> None:
-    """
-    clear the terminal
-    """
-    if os.name == "posix": # Unix
-        os.system("clear")
-    else: # Windows
-        os.system("cls")
+ENGINES = {"classic": "Game", "bitboard": "BitGame", "compact": "CompactGame"} # the classes of replay.ENGINES
+UNDO_KEY = "u"
+REDO_KEY = "r"
+ARROWS = "↑↓←→" # same order as Game.AVAILABLE_DIRECTIONS
 
 
 def format_cross_os(unknown) -> str:
@@ -81,51 +83,105 @@ def update_best_score(current_score: int) -> None:
             f.write(str(current_score))  
 
 
-def run_game(settings: game.GameSettings) -> None:
+def show_hint(settings: game.GameSettings, depth: int, orientation: int, value: float) -> None:
     """
-    run a game of 2048
-    ARG:
+    rewrite the last line with the best move found so far (called by the hint
+    thread while getkey waits for the player)
+    """
+    print(f"\r\033[K{dictionnary.ALLS["hint"][settings.language_index]}: {settings.keys[orientation].upper()} {ARROWS[orientation]}"
+    f" ({dictionnary.ALLS["depth"][settings.language_index]} {depth}, {value:.0f})", end="", flush=True)
+
+
+def run_game(settings: game.GameSettings, engine: type = game.Game, record: str = None, g: game.Game = None,
+show_hints: bool = False, database: "position_db.PositionDB" = None) -> None:
+    """
+    run a game of 2048 (saved in memory/save after each move)
+    ARGS:
         - settings: the Game settings (keys, etc.)
+        - engine: the class of the game (see ENGINES)
+        - record: the path of the replay file of the game (not recorded if None)
+        - g: the game to resume (a new game if None), with a journal for undo and redo
+        - show_hints: if a solver searches the best move while the player thinks (4x4 grids only)
+        - database: the position database of the hints (none if None)
+    """
+    if g is None:
+        g = engine(journal=True) # undo and redo (see UNDO_KEY)
+        g.spawn_random(2, "start")
+    saver = save.AutoSaver(save.SAVE_PATH)
+    hint_engine = None
+    if show_hints: # the solver and its tables are only loaded for the hints
+        import hints
+        hint_engine = hints.HintEngine(lambda *hint: show_hint(settings, *hint), settings.difficulty, database=database)
+    try:
+        play_game(settings, g, record, saver, hint_engine)
+    finally:
+        if hint_engine is not None:
+            hint_engine.close()
+        saver.close() # Ctrl-C keeps the last move
+
+
+def play_game(settings: game.GameSettings, g: game.Game, record: str, saver: save.AutoSaver,
+hint_engine: "hints.HintEngine" = None) -> None:
+    """
+    play a game of 2048 until it is lost or left (see run_game)
     """
-    clear_terminal()
-    g = game.Game()
-    g.spawn_random(2, "start")
+    writer = None if record is None else replay.ReplayWriter(record, g, settings.difficulty, 2, spawn_records=True)
+    screen = renderer.Renderer() # each frame only rewrites the changed cells and lines
     direction = "?"
     win_flag = False
     lose_flag = False
     err_flag = False
     while not lose_flag:
-        g.display(settings.theme)
-        print(f"{dictionnary.ALLS["current_score"][settings.language_index]}: {g.score}")
+        lines = g.frame(settings.theme)
+        lines.append(f"{dictionnary.ALLS["current_score"][settings.language_index]}: {g.score}")
         if err_flag:
-            print(dictionnary.ALLS["unknown_direction"][settings.language_index] +
+            lines.append(dictionnary.ALLS["unknown_direction"][settings.language_index] +
             f" [{(repr(direction.upper()[0])[1:-1] + ("..." if len(direction) > 1 else "")) if len(direction) else ""}]")
             err_flag = False
-        print(f"{dictionnary.ALLS["use"][settings.language_index]} {{{" ".join(settings.keys)}}}\n\n{settings.layout}\n")
+        lines.extend(f"{dictionnary.ALLS["use"][settings.language_index]} {{{" ".join(settings.keys)}}}\n\n{settings.layout}\n".split("\n"))
+        if writer is None:
+            lines.append(f"{dictionnary.ALLS["undo_redo"][settings.language_index]} {{{UNDO_KEY} {REDO_KEY}}}")
         if not win_flag and g.max_tile == 11:
             win_flag = True
+            screen.draw(lines)
+            screen.invalidate() # input writes below the frame
             if input(dictionnary.ALLS["won_msg"][settings.language_index]).lower() != dictionnary.ALLS["yes"][settings.language_index]:
-                clear_terminal()
                 break
-        print(dictionnary.ALLS["select_direction"][settings.language_index])
+        lines.append(dictionnary.ALLS["select_direction"][settings.language_index])
+        screen.draw(lines)
+        if hint_engine is not None:
+            hint_engine.search(g) # uses the time of the player, shown on the line below
         direction = format_cross_os(getkey())
+        if hint_engine is not None:
+            hint_engine.cancel() # does not wait for the search, the key is handled at once
         match direction.lower():
             case settings.up_key:
-                changed = g.change_gravity(0)
+                orientation = 0
             case settings.down_key:
-                changed = g.change_gravity(1)
+                orientation = 1
             case settings.left_key:
-                changed = g.change_gravity(2)
+                orientation = 2
             case settings.right_key:
-                changed = g.change_gravity(3)
+                orientation = 3
+            case key if key in (UNDO_KEY, REDO_KEY) and writer is None:
+                # a replay only holds the played moves, so there is no undo while recording
+                if g.undo() if key == UNDO_KEY else g.redo():
+                    saver.save(g, settings)
+                lose_flag = g.is_lost()
+                continue
             case _:
                 err_flag = True
-                clear_terminal()
                 continue
-        if changed:
-            g.spawn_random(2, settings.difficulty)
+        if g.change_gravity(orientation):
+            spawned = g.spawn_random(2, settings.difficulty)
+            if writer is not None:
+                writer.record(g, orientation, spawned)
+            saver.save(g, settings)
         lose_flag = g.is_lost()
-        clear_terminal()
+    screen.clear()
+    if writer is not None:
+        writer.close()
+    saver.discard() # the game is over
     if lose_flag:
         print(f"{dictionnary.ALLS["you_lost"][settings.language_index]} ({dictionnary.ALLS["final_score"][settings.language_index]}: {g.score})")
     else:
@@ -177,7 +233,20 @@ def build_parser() -> ap.ArgumentParser:
     parser.add_argument("--best-score", help="get the best score (local)", action="store_true")
     parser.add_argument("--clear", help="clear all user data", action="store_true")
     parser.add_argument("--theme", help="change the theme")
+    parser.add_argument("--list-themes", help="show a preview of every theme", action="store_true")
+    parser.add_argument("--color-depth", help="set the colors of the terminal (truecolor, 256, 16 or none)")
     parser.add_argument("--difficulty", help="set the game difficulty")
+    parser.add_argument("--engine", help="set the game engine (classic, bitboard or compact)")
+    parser.add_argument("--simulate", help="play N games without display and print statistics", type=int)
+    parser.add_argument("--policy", help="the player of the simulated games", default="random")
+    parser.add_argument("--budget", help="the time per move of the expectimax policy (ms)", type=float, default=50)
+    parser.add_argument("--rollouts", help="the rollouts per move of the montecarlo policy", type=int, default=100)
+    parser.add_argument("--workers", help="the processes of the montecarlo and expectimax policies", type=int)
+    parser.add_argument("--seed", help="the seed of the simulated games", type=int)
+    parser.add_argument("--position-db", help="the position database of the expectimax policy", nargs="?", const=True)
+    parser.add_argument("--record", help="record the game in a replay file")
+    parser.add_argument("--resume", help="resume the last unfinished game", action="store_true")
+    parser.add_argument("--hints", help="show the best move found while you think", action="store_true")
     return parser
 
 
@@ -211,19 +280,50 @@ def parse_keyboard(args: ap.ArgumentParser) -> tuple:
   return keys, layout
 
 
+def parse_color_depth(args: ap.ArgumentParser) -> str:
+  """
+  get the selected color depth from the arguments (None: detected)
+  ARG:
+    - args: the arguments given by the user in the command
+  """
+  if args.color_depth is not None and args.color_depth not in read_theme.COLOR_DEPTHS:
+    raise game.GameError(f"unknown color depth - {args.color_depth}")
+  return args.color_depth
+
+
 def parse_theme(args: ap.ArgumentParser) -> read_theme.Theme:
   """
-  get the selected theme from the arguments
+  get the selected theme from the arguments (loaded from the theme cache)
   ARG:
     - args: the arguments given by the user in the command
   """
-  if not args.theme:
-    theme = read_theme.Theme("themes/base.dmqu")
-  elif os.path.isfile("themes/" + args.theme + ".dmqu"):
-    theme = read_theme.Theme("themes/" + args.theme + ".dmqu")
-  else:
+  color_depth = parse_color_depth(args)
+  registry = theme_registry.ThemeRegistry()
+  name = args.theme or "base"
+  if name not in registry.names():
     raise game.GameError("the theme given is invalid (it as to be the name of a theme file in the 'themes' subdir)")
-  return theme
+  try:
+    return registry.get(name, color_depth)
+  except read_theme.ThemeError as error:
+    raise game.GameError(f"the theme {name} is invalid: {error}")
+
+
+def list_themes(args: ap.ArgumentParser, language: str) -> None:
+  """
+  print a preview of every theme of the themes subdir (from the theme cache)
+  ARGS:
+    - args: the arguments given by the user in the command
+    - language: the language of the messages
+  """
+  color_depth = parse_color_depth(args)
+  registry = theme_registry.ThemeRegistry()
+  index = game.GameSettings.AVAILABLE_LANGUAGES[language]
+  print(dictionnary.ALLS["themes"][index])
+  for name, error in registry.check().items():
+    if error is None:
+      print(f"  {name:<16}{registry.preview(name, color_depth)}")
+    else:
+      print(f"  {name:<16}{dictionnary.ALLS["invalid_theme"][index]}: {error}")
 
 
 def parse_difficulty(args: ap.ArgumentParser) -> str:
@@ -239,6 +339,45 @@ def parse_difficulty(args: ap.ArgumentParser) -> str:
   else:
     raise game.GameError(f"unknown difficulty - {args.difficulty}")
 
+
+def parse_engine(args: ap.ArgumentParser) -> type:
+  """
+  get the selected game engine from the arguments
+  ARG:
+    - args: the arguments given by the user in the command
+  """
+  if args.engine is None:
+    return game.Game # by default
+  elif args.engine in ENGINES:
+    return replay.ENGINES[ENGINES[args.engine]]
+  else:
+    raise game.GameError(f"unknown engine - {args.engine}")
+
+
+def parse_position_db(args: ap.ArgumentParser) -> str:
+  """
+  get the path of the position database from the arguments (None: no database)
+  ARG:
+    - args: the arguments given by the user in the command
+  """
+  if args.position_db is True: # the option without a path
+    import position_db
+    return position_db.DB_PATH
+  return args.position_db
+
+
+def simulate(args: ap.ArgumentParser) -> None:
+    """
+    play games without any display and print their statistics
+    ARG:
+      - args: the arguments given by the user in the command
+    """
+    random.seed(args.seed)
+    difficulty = parse_difficulty(args)
+    with simulation.build_policy(args.policy, difficulty, args.budget, args.rollouts, args.workers, parse_position_db(args)) as policy:
+        results = simulation.play_games(args.simulate, policy, parse_engine(args), difficulty, args.seed)
+        print(simulation.SimulationStats().consume(results))
+
 def clear_memory(language: str):
     """
     clear all datas saved
@@ -281,13 +420,31 @@ def main() -> None:
         clear_memory(lang)
     elif args.help:
         show_help(lang)
+    elif args.list_themes:
+        list_themes(args, lang)
+    elif args.simulate is not None:
+        simulate(args)
     else:
         loading_screen.show_title(debug_mode=False)
-        keys, layout = parse_keyboard(args)
-        difficulty = parse_difficulty(args)
-        theme = parse_theme(args)       
-        settings = game.GameSettings(*keys, theme=theme, language=lang, keys_layout=layout, difficulty=difficulty)
-        run_game(settings)
+        engine = parse_engine(args)
+        g = None
+        if args.resume: # the settings of the saved game, its theme from the theme cache
+            g, settings = save.read(save.SAVE_PATH, color_depth=parse_color_depth(args), journal=True)
+        else:
+            keys, layout = parse_keyboard(args)
+            difficulty = parse_difficulty(args)
+            theme = parse_theme(args)
+            settings = game.GameSettings(*keys, theme=theme, language=lang, keys_layout=layout, difficulty=difficulty)
+        database = None
+        if args.hints and args.position_db: # the records of the searches of this difficulty only
+            import position_db
+            import solver
+            database = position_db.PositionDB(parse_position_db(args), signature=solver.search_signature(settings.difficulty))
+        try:
+            run_game(settings, engine, args.record, g, args.hints, database)
+        finally:
+            if database is not None:
+                database.close()
 
 
 if __name__ == "__main__":
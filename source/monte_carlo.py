@@ -0,0 +1,187 @@
+"""
+Author: Bilal Vandenberge
+Date: October 2026
+-> the file with the MonteCarloPlayer class (random rollouts spread on a process pool)
+"""
+
+
+from concurrent.futures import ProcessPoolExecutor
+from game import GameError, spawn_rates
+import argparse as ap
+import bitboard
+import solver
+import random
+import time
+import os
+
+
+def _spawn(board: int, number: int, rng: random.Random, rates: tuple) -> int:
+    """
+    return the packed board with randoms tiles spawned on it
+    """
+    free = bitboard.empty_cells(board)
+    for tile in range(min(number, len(free))):
+        pos = free.pop(rng.randrange(len(free)))
+        rand_val = rng.random()
+        for threshold, power in rates:
+            if rand_val <= threshold:
+                board |= power << (pos << 2)
+                break
+    return board
+
+
+def rollouts(board: int, orientation: int, count: int, seed: str, mode: str = "normal", spawns: int = 2) -> int:
+    """
+    play a move then random moves until the game is lost, count times
+    return the sum of the scores won by the rollouts
+    ARGS:
+        - board: the packed board before the move
+        - orientation: the first move (index in Game.AVAILABLE_DIRECTIONS)
+        - count: the number of rollouts
+        - seed: the seed of the rollouts (the same seed gives the same result)
+        - mode: the spawn mode of the game
+        - spawns: the number of tiles spawned after each move
+    """
+    rng = random.Random(seed)
+    rates = spawn_rates(mode)
+    move = bitboard.move
+    first, first_score, _ = move(board, orientation)
+    total = 0
+    for _ in range(count):
+        current = _spawn(first, spawns, rng, rates)
+        score = first_score
+        while True:
+            orientations = [0, 1, 2, 3]
+            rng.shuffle(orientations)
+            for direction in orientations:
+                new, won, _ = move(current, direction)
+                if new != current:
+                    break
+            else:
+                break # lost
+            score += won
+            current = _spawn(new, spawns, rng, rates)
+        total += score
+    return total
+
+
+class MonteCarloPlayer:
+    """represent a player that picks the move with the best mean score of random rollouts"""
+
+    # methods:
+    def __init__(self, rollouts: int = 100, workers: int = None, seed: int = None,
+    mode: str = "normal", spawns: int = 2, batch: int = 25):
+        """
+        ARGS:
+            - rollouts: the number of rollouts per legal move
+            - workers: the number of processes (all the cores if None, no pool if 1)
+            - seed: the root seed of the rollouts (random if None)
+            - mode: the spawn mode of the game (see Game.random_pow)
+            - spawns: the number of tiles spawned after each move
+            - batch: the number of rollouts per task sent to a worker
+        """
+        if rollouts < 1 or batch < 1:
+            raise GameError("a Monte Carlo player needs at least one rollout per batch")
+        spawn_rates(mode) # check the mode
+        self._rollouts = rollouts
+        self._workers = workers or os.cpu_count() or 1
+        self._seed = random.getrandbits(63) if seed is None else seed
+        self._mode = mode
+        self._spawns = spawns
+        self._batch = batch
+        self._calls = 0
+        self._done = 0
+        self._elapsed = 0.0
+        self._pool = ProcessPoolExecutor(self._workers) if self._workers > 1 else None
+
+    def __enter__(self) -> "MonteCarloPlayer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        stop the workers of the pool
+        """
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def best_move(self, position) -> int:
+        """
+        return the index (in Game.AVAILABLE_DIRECTIONS) of the move with the
+        best mean rollout score, or -1 if there is no legal move
+        ARG:
+            - position: a Game, a 4x4 grid of exponents or a packed board
+        """
+        board = solver.to_board(position)
+        start = time.perf_counter()
+        self._calls += 1
+        tasks = []
+        for orientation in range(4):
+            if bitboard.move(board, orientation)[0] == board:
+                continue
+            for first in range(0, self._rollouts, self._batch):
+                count = min(self._batch, self._rollouts - first)
+                args = (board, orientation, count, f"{self._seed}/{self._calls}/{orientation}/{first}", self._mode, self._spawns)
+                tasks.append((orientation, self._pool.submit(rollouts, *args) if self._pool else rollouts(*args)))
+        totals = {}
+        for orientation, result in tasks:
+            totals[orientation] = totals.get(orientation, 0) + (result if self._pool is None else result.result())
+        self._done += len(totals) * self._rollouts
+        self._elapsed += time.perf_counter() - start
+        return max(totals, key=totals.get) if totals else -1
+
+    # getters:
+    @property
+    def workers(self) -> int:
+        """
+        return the number of processes used for the rollouts
+        """
+        return self._workers
+
+    @property
+    def rollouts_done(self) -> int:
+        """
+        return the number of rollouts played since the creation of the player
+        """
+        return self._done
+
+    @property
+    def throughput(self) -> float:
+        """
+        return the number of rollouts per second since the creation of the player
+        """
+        return self._done / self._elapsed if self._elapsed else 0.0
+
+
+def build_parser() -> ap.ArgumentParser:
+    """
+    build the argument parser
+    """
+    parser = ap.ArgumentParser(description="play a game of 2048 with the Monte Carlo player")
+    parser.add_argument("--rollouts", help="the number of rollouts per legal move", type=int, default=100)
+    parser.add_argument("--workers", help="the number of processes (default: all the cores)", type=int)
+    parser.add_argument("--seed", help="the seed of the game and of the rollouts", type=int)
+    parser.add_argument("--difficulty", help="set the game difficulty", default="normal")
+    return parser
+
+
+def main() -> None:
+    """
+    play one game and report the throughput of the rollouts
+    """
+    args = build_parser().parse_args()
+    g = bitboard.BitGame(seed=args.seed)
+    g.spawn_random(2, "start")
+    with MonteCarloPlayer(args.rollouts, args.workers, args.seed, args.difficulty) as player:
+        while not g.is_lost():
+            if g.change_gravity(player.best_move(g)):
+                g.spawn_random(2, args.difficulty)
+        print(f"score: {g.score} (max tile: {2 ** g.max_tile})")
+        print(f"{player.rollouts_done} rollouts on {player.workers} workers: {player.throughput:.0f} rollouts/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+"""
+Author: Bilal Vandenberge
+Date: October 2026
+-> the file with the ParallelSolver class (expectimax search split on a process pool)
+"""
+
+
+from concurrent.futures import ProcessPoolExecutor
+from game import GameError
+from solver import Solver, SearchTimeout, to_board
+import argparse as ap
+import bitboard
+import tempfile
+import random
+import struct
+import weakref
+import mmap
+import time
+import os
+
+
+# a record of the shared table: check, value, depth
+# the check is key ^ depth ^ hash(value) ^ salt of the generation, so a record
+# half written by another process (or left by an older search) does not match
+RECORD = struct.Struct("<QdQ") # 24 bytes
+DEFAULT_BITS = 20 # 2^20 records (24 MB)
+MASK = 0xFFFFFFFFFFFFFFFF
+
+
+class SharedTable:
+    """represent a lossy transposition table in a file mapped by several processes (no lock)"""
+
+    # methods:
+    def __init__(self, path: str, bits: int = DEFAULT_BITS):
+        """
+        ARGS:
+            - path: the path of the file (created with zeros if missing)
+            - bits: the log2 of the number of records
+        """
+        if not os.path.exists(path):
+            with open(path, mode="wb") as f:
+                f.truncate(RECORD.size << bits)
+        self._file = open(path, mode="r+b")
+        self._map = mmap.mmap(self._file.fileno(), RECORD.size << bits)
+        self._shift = 64 - bits
+        self.set_generation(1)
+
+    def close(self) -> None:
+        """
+        unmap the file
+        """
+        if not self._map.closed:
+            self._map.close()
+            self._file.close()
+
+    def set_generation(self, generation: int) -> None:
+        """
+        change the search of the table (the records of the other searches are ignored)
+        """
+        self._generation = generation
+        self._salt = (generation * 0x9E3779B97F4A7C15) & MASK
+
+    def clear(self) -> None:
+        """
+        forget all the records (starts a new generation)
+        """
+        self.set_generation(self._generation + 1)
+
+    def get(self, key: int, default=None) -> tuple[int, float]:
+        """
+        return the (depth, value) of a canonical board, or default
+        """
+        offset = RECORD.size * (((key * 0x9E3779B97F4A7C15) & MASK) >> self._shift)
+        check, value, depth = RECORD.unpack_from(self._map, offset)
+        if check ^ depth ^ (hash(value) & MASK) ^ self._salt != key:
+            return default
+        return depth, value
+
+    def __setitem__(self, key: int, entry: tuple[int, float]) -> None:
+        """
+        store the (depth, value) of a canonical board (replaces its slot)
+        """
+        depth, value = entry
+        offset = RECORD.size * (((key * 0x9E3779B97F4A7C15) & MASK) >> self._shift)
+        RECORD.pack_into(self._map, offset, key ^ depth ^ (hash(value) & MASK) ^ self._salt, value, depth)
+
+    # getters:
+    @property
+    def generation(self) -> int:
+        """
+        return the generation of the current search
+        """
+        return self._generation
+
+
+_WORKER = None # the solver of a worker process
+
+
+def _delete_table(table: SharedTable, path: str) -> None:
+    """
+    unmap and delete the file of a shared table
+    """
+    table.close()
+    os.remove(path)
+
+
+def _init_worker(path: str, bits: int, mode: str, spawns: int, min_probability: float) -> None:
+    """
+    build the solver of a worker process on the shared table
+    """
+    global _WORKER
+    _WORKER = Solver(None, mode, spawns, min_probability, table=SharedTable(path, bits))
+
+
+def _search(children: list[tuple[float, int, float, int]], depth: int, generation: int, deadline: float) -> tuple[float, int]:
+    """
+    return the weighted sum of the expected values of positions where tiles
+    spawn and the number of nodes searched (None instead of the sum after
+    the deadline)
+    ARGS:
+        - children: the (weight, packed board, probability, spawns left) of the positions
+        - depth: the number of moves left to search
+        - generation: the generation of the shared table
+        - deadline: the time.time value of the end of the search (None if there is no limit)
+    """
+    solver = _WORKER
+    solver.table.set_generation(generation)
+    start = solver.nodes
+    local_deadline = float("inf")
+    if deadline is not None: # time.time is shared by the processes, time.perf_counter may not be
+        local_deadline = time.perf_counter() + deadline - time.time()
+    total = 0.0
+    try:
+        for weight, board, probability, spawns in children:
+            if time.perf_counter() > local_deadline:
+                raise SearchTimeout()
+            total += weight * solver.expected_value(board, depth, probability, spawns, local_deadline)
+    except SearchTimeout:
+        return None, solver.nodes - start
+    return total, solver.nodes - start
+
+
+class ParallelSolver:
+    """represent an expectimax player that gives the chance outcomes of the root to a process pool"""
+
+    # methods:
+    def __init__(self, time_budget: float = 50, mode: str = "normal", spawns: int = 2, min_probability: float = 1e-4,
+    max_depth: int = 12, workers: int = None, bits: int = DEFAULT_BITS, database=None):
+        """
+        ARGS:
+            - time_budget: the time allowed per move in milliseconds
+            - mode: the spawn mode of the game (see Game.random_pow)
+            - spawns: the number of tiles spawned after each move
+            - min_probability: see Solver
+            - max_depth: the deepest iteration of the iterative deepening
+            - workers: the number of processes (all the cores if None)
+            - bits: the log2 of the number of records of the shared table
+            - database: the PositionDB read before a search and updated after it
+        """
+        self._workers = workers or os.cpu_count() or 1
+        if self._workers < 1:
+            raise GameError(f"invalid number of workers: {self._workers}")
+        self._time_budget = time_budget
+        self._max_depth = max_depth
+        self._database = database
+        # the root, never searched here (it checks that the database holds the same search)
+        self._solver = Solver(time_budget, mode, spawns, min_probability, max_depth, database=database)
+        descriptor, self._path = tempfile.mkstemp(prefix="2048-table-")
+        os.close(descriptor)
+        os.truncate(self._path, RECORD.size << bits)
+        self._table = SharedTable(self._path, bits)
+        self._delete = weakref.finalize(self, _delete_table, self._table, self._path) # even if close is never called
+        self._nodes = 0
+        self._pool = ProcessPoolExecutor(self._workers, initializer=_init_worker,
+        initargs=(self._path, bits, mode, spawns, min_probability))
+
+    def __enter__(self) -> "ParallelSolver":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        stop the workers and delete the shared table
+        """
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+            self._delete()
+
+    def best_move(self, position) -> int:
+        """
+        return the index (in Game.AVAILABLE_DIRECTIONS) of the best move,
+        or -1 if there is no legal move
+        ARG:
+            - position: a Game, a 4x4 grid of exponents or a packed board
+        """
+        best = -1
+        for depth, orientation, value in self.iterate(position, self._time_budget):
+            best = orientation
+        return best
+
+    def _tasks(self, board: int) -> dict[int, tuple[int, list]]:
+        """
+        return the score and the tasks of each legal move of the root
+        (one task per spawn position of the first tile)
+        """
+        spawns = self._solver.spawns
+        moves = {}
+        for orientation in range(4):
+            new, score, _ = bitboard.move(board, orientation)
+            if new == board:
+                continue
+            free = bitboard.empty_cells(new) if spawns else ()
+            if not free:
+                moves[orientation] = (score, [[(1.0, new, 1.0, spawns)]])
+                continue
+            share = 1.0 / len(free)
+            moves[orientation] = (score, [
+                [(chance * share, new | (power << (pos << 2)), share * chance, spawns - 1) for chance, power in self._solver.probabilities]
+                for pos in free
+            ])
+        return moves
+
+    def iterate(self, position, time_budget: float = None):
+        """
+        search the position deeper and deeper, yield (depth, best move, value)
+        after each completed iteration (see Solver.iterate)
+        ARGS:
+            - position: a Game, a 4x4 grid of exponents or a packed board
+            - time_budget: the time allowed in milliseconds (no limit if None),
+            the first iteration always completes
+        """
+        board = to_board(position)
+        self._nodes = 0
+        first = 1 # the first iteration searched
+        solved = self._database.get(board) if self._database is not None else None
+        if solved is not None: # see Solver.iterate
+            orientation, value, depth = solved
+            yield depth, orientation, value
+            if depth >= self._max_depth:
+                return
+            first = depth + 1
+        moves = self._tasks(board)
+        self._table.clear() # once per search, the records of a depth serve the next ones (see Solver.iterate)
+        start = time.time()
+        result = None
+        try:
+            for depth in range(first, self._max_depth + 1):
+                if not moves:
+                    break
+                deadline = start + time_budget / 1000 if (depth > 1 or solved is not None) and time_budget is not None else None
+                futures = {
+                    orientation: [self._pool.submit(_search, children, depth, self._table.generation, deadline) for children in tasks]
+                    for orientation, (score, tasks) in moves.items()
+                }
+                best, best_value, complete = -1, float("-inf"), True
+                for orientation, (score, _) in moves.items():
+                    value = score
+                    for future in futures[orientation]:
+                        total, nodes = future.result()
+                        self._nodes += nodes
+                        if total is None:
+                            complete = False
+                        else:
+                            value += total
+                    if value > best_value:
+                        best, best_value = orientation, value
+                if not complete:
+                    break
+                result = (best, best_value, depth)
+                yield depth, best, best_value
+        finally:
+            if result is not None and self._database is not None:
+                self._database.put(board, *result)
+
+    # getters:
+    @property
+    def workers(self) -> int:
+        """
+        return the number of processes of the search
+        """
+        return self._workers
+
+    @property
+    def nodes(self) -> int:
+        """
+        return the number of nodes searched by the last search (all the workers)
+        """
+        return self._nodes
+
+    @property
+    def time_budget(self) -> float:
+        """
+        return the time allowed per move in milliseconds
+        """
+        return self._time_budget
+
+
+def sample_positions(number: int, seed: int = None, mode: str = "normal") -> list[int]:
+    """
+    return packed boards met in random games (one every 10 moves, never lost)
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < number:
+        g = bitboard.BitGame(seed=rng.getrandbits(63))
+        g.spawn_random(2, "start")
+        moves = 0
+        while not g.is_lost() and len(positions) < number:
+            legal = g.legal_moves()
+            if g.change_gravity(rng.choice([orientation for orientation in range(4) if legal >> orientation & 1])):
+                g.spawn_random(2, mode)
+            moves += 1
+            if not moves % 10 and not g.is_lost():
+                positions.append(g.board)
+    return positions
+
+
+def scaling_report(worker_counts: list[int], positions: list[int], time_budget: float, mode: str = "normal") -> list[tuple]:
+    """
+    search the positions with each number of workers (the plain Solver first, as 0 worker)
+    return the (workers, nodes/sec, speedup, mean depth) of each search
+    """
+    rows = []
+    for workers in [0] + worker_counts:
+        player = Solver(time_budget, mode) if not workers else ParallelSolver(time_budget, mode, workers=workers)
+        try:
+            player.best_move(positions[0]) # starts the processes
+            nodes = depths = 0
+            elapsed = 0.0
+            for board in positions:
+                start = time.perf_counter()
+                depth = 0
+                for depth, _, _ in player.iterate(board, time_budget):
+                    pass
+                elapsed += time.perf_counter() - start
+                nodes += player.nodes
+                depths += depth
+        finally:
+            if workers:
+                player.close()
+        speed = nodes / elapsed if elapsed else 0.0
+        rows.append((workers, speed, speed / rows[0][1] if rows and rows[0][1] else 1.0, depths / len(positions)))
+    return rows
+
+
+def build_parser() -> ap.ArgumentParser:
+    """
+    build the argument parser
+    """
+    parser = ap.ArgumentParser(description="measure the scaling of the parallel expectimax search")
+    parser.add_argument("--workers", help="the numbers of processes to compare (comma separated)")
+    parser.add_argument("--budget", help="the time per move (ms)", type=float, default=200)
+    parser.add_argument("--positions", help="the number of positions searched", type=int, default=20)
+    parser.add_argument("--seed", help="the seed of the positions", type=int)
+    parser.add_argument("--difficulty", help="set the game difficulty", default="normal")
+    return parser
+
+
+def main() -> None:
+    """
+    print the nodes/sec of each number of workers at a fixed time per move
+    """
+    args = build_parser().parse_args()
+    if args.workers:
+        counts = [int(count) for count in args.workers.split(",")]
+    else:
+        counts = [1 << i for i in range((os.cpu_count() or 1).bit_length())]
+    positions = sample_positions(args.positions, args.seed, args.difficulty)
+    print(f"{len(positions)} positions, {args.budget:g} ms per move, {os.cpu_count()} cores")
+    print(f"{"workers":>8} {"nodes/sec":>12} {"speedup":>8} {"depth":>6}")
+    for workers, speed, speedup, depth in scaling_report(counts, positions, args.budget, args.difficulty):
+        print(f"{workers or "serial":>8} {speed:>12.0f} {speedup:>7.2f}x {depth:>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
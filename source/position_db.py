@@ -0,0 +1,175 @@
+"""
+Author: Bilal Vandenberge
+Date: October 2026
+-> the file with the PositionDB class (solved positions in a memory-mapped hash table)
+"""
+
+
+from game import GameError
+import symmetry
+import struct
+import mmap
+import zlib
+import os
+try:
+    import fcntl # the writers of several processes take turns (not available on Windows)
+except ImportError:
+    fcntl = None
+
+
+DB_PATH = "memory/positions.db"
+
+# LAYOUT (little endian):
+#   header: magic, version, log2 of the number of records, signature of the search
+#   (spawn mode, spawns and heuristic, see solver.search_signature: the values of
+#   another search are not valid)
+#   records: canonical board (0 if the slot is free), expected score, best move, search depth, crc32
+#   (the crc32 lets the readers skip a record that another process is writing)
+# the move of a record is a direction of the canonical board (see symmetry.canonical_board)
+MAGIC = b"2048PDB"
+VERSION = 2
+HEADER = struct.Struct("<7sBB48s7x") # 64 bytes
+RECORD = struct.Struct("<QdBBxxI") # 24 bytes
+CHECKED = 18 # bytes of a record covered by its crc32
+DEFAULT_BITS = 20 # 2^20 records (24 MB, only the used pages take memory)
+MAX_PROBES = 16 # slots tried after the home slot of a board
+
+
+class PositionDB:
+    """represent a persistent table of solved positions (canonical board -> best move, value, depth)"""
+
+    # methods:
+    def __init__(self, path: str = DB_PATH, bits: int = DEFAULT_BITS, readonly: bool = False, signature: str = None):
+        """
+        ARGS:
+            - path: the path of the file (created if missing)
+            - bits: the log2 of the number of records of a new file
+            - readonly: if the table is only read
+            - signature: the search of the records (see solver.search_signature),
+            an existing file of another search is refused (not checked if None)
+        """
+        if not os.path.exists(path):
+            if readonly:
+                raise GameError(f"no position database at {path}")
+            with open(path, mode="wb") as f:
+                f.write(HEADER.pack(MAGIC, VERSION, bits, (signature or "").encode()))
+                f.truncate(HEADER.size + (RECORD.size << bits))
+        self._file = open(path, mode="rb" if readonly else "r+b")
+        magic, version, self._bits, stored = HEADER.unpack(self._file.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            self._file.close()
+            raise GameError(f"{path} is not a position database (version {VERSION})")
+        self._signature = stored.rstrip(b"\0").decode()
+        if signature is not None and signature != self._signature:
+            self._file.close()
+            raise GameError(f"{path} holds the positions of another search ({self._signature or "unknown"})")
+        self._mask = (1 << self._bits) - 1
+        self._readonly = readonly
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ if readonly else mmap.ACCESS_WRITE)
+
+    def __enter__(self) -> "PositionDB":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        write the changes and unmap the file
+        """
+        if not self._map.closed:
+            if not self._readonly:
+                self._map.flush()
+            self._map.close()
+            self._file.close()
+
+    def _slots(self, key: int):
+        """
+        yield the offsets of the slots of a canonical board (linear probing)
+        """
+        home = ((key * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> (64 - self._bits) if self._bits else 0
+        for probe in range(MAX_PROBES + 1):
+            yield HEADER.size + RECORD.size * ((home + probe) & self._mask)
+
+    def _read(self, offset: int) -> tuple:
+        """
+        return the record of a slot (key, value, move, depth), or None if it is
+        free or being written
+        """
+        key, value, move, depth, check = RECORD.unpack_from(self._map, offset)
+        if not key or zlib.crc32(self._map[offset:offset + CHECKED]) != check:
+            return None
+        return key, value, move, depth
+
+    def get(self, board: int) -> tuple[int, float, int]:
+        """
+        return the best move (on this board), the expected score and the depth
+        of a solved position, or None if it is not in the table
+        ARG:
+            - board: a packed board
+        """
+        key, transform = symmetry.canonical_board(board)
+        for offset in self._slots(key):
+            record = self._read(offset)
+            if record is None:
+                if not RECORD.unpack_from(self._map, offset)[0]:
+                    return None # a free slot ends the probing
+                continue
+            if record[0] == key:
+                return symmetry.real_direction(record[2], transform), record[1], record[3]
+        return None
+
+    def put(self, board: int, move: int, value: float, depth: int) -> bool:
+        """
+        store a solved position (a deeper search of the same position is kept)
+        return if the record was written
+        ARGS:
+            - board: a packed board
+            - move: the best move on this board (index in Game.AVAILABLE_DIRECTIONS)
+            - value: the expected score of the position
+            - depth: the depth of the search
+        """
+        if self._readonly:
+            raise GameError("the position database is read only")
+        key, transform = symmetry.canonical_board(board)
+        if not key:
+            return False
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        try:
+            target, shallowest = None, None
+            for offset in self._slots(key):
+                record = self._read(offset)
+                if record is None or record[0] == key:
+                    if record is not None and record[3] > depth:
+                        return False
+                    target = offset
+                    break
+                if shallowest is None or record[3] < shallowest[1]:
+                    shallowest = (offset, record[3])
+            if target is None: # every slot is taken, replace the shallowest search
+                if shallowest[1] > depth:
+                    return False
+                target = shallowest[0]
+            data = bytearray(RECORD.pack(key, value, symmetry.TRANSFORMED_DIRECTIONS[transform][move], depth, 0))
+            struct.pack_into("<I", data, CHECKED + 2, zlib.crc32(data[:CHECKED]))
+            self._map[target:target + RECORD.size] = data
+            return True
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    # getters:
+    @property
+    def signature(self) -> str:
+        """
+        return the search of the records (see solver.search_signature)
+        """
+        return self._signature
+
+    @property
+    def capacity(self) -> int:
+        """
+        return the number of records of the table
+        """
+        return 1 << self._bits
@@ -4,6 +4,10 @@ Date: June 2024
 -> Convert a theme file into a python Theme instance
 """
 
+import functools
+import sys
+import os
+
 INDEX_TO_POWER = [
     ".",
     2,
@@ -29,6 +33,67 @@ COLORED_BG_PREFIX = "\033[48;2;"
 COLORED_FG_PREFIX = "\033[38;2;"
 COLORED_MIDLIX = "m"
 COLORED_SUFFIX = "\033[0m"
+SGR_PREFIX = "\033["
+
+# the color depths, from the most expensive to the cheapest escape sequences
+COLOR_DEPTHS = ["truecolor", "256", "16", "none"]
+# the 16 colors of the terminals (xterm values), in the order of their codes
+PALETTE_16 = [
+    (0, 0, 0), (205, 0, 0), (0, 205, 0), (205, 205, 0), (0, 0, 238), (205, 0, 205), (0, 205, 205), (229, 229, 229),
+    (127, 127, 127), (255, 0, 0), (0, 255, 0), (255, 255, 0), (92, 92, 255), (255, 0, 255), (0, 255, 255), (255, 255, 255)
+]
+# the colors 16 to 255 of the 256 colors terminals (the 6x6x6 cube then the greys)
+CUBE_LEVELS = [0, 95, 135, 175, 215, 255]
+PALETTE_256 = [(r, g, b) for r in CUBE_LEVELS for g in CUBE_LEVELS for b in CUBE_LEVELS] + [(8 + 10 * i,) * 3 for i in range(24)]
+
+
+def detect_color_depth(environ: dict = None, tty: bool = None) -> str:
+    """
+    return the color depth supported by the terminal (see COLOR_DEPTHS)
+    ARGS:
+        - environ: the environment variables (os.environ if None)
+        - tty: if the output is a terminal (checked on sys.stdout if None)
+    """
+    environ = os.environ if environ is None else environ
+    tty = sys.stdout.isatty() if tty is None else tty
+    term = environ.get("TERM", "")
+    if "NO_COLOR" in environ or term == "dumb" or not tty:
+        return "none"
+    if environ.get("COLORTERM", "").lower() in ("truecolor", "24bit") or os.name == "nt":
+        return "truecolor" # the Windows terminal has no TERM but supports 24 bits colors
+    if "256" in term:
+        return "256"
+    return "16"
+
+
+def _nearest(rgb: tuple[int, int, int], palette: list[tuple[int, int, int]]) -> int:
+    """
+    return the index of the closest color of a palette
+    """
+    return min(range(len(palette)), key=lambda i: sum((a - b) ** 2 for a, b in zip(rgb, palette[i])))
+
+
+@functools.cache
+def color_params(rgb: tuple[int, int, int], depth: str, background: bool) -> str:
+    """
+    return the parameters of the escape sequence of a color at a color depth
+    (the nearest color of the palette of the depth, computed once per color)
+    ARGS:
+        - rgb: the color
+        - depth: the color depth (see COLOR_DEPTHS, but none)
+        - background: if the color is a background
+    """
+    match depth:
+        case "truecolor":
+            return ("48;2;" if background else "38;2;") + ";".join(map(str, rgb))
+        case "256":
+            return ("48;5;" if background else "38;5;") + str(16 + _nearest(rgb, PALETTE_256))
+        case "16":
+            index = _nearest(rgb, PALETTE_16)
+            return str((40 if background else 30) + index if index < 8 else (100 if background else 90) + index - 8)
+        case _:
+            raise ThemeError(f"unknown color depth - {depth}")
+
 
 def hex_to_rgb(hex_str: str) -> tuple[int, int, int]:
     """
@@ -63,6 +128,9 @@ class Color:
         """
         self._bg_prefix = COLORED_BG_PREFIX + ";".join([str(c) for c in self._rgb]) + COLORED_MIDLIX
         self._fg_prefix = COLORED_FG_PREFIX + ";".join([str(c) for c in self._rgb]) + COLORED_MIDLIX
+        # the parameters alone, to combine a background and a foreground in one sequence
+        self._bg_params = self._bg_prefix[len(SGR_PREFIX):-len(COLORED_MIDLIX)]
+        self._fg_params = self._fg_prefix[len(SGR_PREFIX):-len(COLORED_MIDLIX)]
 
 
     def __str__(self) -> str:
@@ -107,6 +175,20 @@ class Color:
         except Exception:
             return text
 
+    def pair(self, label: "Color", depth: str = "truecolor") -> str:
+        """
+        return the escape sequence of the current color as background and
+        of another as foreground (one sequence instead of two)
+        ARGS:
+            - label: the foreground color
+            - depth: the color depth of the terminal (see COLOR_DEPTHS)
+        """
+        if depth == "truecolor":
+            return SGR_PREFIX + self._bg_params + ";" + label._fg_params + COLORED_MIDLIX
+        if depth == "none":
+            return ""
+        return SGR_PREFIX + color_params(self._rgb, depth, True) + ";" + color_params(label._rgb, depth, False) + COLORED_MIDLIX
+
     # getters:
     @property
     def red(self):
@@ -133,6 +215,28 @@ class Color:
 class ThemeError(Exception):
     """expected exception in the Theme class"""
 
+
+def parse_palette(text: str) -> list[tuple[tuple[int, int, int], tuple[int, int, int]]]:
+    """
+    return the (background, label) rgb colors of each tile of a theme file
+    (one "#rrggbb, #rrggbb" line per tile, from the empty cell to 131072)
+    ARG:
+        - text: the content of the theme file
+    """
+    lines = text.split("\n")
+    if lines[-1] == "": # a final newline
+        lines.pop()
+    if len(lines) != len(INDEX_TO_POWER):
+        raise ThemeError(f"corrupted theme file ({len(lines)} lines instead of {len(INDEX_TO_POWER)})")
+    palette = []
+    for number, line in enumerate(lines, 1):
+        try:
+            bg_color, label_color = line.split(", ")
+            palette.append((hex_to_rgb(bg_color), hex_to_rgb(label_color)))
+        except (ValueError, IndexError, ThemeError):
+            raise ThemeError(f"corrupted theme file (line {number}: {line[:32]!r})")
+    return palette
+
 class Theme:
     """represent a theme for a 2048 game"""
     # based color:
@@ -140,30 +244,54 @@ class Theme:
     LABEL_COLOR = Color(249, 246, 242) # White - #f9f6f2
 
     # methods:
-    def __init__(self, path: str):
-        try:
-            with open(path, mode="r") as theme_file:
-                content = theme_file.read().split("\n")
-            assert len(content) != 19
-            self._build(content)
-            self._name = path.split("/")[-1][:-5]
-        except FileNotFoundError:
-            raise ThemeError("no theme file found")
-        except AssertionError:
-            raise ThemeError("corrupted theme file")
-        except Exception:
-            raise ThemeError("corrupted theme file")
+    def __init__(self, path: str, color_depth: str = None, palette: list = None, pairs: list[str] = None):
+        """
+        ARGS:
+            - path: the path of the theme file
+            - color_depth: the color depth of the terminal (see COLOR_DEPTHS,
+            detected if None)
+            - palette: the (background, label) rgb colors of the tiles, the
+            file is not read if they are given (see theme_registry.py)
+            - pairs: the escape sequence of each tile at the color depth
+            (computed if None)
+        """
+        color_depth = detect_color_depth() if color_depth is None else color_depth
+        if color_depth not in COLOR_DEPTHS:
+            raise ThemeError(f"unknown color depth - {color_depth}")
+        self._color_depth = color_depth
+        if palette is None:
+            try:
+                with open(path, mode="r") as theme_file:
+                    palette = parse_palette(theme_file.read())
+            except FileNotFoundError:
+                raise ThemeError("no theme file found")
+            except (OSError, UnicodeDecodeError):
+                raise ThemeError("corrupted theme file")
+        self._build(palette, pairs)
+        self._cells_width = None
+        self._cells = None
+        self._name = path.split("/")[-1][:-5]
 
-    def _build(self, content: list[str]) -> None:
+    def _build(self, palette: list, pairs: list[str] = None) -> None:
+        """
+        build the attribute with the colors of the tiles
         """
-        build the attribute with the content of a theme file
+        self._data = [[Color(*bg), Color(*label)] for bg, label in palette]
+        # the escape sequence of each tile at the color depth (the quantized palette)
+        self._pairs = pairs or [bg.pair(label, self._color_depth) for bg, label in self._data]
+        self._suffix = "" if self._color_depth == "none" else COLORED_SUFFIX
+
+    def cells(self, width: int) -> list[str]:
+        """
+        return the colored cell of each exponent, its label right aligned on
+        a width (the cells are built again only when the width changes)
+        ARG:
+            - width: the number of characters of a cell
         """
-        self._data = []
-        for tile in content:
-            bg_color, label_color = tile.split(", ")
-            bg = Color(*hex_to_rgb(bg_color))
-            label = Color(*hex_to_rgb(label_color))
-            self._data.append([bg, label])
+        if width != self._cells_width:
+            self._cells = [pair + str(INDEX_TO_POWER[e]).rjust(width) + self._suffix for e, pair in enumerate(self._pairs)]
+            self._cells_width = width
+        return self._cells
 
     def index(self, index: int) -> Color:
         """
@@ -189,6 +317,13 @@ class Theme:
         """
         return self._name
 
+    @property
+    def color_depth(self) -> str:
+        """
+        return the color depth of the escape sequences of the theme
+        """
+        return self._color_depth
+
 if __name__ == "__main__":
     t = Theme("themes/base.dmqu")
     t.display()
\ No newline at end of file
@@ -0,0 +1,197 @@
+"""
+Author: Bilal Vandenberge
+Date: October 2026
+-> the file with the Renderer class (terminal frames redrawn with their changes only)
+"""
+
+
+from game import Game
+from read_theme import Theme, COLOR_DEPTHS
+import argparse as ap
+import random
+import sys
+
+
+CLEAR_SCREEN = "\033[H\033[2J"
+CLEAR_LINE_END = "\033[K"
+CLEAR_SCREEN_END = "\033[J"
+
+
+def move_to(row: int, column: int = 0) -> str:
+    """
+    return the escape sequence that moves the cursor (0 based position)
+    """
+    return f"\033[{row + 1};{column + 1}H"
+
+
+class Renderer:
+    """represent a terminal screen that keeps its last frame and only rewrites what changed"""
+
+    # methods:
+    def __init__(self, out=None):
+        """
+        ARG:
+            - out: the text stream of the screen (sys.stdout if None)
+        """
+        self._out = out
+        self._previous = None # the last frame drawn (None: the screen is unknown)
+        self._frames = 0
+        self._bytes = 0
+        self._last_bytes = 0
+
+    def invalidate(self) -> None:
+        """
+        forget the last frame (something else wrote on the screen), the next
+        frame is drawn on a cleared screen
+        """
+        self._previous = None
+
+    def clear(self) -> None:
+        """
+        clear the screen
+        """
+        self._write(CLEAR_SCREEN)
+        self._previous = None
+
+    def _write(self, text: str) -> None:
+        """
+        write the text in one call and flush it
+        """
+        out = self._out or sys.stdout
+        out.write(text)
+        out.flush()
+
+    def render(self, lines: list) -> str:
+        """
+        return the text that turns the last frame into a new one (the cursor
+        ends at the start of the line below the frame, the screen below is cleared)
+        ARG:
+            - lines: a string per line, or a (cells, width of a cell) tuple for
+            a line of cells of the same width (see Game.frame)
+        """
+        previous = self._previous
+        parts = []
+        if previous is None:
+            parts.append(CLEAR_SCREEN)
+            previous = []
+        for row, line in enumerate(lines):
+            old = previous[row] if row < len(previous) else None
+            if line == old:
+                continue
+            if isinstance(line, str):
+                parts.append(move_to(row) + line + CLEAR_LINE_END)
+            elif isinstance(old, tuple) and old[1] == line[1] and len(old[0]) == len(line[0]):
+                width = line[1]
+                for column, (cell, old_cell) in enumerate(zip(line[0], old[0])):
+                    if cell != old_cell:
+                        parts.append(move_to(row, column * width) + cell)
+            else:
+                parts.append(move_to(row) + "".join(line[0]) + CLEAR_LINE_END)
+        parts.append(move_to(len(lines)) + CLEAR_SCREEN_END) # the longer frames and the text written below
+        self._previous = list(lines)
+        return "".join(parts)
+
+    def draw(self, lines: list) -> None:
+        """
+        show a frame (see render) with one write
+        """
+        text = self.render(lines)
+        self._last_bytes = len(text.encode())
+        self._bytes += self._last_bytes
+        self._frames += 1
+        self._write(text)
+
+    # getters:
+    @property
+    def previous(self) -> list:
+        """
+        return the last frame drawn (None after a clear or an invalidate)
+        """
+        return self._previous
+
+    @property
+    def frames(self) -> int:
+        """
+        return the number of frames drawn
+        """
+        return self._frames
+
+    @property
+    def last_bytes(self) -> int:
+        """
+        return the size of the last frame written (utf-8 bytes)
+        """
+        return self._last_bytes
+
+    @property
+    def bytes_per_frame(self) -> float:
+        """
+        return the mean size of the frames written (utf-8 bytes)
+        """
+        return self._bytes / self._frames if self._frames else 0.0
+
+
+class _NullStream:
+    """represent an output that forgets everything (for the measures)"""
+
+    def write(self, text: str) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
+
+
+def measure_frames(theme_path: str, depth: str, moves: int, seed: int = None, full: bool = False) -> float:
+    """
+    return the mean bytes per frame of a random game
+    ARGS:
+        - theme_path: the path of the theme file
+        - depth: the color depth (see read_theme.COLOR_DEPTHS)
+        - moves: the number of moves of the game
+        - seed: the seed of the game
+        - full: if every frame is drawn on a cleared screen (as before the renderer)
+    """
+    theme = Theme(theme_path, depth)
+    rng = random.Random(seed)
+    g = Game(seed=seed)
+    g.spawn_random(2, "start")
+    screen = Renderer(_NullStream())
+    for _ in range(moves):
+        if full:
+            screen.invalidate()
+        screen.draw(g.frame(theme) + [f"Current score: {g.score}"])
+        legal = g.legal_moves()
+        if not legal:
+            break
+        if g.change_gravity(rng.choice([orientation for orientation in range(4) if legal >> orientation & 1])):
+            g.spawn_random(2)
+    return screen.bytes_per_frame
+
+
+def build_parser() -> ap.ArgumentParser:
+    """
+    build the argument parser
+    """
+    parser = ap.ArgumentParser(description="measure the bytes per frame of each color depth")
+    parser.add_argument("--theme", help="the name of the theme", default="base")
+    parser.add_argument("--moves", help="the number of moves of the game", type=int, default=300)
+    parser.add_argument("--seed", help="the seed of the game", type=int, default=0)
+    return parser
+
+
+def main() -> None:
+    """
+    print the bytes per frame of a random game for each color depth, with
+    full redraws and with the changes only
+    """
+    args = build_parser().parse_args()
+    path = f"themes/{args.theme}.dmqu"
+    print(f"{"depth":>10} {"full":>8} {"changes":>8}")
+    for depth in COLOR_DEPTHS:
+        full = measure_frames(path, depth, args.moves, args.seed, True)
+        changes = measure_frames(path, depth, args.moves, args.seed)
+        print(f"{depth:>10} {full:>8.0f} {changes:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+"""
+Author: Bilal Vandenberge
+Date: October 2026
+-> the file with the replay format (ReplayWriter and ReplayReader classes)
+"""
+
+
+from game import Game, GameError, spawn_rates
+from bisect import bisect_right
+from compact_game import CompactGame
+from bitboard import BitGame
+import argparse as ap
+import struct
+
+
+# LAYOUT (little endian):
+#   header: magic, version, seed, game id, width, height, mode, engine, spawns per move, flags, checkpoint interval
+#   chunks: a checkpoint of the position before its first move, then its packed moves (2 bits per move,
+#           4 moves per byte from the low bits), then its spawn records if the SPAWN_RECORDS flag is set
+#           (per move: the number of tiles, then a position and an exponent per tile)
+#   index: the offset and the first move of every chunk
+#   trailer: the offset of the index, the number of moves
+# a file without its trailer (the writer was stopped) is still read by scanning its chunks
+MAGIC = b"2048RPL"
+VERSION = 1
+HEADER = struct.Struct("<7sBQIHH8s16sBBI")
+CHUNK = struct.Struct("<4sIIIQBIHH") # tag, first move, moves, spawn bytes, score, max tile, stream block, stream offset, free spots
+CHUNK_TAG = b"CHNK"
+INDEX = struct.Struct("<4sI") # tag, chunks
+INDEX_TAG = b"INDX"
+INDEX_ENTRY = struct.Struct("<QI") # offset, first move
+TRAILER = struct.Struct("<QQ4s") # index offset, moves, tag
+TRAILER_TAG = b"RPLE"
+SPAWN = struct.Struct("<HB") # position, exponent
+SPAWN_RECORDS = 1 # flag
+CHECKPOINT_INTERVAL = 1024 # moves per chunk
+ENGINES = {engine.__name__: engine for engine in (Game, BitGame, CompactGame)}
+
+# byte of packed moves -> its 4 moves
+BYTE_TO_MOVES = [tuple((byte >> shift) & 3 for shift in range(0, 8, 2)) for byte in range(256)]
+
+
+class ReplayError(GameError):
+    """represent an invalid replay file"""
+    pass
+
+
+class ReplayWriter:
+    """represent a replay file written move by move (a chunk is written every CHECKPOINT_INTERVAL moves)"""
+
+    # methods:
+    def __init__(self, path: str, g: Game, mode: str = "normal", spawns: int = 2,
+    spawn_records: bool = False, interval: int = CHECKPOINT_INTERVAL):
+        """
+        ARGS:
+            - path: the path of the replay file
+            - g: the game to record, after its first spawns
+            - mode: the spawn mode of the game
+            - spawns: the number of tiles spawned after each move
+            - spawn_records: if the spawned tiles are stored next to the moves
+            - interval: the number of moves between two checkpoints
+        """
+        spawn_rates(mode) # check the mode
+        seed, game_id = g.stream.seed, g.stream.game_id
+        if not 0 <= seed < 1 << 64 or not 0 <= game_id < 1 << 32:
+            raise ReplayError(f"the seed {seed} (game {game_id}) does not fit in a replay")
+        if type(g).__name__ not in ENGINES or interval < 1:
+            raise ReplayError(f"can't record a {type(g).__name__} game every {interval} moves")
+        self._width = g.width
+        self._spawn_records = spawn_records
+        self._interval = interval
+        self._moves = 0
+        self._index = []
+        self._file = open(path, mode="wb")
+        self._file.write(HEADER.pack(
+            MAGIC, VERSION, seed, game_id, g.width, g.height, mode.encode(), type(g).__name__.encode(),
+            spawns, SPAWN_RECORDS if spawn_records else 0, interval
+        ))
+        self._start_chunk(g)
+
+    def __enter__(self) -> "ReplayWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _start_chunk(self, g: Game) -> None:
+        """
+        take the checkpoint of the next chunk
+        """
+        grid = g.grid
+        self._checkpoint = (
+            g.score, g.max_tile, g.stream.state,
+            bytes(tile for line in grid for tile in line), list(g.free_spots)
+        )
+        self._packed = bytearray()
+        self._spawned = bytearray()
+        self._chunk_moves = 0
+
+    def _write_chunk(self) -> None:
+        """
+        write the current chunk at the end of the file
+        """
+        score, max_tile, (block, offset), cells, free = self._checkpoint
+        self._index.append((self._file.tell(), self._moves - self._chunk_moves))
+        self._file.write(CHUNK.pack(
+            CHUNK_TAG, self._moves - self._chunk_moves, self._chunk_moves, len(self._spawned),
+            score, max_tile, block, offset, len(free)
+        ))
+        self._file.write(cells)
+        self._file.write(struct.pack(f"<{len(free)}H", *free))
+        self._file.write(self._packed)
+        self._file.write(self._spawned)
+        self._file.flush()
+
+    def record(self, g: Game, orientation: int, spawned: list[tuple[int, int]] = ()) -> None:
+        """
+        add a move that changed the grid
+        ARGS:
+            - g: the game after the move and its spawns
+            - orientation: the index of the move in Game.AVAILABLE_DIRECTIONS
+            - spawned: the tiles spawned after the move (see Game.spawn_random)
+        """
+        if self._chunk_moves % 4 == 0:
+            self._packed.append(orientation)
+        else:
+            self._packed[-1] |= orientation << (2 * (self._chunk_moves % 4))
+        if self._spawn_records:
+            self._spawned.append(len(spawned))
+            for pos, power in spawned:
+                self._spawned += SPAWN.pack(pos, power)
+        self._chunk_moves += 1
+        self._moves += 1
+        if self._chunk_moves == self._interval:
+            self._write_chunk()
+            self._start_chunk(g)
+
+    def close(self) -> None:
+        """
+        write the last chunk, the index and the trailer, then close the file
+        """
+        if self._file.closed:
+            return
+        if self._chunk_moves or not self._index:
+            self._write_chunk()
+        index_offset = self._file.tell()
+        self._file.write(INDEX.pack(INDEX_TAG, len(self._index)))
+        for entry in self._index:
+            self._file.write(INDEX_ENTRY.pack(*entry))
+        self._file.write(TRAILER.pack(index_offset, self._moves, TRAILER_TAG))
+        self._file.close()
+
+    # getters:
+    @property
+    def moves(self) -> int:
+        """
+        return the number of recorded moves
+        """
+        return self._moves
+
+
+class ReplayReader:
+    """represent a replay file loaded in memory"""
+
+    # methods:
+    def __init__(self, path: str):
+        with open(path, mode="rb") as f:
+            self._data = f.read()
+        if len(self._data) < HEADER.size:
+            raise ReplayError(f"{path} is not a replay file")
+        (magic, version, self._seed, self._game_id, self._width, self._height,
+        mode, engine, self._spawns, flags, self._interval) = HEADER.unpack_from(self._data)
+        if magic != MAGIC or version != VERSION:
+            raise ReplayError(f"{path} is not a replay file (version {VERSION})")
+        self._mode = mode.rstrip(b"\0").decode()
+        self._engine = engine.rstrip(b"\0").decode()
+        self._spawn_records = bool(flags & SPAWN_RECORDS)
+        self._build_index()
+
+    def _build_index(self) -> None:
+        """
+        read the index of the chunks (or scan the chunks if the trailer is missing)
+        """
+        data = self._data
+        if len(data) >= HEADER.size + TRAILER.size and data.endswith(TRAILER_TAG):
+            index_offset, self._moves, _ = TRAILER.unpack_from(data, len(data) - TRAILER.size)
+            tag, number = INDEX.unpack_from(data, index_offset)
+            if tag != INDEX_TAG:
+                raise ReplayError("the index of the replay is corrupted")
+            self._index = [INDEX_ENTRY.unpack_from(data, index_offset + INDEX.size + i * INDEX_ENTRY.size) for i in range(number)]
+        else:
+            self._index, self._moves, offset = [], 0, HEADER.size
+            while offset + CHUNK.size <= len(data) and data[offset:offset + 4] == CHUNK_TAG:
+                _, first, moves, spawn_bytes, *_, free = CHUNK.unpack_from(data, offset)
+                end = offset + CHUNK.size + self._width * self._height + 2 * free + (moves + 3) // 4 + spawn_bytes
+                if end > len(data):
+                    break # the last chunk was cut
+                self._index.append((offset, first))
+                self._moves = first + moves
+                offset = end
+        if not self._index:
+            raise ReplayError("the replay has no checkpoint")
+        self._firsts = [first for _, first in self._index]
+
+    def _chunk(self, number: int) -> tuple:
+        """
+        return the checkpoint (the arguments of Game.load), the moves and
+        the spawn records of a chunk
+        """
+        offset = self._index[number][0]
+        _, first, moves, spawn_bytes, score, max_tile, block, stream_offset, free = CHUNK.unpack_from(self._data, offset)
+        offset += CHUNK.size
+        size = self._width * self._height
+        cells = self._data[offset:offset + size]
+        grid = [list(cells[y:y + self._width]) for y in range(0, size, self._width)]
+        free_order = list(struct.unpack_from(f"<{free}H", self._data, offset + size))
+        offset += size + 2 * free
+        packed = self._data[offset:offset + (moves + 3) // 4]
+        spawned = self._data[offset + len(packed):offset + len(packed) + spawn_bytes]
+        directions = [orientation for byte in packed for orientation in BYTE_TO_MOVES[byte]][:moves]
+        return (grid, score, max_tile, (block, stream_offset), free_order), directions, spawned
+
+    def _decode_spawns(self, spawned: bytes) -> list[list[tuple[int, int]]]:
+        """
+        return the spawned tiles of each move of a chunk
+        """
+        records, offset = [], 0
+        while offset < len(spawned):
+            number = spawned[offset]
+            offset += 1
+            records.append([SPAWN.unpack_from(spawned, offset + i * SPAWN.size) for i in range(number)])
+            offset += number * SPAWN.size
+        return records
+
+    def moves(self):
+        """
+        yield every move of the game (index in Game.AVAILABLE_DIRECTIONS)
+        """
+        for number in range(len(self._index)):
+            yield from self._chunk(number)[1]
+
+    def spawns(self):
+        """
+        yield the tiles spawned after every move (empty if they were not recorded)
+        """
+        if self._spawn_records:
+            for number in range(len(self._index)):
+                yield from self._decode_spawns(self._chunk(number)[2])
+
+    def game_at(self, move: int, engine: type = None, verify: bool = False) -> Game:
+        """
+        return the game after a number of moves, re-simulated from the
+        closest checkpoint
+        ARGS:
+            - move: the number of moves played (0 is the start of the game)
+            - engine: the class of the game (the recording engine if None,
+            another engine may draw other spawns)
+            - verify: if the spawned tiles are checked against the spawn records
+        """
+        if not 0 <= move <= self._moves:
+            raise ReplayError(f"the move {move} is not in the replay (0-{self._moves})")
+        number = bisect_right(self._firsts, move) - 1
+        checkpoint, directions, spawned = self._chunk(number)
+        g = (engine or ENGINES[self._engine])(self._width, self._height, self._seed, self._game_id)
+        g.load(*checkpoint)
+        records = self._decode_spawns(spawned) if verify and self._spawn_records else None
+        mode, spawns = self._mode, self._spawns
+        for index in range(move - self._firsts[number]):
+            if not g.change_gravity(directions[index]):
+                raise ReplayError(f"the move {self._firsts[number] + index} does not change the grid")
+            tiles = g.spawn_random(spawns, mode)
+            if records is not None and tiles != records[index]:
+                raise ReplayError(f"the spawns of the move {self._firsts[number] + index} do not match the record")
+        return g
+
+    def play(self, engine: type = None, verify: bool = False) -> Game:
+        """
+        return the game at its end (see game_at)
+        """
+        return self.game_at(self._moves, engine, verify)
+
+    # getters:
+    @property
+    def seed(self) -> int:
+        """
+        return the root seed of the game
+        """
+        return self._seed
+
+    @property
+    def game_id(self) -> int:
+        """
+        return the game id of the game
+        """
+        return self._game_id
+
+    @property
+    def width(self) -> int:
+        """
+        return the width of the game grid
+        """
+        return self._width
+
+    @property
+    def height(self) -> int:
+        """
+        return the height of the game grid
+        """
+        return self._height
+
+    @property
+    def mode(self) -> str:
+        """
+        return the spawn mode of the game
+        """
+        return self._mode
+
+    @property
+    def engine(self) -> str:
+        """
+        return the name of the class that recorded the game
+        """
+        return self._engine
+
+    @property
+    def move_count(self) -> int:
+        """
+        return the number of moves of the game
+        """
+        return self._moves
+
+
+def build_parser() -> ap.ArgumentParser:
+    """
+    build the argument parser
+    """
+    parser = ap.ArgumentParser(description="show a position of a recorded game of 2048")
+    parser.add_argument("path", help="the replay file")
+    parser.add_argument("--move", help="the number of moves played (default: the end of the game)", type=int)
+    parser.add_argument("--verify", help="check the spawns against the spawn records", action="store_true")
+    return parser
+
+
+def main() -> None:
+    """
+    print a position of a replay
+    """
+    args = build_parser().parse_args()
+    reader = ReplayReader(args.path)
+    g = reader.game_at(reader.move_count if args.move is None else args.move, verify=args.verify)
+    g.display()
+    print(f"score: {g.score} (move {reader.move_count if args.move is None else args.move}/{reader.move_count})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Author: Bilal Vandenberge
+Date: October 2026
+-> the file with the saved games (snapshots and the AutoSaver class)
+"""
+
+
+from game import Game, GameError, GameSettings
+from read_theme import ThemeError
+from theme_registry import ThemeRegistry
+from replay import ENGINES
+import threading
+import struct
+import zlib
+import os
+
+
+SAVE_PATH = "memory/save"
+
+# LAYOUT (little endian):
+#   header: magic, version, seed, game id, width, height, score, max tile, stream block, stream offset
+#   texts (a length then utf-8): engine, keys, layout, custom layout, language, theme, difficulty
+#   grid: one exponent per cell, line by line
+#   free spots: their number, then their positions in the order of the game (see FreeSpots.reorder)
+#   checksum: the crc32 of everything before it
+MAGIC = b"2048SAV"
+VERSION = 1
+HEADER = struct.Struct("<7sBQIHHQBIH")
+CHECKSUM = struct.Struct("<I")
+
+
+class SaveError(GameError):
+    """represent a missing or invalid saved game"""
+    pass
+
+
+def _pack_text(text: str) -> bytes:
+    """
+    return a text with its length
+    """
+    data = text.encode()
+    if len(data) > 255:
+        raise SaveError(f"the text {text[:16]}... is too long to be saved")
+    return bytes((len(data),)) + data
+
+
+def dump(g: Game, settings: GameSettings) -> bytes:
+    """
+    return the snapshot of a game and its settings
+    (the undo journal is not saved)
+    """
+    seed, game_id = g.stream.seed, g.stream.game_id
+    if not 0 <= seed < 1 << 64 or not 0 <= game_id < 1 << 32:
+        raise SaveError(f"the seed {seed} (game {game_id}) does not fit in a save")
+    data = bytearray(HEADER.pack(MAGIC, VERSION, seed, game_id, g.width, g.height, g.score, g.max_tile, *g.stream.state))
+    for text in (type(g).__name__, "".join(settings.keys), settings.layout_name, settings.custom_UDLR or "",
+    settings.language, settings.theme.name, settings.difficulty):
+        data += _pack_text(text)
+    data += bytes(tile for line in g.grid for tile in line)
+    free = list(g.free_spots)
+    data += struct.pack(f"<H{len(free)}H", len(free), *free)
+    data += CHECKSUM.pack(zlib.crc32(data))
+    return bytes(data)
+
+
+def load(data: bytes, registry: ThemeRegistry = None, color_depth: str = None, journal: bool = False) -> tuple[Game, GameSettings]:
+    """
+    return the game and the settings of a snapshot (see dump)
+    ARGS:
+        - data: the snapshot
+        - registry: the themes, from their compiled cache (the themes subdir if None)
+        - color_depth: the color depth of the theme (detected if None, see read_theme.COLOR_DEPTHS)
+        - journal: if the moves of the resumed game are journaled (see Game)
+    """
+    if len(data) < HEADER.size + CHECKSUM.size or data[:len(MAGIC)] != MAGIC:
+        raise SaveError("the save is not a saved game")
+    if CHECKSUM.unpack_from(data, len(data) - CHECKSUM.size)[0] != zlib.crc32(data[:-CHECKSUM.size]):
+        raise SaveError("the save is corrupted")
+    _, version, seed, game_id, width, height, score, max_tile, block, offset = HEADER.unpack_from(data)
+    if version != VERSION:
+        raise SaveError(f"the save has an unknown version ({version})")
+    pos = HEADER.size
+    texts = []
+    for _ in range(7):
+        texts.append(data[pos + 1:pos + 1 + data[pos]].decode())
+        pos += 1 + data[pos]
+    engine, keys, layout, custom_UDLR, language, theme, difficulty = texts
+    if engine not in ENGINES:
+        raise SaveError(f"the save has an unknown engine ({engine})")
+    registry = ThemeRegistry() if registry is None else registry
+    if theme not in registry.names():
+        raise SaveError(f"the theme of the save is missing ({theme})")
+    try:
+        theme = registry.get(theme, color_depth)
+    except ThemeError as error:
+        raise SaveError(f"the theme of the save is invalid ({theme}: {error})")
+    settings = GameSettings(*keys, theme=theme, difficulty=difficulty, language=language,
+    keys_layout=layout, custom_UDLR=custom_UDLR or None)
+    cells = data[pos:pos + width * height]
+    grid = [list(cells[y:y + width]) for y in range(0, width * height, width)]
+    pos += width * height
+    number = struct.unpack_from("<H", data, pos)[0]
+    free = struct.unpack_from(f"<{number}H", data, pos + 2)
+    g = ENGINES[engine](width, height, seed, game_id, journal)
+    g.load(grid, score, max_tile, (block, offset), list(free))
+    return g, settings
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    """
+    replace a file by new content, never leaving a half written file
+    (the content goes to a temporary file which is then renamed)
+    """
+    temp = path + ".tmp"
+    try:
+        with open(temp, mode="wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, path)
+    except OSError:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+
+
+def read(path: str = SAVE_PATH, registry: ThemeRegistry = None, color_depth: str = None, journal: bool = False) -> tuple[Game, GameSettings]:
+    """
+    return the game and the settings saved in a file (see load)
+    """
+    try:
+        with open(path, mode="rb") as f:
+            return load(f.read(), registry, color_depth, journal)
+    except FileNotFoundError:
+        raise SaveError("there is no saved game")
+
+
+class AutoSaver:
+    """represent a background thread that saves the last snapshot of a game"""
+
+    # methods:
+    def __init__(self, path: str = SAVE_PATH):
+        self._path = path
+        self._pending = None # the last snapshot not yet written
+        self._closed = False
+        self._writes = 0
+        self._error = None # the error of the last write (None if it was written)
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="autosaver", daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> "AutoSaver":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        """
+        write the snapshots until the saver is closed (the snapshots sent
+        during a write are coalesced into the last one), a failed write
+        does not stop the thread (see close)
+        """
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+                if self._pending is None:
+                    return
+                data, self._pending = self._pending, None
+            try:
+                write_atomic(self._path, data)
+            except OSError as error: # disk full, read-only or missing directory...
+                self._error = error
+            else:
+                self._error = None
+                self._writes += 1
+
+    def save(self, g: Game, settings: GameSettings) -> None:
+        """
+        send the snapshot of a game to the thread (does not wait for the disk)
+        """
+        data = dump(g, settings)
+        with self._condition:
+            self._pending = data
+            self._condition.notify()
+
+    def discard(self) -> None:
+        """
+        stop the thread and delete the save (the game is over)
+        """
+        with self._condition:
+            self._pending = None
+        self._stop()
+        self._error = None # nothing has to be saved anymore
+        if os.path.exists(self._path):
+            os.remove(self._path)
+
+    def close(self) -> None:
+        """
+        write the last snapshot and stop the thread
+        raise a SaveError if the last snapshot could not be written
+        """
+        self._stop()
+        if self._error is not None:
+            raise SaveError(f"the game could not be saved in {self._path} ({self._error.strerror or self._error})") from self._error
+
+    def _stop(self) -> None:
+        """
+        stop the thread once the pending snapshot is written
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+    # getters:
+    @property
+    def writes(self) -> int:
+        """
+        return the number of snapshots written on the disk
+        """
+        return self._writes
+
+    @property
+    def error(self) -> OSError:
+        """
+        return the error of the last write (None if it was written)
+        """
+        return self._error
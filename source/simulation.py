@@ -0,0 +1,294 @@
+"""
+Author: Bilal Vandenberge
+Date: October 2026
+-> headless games of 2048: policies, the game stream and its statistics
+"""
+
+
+from game import Game, GameError, INDEX_TO_POWER, EVENT_MERGE, line_events
+import random
+import time
+
+
+AVAILABLE_POLICIES = ["random", "greedy", "expectimax", "montecarlo"]
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+def random_policy(g: Game) -> int:
+    """
+    return a random legal direction (-1 if there is none)
+    """
+    legal = g.legal_moves()
+    if not legal:
+        return -1
+    return random.choice([orientation for orientation in range(4) if legal >> orientation & 1])
+
+
+def move_gain(grid: list[list[int]], orientation: int) -> int:
+    """
+    return the points won by a move on a grid of exponents (the grid is not changed)
+    """
+    lines = [list(column) for column in zip(*grid)] if orientation < 2 else grid
+    events = []
+    for line in lines:
+        line_events(range(len(line)), line[::-1] if orientation & 1 else line, events) # down and right slide to the end
+    return sum(INDEX_TO_POWER[event[3]] for event in events if event[0] == EVENT_MERGE)
+
+
+def greedy_policy(g: Game) -> int:
+    """
+    return the direction that wins the most points right now
+    (a random one among the ties, moves that change the grid first)
+    """
+    legal = g.legal_moves()
+    grid = g.grid
+    best, best_key = [], None
+    for orientation in range(4):
+        key = (bool(legal >> orientation & 1), move_gain(grid, orientation)) # no trial move, the game has no journal
+        if best_key is None or key > best_key:
+            best, best_key = [orientation], key
+        elif key == best_key:
+            best.append(orientation)
+    return random.choice(best)
+
+
+class Policy:
+    """represent a policy and the resources it holds (processes, mapped files), closed together"""
+
+    # methods:
+    def __init__(self, choose, resources: list = None):
+        """
+        ARGS:
+            - choose: the function that takes a Game and returns a direction, or
+            -1 if there is no legal move
+            - resources: the objects closed by close, in order
+        """
+        self._choose = choose
+        self._resources = resources or []
+
+    def __call__(self, g: Game) -> int:
+        """
+        return the direction chosen in a game
+        """
+        return self._choose(g)
+
+    def __enter__(self) -> "Policy":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        close the resources of the policy (the policy can not be used anymore)
+        """
+        resources, self._resources = self._resources, []
+        for resource in resources:
+            resource.close()
+
+
+def build_policy(name: str, mode: str = "normal", budget: float = 50, rollouts: int = 100, workers: int = None,
+database: str = None) -> Policy:
+    """
+    return the policy of a name (close it to stop its processes and
+    close its database)
+    ARGS:
+        - name: the name of the policy (see AVAILABLE_POLICIES)
+        - mode: the spawn mode of the games
+        - budget: the time allowed per move to the expectimax policy, in milliseconds
+        - rollouts: the number of rollouts per move of the montecarlo policy
+        - workers: the number of processes of the montecarlo policy (and of the expectimax policy if more than 1)
+        - database: the path of the position database of the expectimax policy (none if None)
+    """
+    match name:
+        case "random":
+            return Policy(random_policy)
+        case "greedy":
+            return Policy(greedy_policy)
+        case "expectimax":
+            import solver
+            resources = []
+            if database is not None:
+                import position_db
+                database = position_db.PositionDB(database, signature=solver.search_signature(mode))
+                resources.append(database)
+            if workers is not None and workers > 1:
+                import parallel_solver
+                try:
+                    player = parallel_solver.ParallelSolver(budget, mode, workers=workers, database=database)
+                except BaseException:
+                    Policy(None, resources).close()
+                    raise
+                return Policy(player.best_move, [player] + resources) # the workers stop before the database closes
+            return Policy(solver.Solver(budget, mode, database=database).best_move, resources)
+        case "montecarlo":
+            import monte_carlo
+            player = monte_carlo.MonteCarloPlayer(rollouts, workers, random.getrandbits(63), mode)
+            return Policy(player.best_move, [player])
+        case _:
+            raise GameError(f"unknown policy - {name}")
+
+
+def play_games(number: int, policy, engine: type = Game, mode: str = "normal", seed: int = None):
+    """
+    play games without any display, yield (score, max tile, moves) after each game
+    ARGS:
+        - number: the number of games
+        - policy: the function that chooses the moves (see build_policy and Policy)
+        - engine: the class of the games
+        - mode: the spawn mode of the games
+        - seed: the root seed of the games (game i uses the stream (seed, i))
+    """
+    if seed is None:
+        seed = random.getrandbits(63)
+    for game_id in range(number):
+        g = engine(seed=seed, game_id=game_id)
+        g.spawn_random(2, "start")
+        moves = 0
+        while not g.is_lost():
+            orientation = policy(g)
+            if orientation == -1:
+                break
+            if g.change_gravity(orientation):
+                g.spawn_random(2, mode)
+            moves += 1
+        yield g.score, g.max_tile, moves
+
+
+class P2Quantile:
+    """represent a streaming estimation of a quantile in constant memory (P-square algorithm)"""
+
+    # methods:
+    def __init__(self, quantile: float):
+        self._quantile = quantile
+        self._heights = []
+        self._positions = [1, 2, 3, 4, 5]
+        self._desired = [1, 1 + 2 * quantile, 1 + 4 * quantile, 3 + 2 * quantile, 5]
+        self._increments = [0, quantile / 2, quantile, (1 + quantile) / 2, 1]
+
+    def add(self, value: float) -> None:
+        """
+        add an observation
+        """
+        q, n = self._heights, self._positions
+        if len(q) < 5:
+            q.append(value)
+            q.sort()
+            return
+        if value < q[0]:
+            q[0] = value
+            k = 0
+        elif value >= q[4]:
+            q[4] = value
+            k = 3
+        else:
+            k = 0
+            while value >= q[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+        for i in range(1, 4):
+            d = self._desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                height = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if not q[i - 1] < height < q[i + 1]: # linear fallback
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    # getters:
+    @property
+    def value(self) -> float:
+        """
+        return the current estimation of the quantile
+        """
+        q = self._heights
+        if not q:
+            return 0.0
+        if len(q) < 5:
+            return q[min(len(q) - 1, int(self._quantile * len(q)))]
+        return q[2]
+
+
+class SimulationStats:
+    """represent the aggregated results of a stream of games (constant memory)"""
+
+    # methods:
+    def __init__(self):
+        self._games = 0
+        self._moves = 0
+        self._score_sum = 0
+        self._quantiles = [P2Quantile(q) for q in QUANTILES]
+        self._max_tiles = [0] * len(INDEX_TO_POWER)
+        self._start = time.perf_counter()
+
+    def add(self, score: int, max_tile: int, moves: int) -> None:
+        """
+        add the result of a game
+        """
+        self._games += 1
+        self._moves += moves
+        self._score_sum += score
+        for quantile in self._quantiles:
+            quantile.add(score)
+        self._max_tiles[min(max_tile, len(self._max_tiles) - 1)] += 1
+
+    def consume(self, results) -> "SimulationStats":
+        """
+        add every result of a stream of games (see play_games)
+        """
+        for result in results:
+            self.add(*result)
+        return self
+
+    def __str__(self) -> str:
+        """
+        return str(self)
+        """
+        elapsed = max(time.perf_counter() - self._start, 1e-9)
+        lines = [
+            f"games: {self._games} ({self._games / elapsed:.1f} games/sec)",
+            f"moves: {self._moves} ({self._moves / elapsed:.0f} moves/sec)",
+            f"score: mean {self.mean_score:.1f} | "
+            + " | ".join(f"p{round(q * 100)} {e.value:.0f}" for q, e in zip(QUANTILES, self._quantiles)),
+            "max tile:"
+        ]
+        for index, count in enumerate(self._max_tiles):
+            if count:
+                lines.append(f"  {str(INDEX_TO_POWER[index]).rjust(6)} {count} ({100 * count / self._games:.1f}%)")
+        return "\n".join(lines)
+
+    # getters:
+    @property
+    def games(self) -> int:
+        """
+        return the number of games
+        """
+        return self._games
+
+    @property
+    def moves(self) -> int:
+        """
+        return the number of moves of all the games
+        """
+        return self._moves
+
+    @property
+    def mean_score(self) -> float:
+        """
+        return the mean score of the games
+        """
+        return self._score_sum / self._games if self._games else 0.0
+
+    @property
+    def max_tiles(self) -> list[int]:
+        """
+        return the number of games per biggest tile (index = exponent)
+        """
+        return self._max_tiles
@@ -0,0 +1,305 @@
+"""
+Author: Bilal Vandenberge
+Date: October 2026
+-> the file with the Solver class (expectimax search on 4x4 packed boards)
+"""
+
+
+from game import Game, GameError, spawn_rates
+from symmetry import canonical_board
+from heuristic import Heuristic
+import bitboard
+import functools
+import threading
+import time
+
+
+CHECK_INTERVAL = 1024 # number of nodes between two checks of the clock
+
+
+@functools.cache
+def default_heuristic() -> Heuristic:
+    """
+    return the heuristic shared by the solvers built without their own
+    (its tables are built by the first call, not at import)
+    """
+    return Heuristic()
+
+
+def spawn_probabilities(mode: str = "normal") -> tuple[tuple[float, int], ...]:
+    """
+    return the probability of each power that can spawn in a mode
+    (built from the cumulative table used by Game.random_pow)
+    ARG:
+        - mode: the mode of the spawn (supported: start, normal and hell)
+    """
+    probabilities = []
+    previous = 0.0
+    for threshold, power in spawn_rates(mode):
+        probabilities.append((threshold - previous, power))
+        previous = threshold
+    return tuple(probabilities)
+
+
+def search_signature(mode: str = "normal", spawns: int = 2, heuristic: Heuristic = None) -> str:
+    """
+    return the text that identifies the values of a search (the key of a
+    PositionDB, see position_db.py)
+    ARGS:
+        - mode: the spawn mode of the game
+        - spawns: the number of tiles spawned after each move
+        - heuristic: the evaluation of the leaves (default_heuristic() if None)
+    """
+    return f"{mode}/{spawns}/{(heuristic or default_heuristic()).fingerprint}"
+
+
+def evaluate(board: int) -> float:
+    """
+    return the value of a packed board with the default heuristic
+    """
+    return default_heuristic().evaluate(board)
+
+
+def to_board(position) -> int:
+    """
+    return the packed board of a Game, a grid or a packed board
+    """
+    if isinstance(position, bitboard.BitGame):
+        return position.board
+    if isinstance(position, Game):
+        return bitboard.from_grid(position.grid)
+    if isinstance(position, int):
+        return position
+    return bitboard.from_grid(position)
+
+
+class SearchTimeout(Exception):
+    """raised inside a search when its time budget is spent"""
+
+
+class Solver:
+    """represent an expectimax player for 4x4 games"""
+
+    # methods:
+    def __init__(self, time_budget: float = 50, mode: str = "normal", spawns: int = 2,
+    min_probability: float = 1e-4, max_depth: int = 12, heuristic: Heuristic = None, database=None, table=None):
+        """
+        ARGS:
+            - time_budget: the time allowed per move in milliseconds
+            - mode: the spawn mode of the game (see Game.random_pow)
+            - spawns: the number of tiles spawned after each move
+            - min_probability: the cumulative probability under which a
+            chance node is evaluated instead of searched
+            - max_depth: the deepest iteration of the iterative deepening
+            - heuristic: the evaluation of the leaves (default_heuristic() if None)
+            - database: the PositionDB read before a search and updated after it
+            (see position_db.py, not used if None)
+            - table: the transposition table, a mapping of canonical boards to
+            (depth, value) (a dict if None, see parallel_solver.SharedTable)
+        """
+        self._time_budget = time_budget
+        self._probabilities = spawn_probabilities(mode)
+        self._spawns = spawns
+        self._min_probability = min_probability
+        self._max_depth = max_depth
+        self._heuristic = heuristic or default_heuristic()
+        self._signature = search_signature(mode, spawns, self._heuristic)
+        if database is not None and database.signature != self._signature:
+            raise GameError(f"the position database holds another search ({database.signature or "unknown"}, not {self._signature})")
+        self._database = database
+        self._deadline = float("inf")
+        self._cancel = None
+        self._nodes = 0
+        self._table = {} if table is None else table
+
+    def best_move(self, position) -> int:
+        """
+        return the index (in Game.AVAILABLE_DIRECTIONS) of the best move,
+        or -1 if there is no legal move
+        ARG:
+            - position: a Game, a 4x4 grid of exponents or a packed board
+        """
+        best = -1
+        for depth, orientation, value in self.iterate(position, self._time_budget):
+            best = orientation
+        return best
+
+    def iterate(self, position, time_budget: float = None, cancel: threading.Event = None):
+        """
+        search the position deeper and deeper, yield (depth, best move, value)
+        after each completed iteration
+        ARGS:
+            - position: a Game, a 4x4 grid of exponents or a packed board
+            - time_budget: the time allowed in milliseconds (no limit if None),
+            the first iteration always completes
+            - cancel: the event that stops the search at once, even during the
+            first iteration (set by another thread), a cancelled search is not
+            stored in the database
+        """
+        board = to_board(position)
+        self._table.clear()
+        self._nodes = 0
+        first = 1 # the first iteration searched
+        solved = self._database.get(board) if self._database is not None else None
+        if solved is not None: # already searched by an earlier game or process, maybe not as deep
+            orientation, value, depth = solved
+            yield depth, orientation, value
+            if depth >= self._max_depth:
+                return
+            first = depth + 1
+        start = time.perf_counter()
+        result = None
+        self._cancel = cancel
+        try:
+            for depth in range(first, self._max_depth + 1):
+                if (depth > 1 or solved is not None) and time_budget is not None:
+                    self._deadline = start + time_budget / 1000
+                try:
+                    orientation, value = self._root(board, depth)
+                except SearchTimeout:
+                    break
+                finally:
+                    self._deadline = float("inf")
+                if orientation == -1:
+                    break
+                result = (orientation, value, depth)
+                yield depth, orientation, value
+        finally:
+            self._cancel = None
+            # a cancelled search (a hint left by the player) is too shallow to be kept
+            if result is not None and self._database is not None and not (cancel is not None and cancel.is_set()):
+                self._database.put(board, *result)
+
+    def _root(self, board: int, depth: int) -> tuple[int, float]:
+        """
+        return the best move and its value at a given depth
+        """
+        best, best_value = -1, float("-inf")
+        for orientation in range(4):
+            new, score, _ = bitboard.move(board, orientation)
+            if new == board:
+                continue
+            value = score + self._chance(new, depth, 1.0, self._spawns)
+            if value > best_value:
+                best, best_value = orientation, value
+        return best, best_value
+
+    def _max(self, board: int, depth: int, probability: float) -> float:
+        """
+        return the expected value of a position where the player moves
+        """
+        key = canonical_board(board)[0] # the 8 symmetric positions have the same value
+        entry = self._table.get(key)
+        if entry is not None and entry[0] >= depth:
+            return entry[1]
+        best = 0.0 # a dead end is worth nothing
+        for orientation in range(4):
+            new, score, _ = bitboard.move(board, orientation)
+            if new != board:
+                best = max(best, score + self._chance(new, depth, probability, self._spawns))
+        self._table[key] = (depth, best)
+        return best
+
+    def _chance(self, board: int, depth: int, probability: float, spawns: int) -> float:
+        """
+        return the expected value of a position where tiles spawn
+        """
+        self._nodes += 1
+        if not self._nodes % CHECK_INTERVAL and (time.perf_counter() > self._deadline
+        or self._cancel is not None and self._cancel.is_set()):
+            raise SearchTimeout()
+        if probability < self._min_probability:
+            return self.evaluate(board)
+        free = bitboard.empty_cells(board) if spawns else ()
+        if not free:
+            if depth <= 1:
+                return self.evaluate(board)
+            return self._max(board, depth - 1, probability)
+        total = 0.0
+        share = probability / len(free)
+        for pos in free:
+            shift = pos << 2
+            for chance, power in self._probabilities:
+                total += chance * self._chance(board | (power << shift), depth, share * chance, spawns - 1)
+        return total / len(free)
+
+    def expected_value(self, board: int, depth: int, probability: float = 1.0, spawns: int = None,
+    deadline: float = float("inf")) -> float:
+        """
+        return the expected value of a position where tiles spawn (a subtree of
+        a search, the transposition table is kept)
+        ARGS:
+            - board: the packed board after a move
+            - depth: the number of moves left to search
+            - probability: the probability to reach the position
+            - spawns: the number of tiles left to spawn (all if None)
+            - deadline: the time.perf_counter value after which SearchTimeout is raised
+        """
+        self._deadline = deadline
+        try:
+            return self._chance(board, depth, probability, self._spawns if spawns is None else spawns)
+        finally:
+            self._deadline = float("inf")
+
+    def evaluate(self, board: int) -> float:
+        """
+        return the heuristic value of a leaf position
+        """
+        return self._heuristic.evaluate(board)
+
+    # getters:
+    @property
+    def heuristic(self) -> Heuristic:
+        """
+        return the evaluation of the leaves
+        """
+        return self._heuristic
+
+    @property
+    def table(self):
+        """
+        return the transposition table of the solver
+        """
+        return self._table
+
+    @property
+    def signature(self) -> str:
+        """
+        return the text that identifies the values of the search (see search_signature)
+        """
+        return self._signature
+
+    @property
+    def database(self):
+        """
+        return the PositionDB of the solver (None if there is none)
+        """
+        return self._database
+
+    @property
+    def spawns(self) -> int:
+        """
+        return the number of tiles spawned after each move
+        """
+        return self._spawns
+
+    @property
+    def probabilities(self) -> tuple[tuple[float, int], ...]:
+        """
+        return the probability of each power that can spawn
+        """
+        return self._probabilities
+
+    @property
+    def nodes(self) -> int:
+        """
+        return the number of nodes searched by the last search
+        """
+        return self._nodes
+
+    @property
+    def time_budget(self) -> float:
+        """
+        return the time allowed per move in milliseconds
+        """
+        return self._time_budget
@@ -0,0 +1,110 @@
+"""
+Author: Bilal Vandenberge
+Date: October 2026
+-> the symmetries of the boards (canonical forms and the directions on the real board)
+"""
+
+
+from game import GameError
+import bitboard
+
+
+# the 8 symmetries of a square (the first 4 also keep a rectangle):
+TRANSFORMS = ["identity", "mirror", "flip", "rotate 180", "transpose", "anti-transpose", "rotate 90", "rotate 270"]
+
+# how each transform moves a step (line, column) of the real board on the transformed board
+_STEPS = [
+    lambda y, x: (y, x), lambda y, x: (y, -x), lambda y, x: (-y, x), lambda y, x: (-y, -x),
+    lambda y, x: (x, y), lambda y, x: (-x, -y), lambda y, x: (x, -y), lambda y, x: (-x, y)
+]
+DIRECTION_STEPS = [(-1, 0), (1, 0), (0, -1), (0, 1)] # same order as Game.AVAILABLE_DIRECTIONS
+
+# REAL_DIRECTIONS[transform][direction on the transformed board] -> direction on the real board
+REAL_DIRECTIONS = [
+    [DIRECTION_STEPS.index(next(real for real in DIRECTION_STEPS if step(*real) == target)) for target in DIRECTION_STEPS]
+    for step in _STEPS
+]
+# TRANSFORMED_DIRECTIONS[transform][direction on the real board] -> direction on the transformed board
+TRANSFORMED_DIRECTIONS = [[DIRECTION_STEPS.index(step(*real)) for real in DIRECTION_STEPS] for step in _STEPS]
+
+
+def _mirror(board: int) -> int:
+    """
+    return the packed board with its columns reversed
+    """
+    board = ((board & 0x0F0F0F0F0F0F0F0F) << 4) | ((board >> 4) & 0x0F0F0F0F0F0F0F0F)
+    return ((board & 0x00FF00FF00FF00FF) << 8) | ((board >> 8) & 0x00FF00FF00FF00FF)
+
+
+def _flip(board: int) -> int:
+    """
+    return the packed board with its lines reversed
+    """
+    board = ((board & 0x0000FFFF0000FFFF) << 16) | ((board >> 16) & 0x0000FFFF0000FFFF)
+    return ((board & 0xFFFFFFFF) << 32) | (board >> 32)
+
+
+def transform_board(board: int, transform: int) -> int:
+    """
+    return a packed board after a transform (index in TRANSFORMS)
+    """
+    if transform >= 4:
+        board = bitboard.transpose(board)
+        transform = (0, 3, 1, 2)[transform - 4] # transpose, then nothing, rotate 180, mirror or flip
+    if transform & 1:
+        board = _mirror(board)
+    if transform & 2:
+        board = _flip(board)
+    return board
+
+
+def canonical_board(board: int) -> tuple[int, int]:
+    """
+    return the smallest of the 8 symmetric packed boards and the transform
+    that gives it (see transform_board)
+    """
+    mirror = _mirror(board)
+    t = bitboard.transpose(board)
+    t_mirror = _mirror(t)
+    candidates = (board, mirror, _flip(board), _flip(mirror), t, _flip(t_mirror), t_mirror, _flip(t))
+    best = min(candidates)
+    return best, candidates.index(best)
+
+
+def transform_grid(grid: list[list[int]], transform: int) -> list[list[int]]:
+    """
+    return a grid after a transform (index in TRANSFORMS, the last 4 need a square grid)
+    """
+    height, width = len(grid), len(grid[0])
+    if transform >= 4:
+        if width != height:
+            raise GameError(f"the transform {TRANSFORMS[transform]} needs a square grid")
+        grid = [list(column) for column in zip(*grid)]
+        transform = (0, 3, 1, 2)[transform - 4]
+    if transform & 1:
+        grid = [line[::-1] for line in grid]
+    if transform & 2:
+        grid = grid[::-1]
+    return grid
+
+
+def canonical_grid(grid: list[list[int]]) -> tuple[list[list[int]], int]:
+    """
+    return the smallest symmetric grid (line by line) and the transform that
+    gives it (4x4 grids use the packed boards)
+    """
+    height, width = len(grid), len(grid[0])
+    if width == height == bitboard.SIDE and max(map(max, grid)) <= bitboard.MAX_EXPONENT:
+        board, transform = canonical_board(bitboard.from_grid(grid))
+        return bitboard.to_grid(board), transform
+    candidates = [transform_grid(grid, transform) for transform in range(8 if width == height else 4)]
+    best = min(candidates)
+    return best, candidates.index(best)
+
+
+def real_direction(direction: int, transform: int) -> int:
+    """
+    return the direction of the real board (the change_gravity index) of a
+    direction chosen on the transformed board
+    """
+    return REAL_DIRECTIONS[transform][direction]
@@ -0,0 +1,168 @@
+"""
+Author: Bilal Vandenberge
+Date: October 2026
+-> the file with the ThemeRegistry class (the themes of a directory, compiled once in a cache)
+"""
+
+
+from read_theme import Theme, ThemeError, COLOR_DEPTHS, INDEX_TO_POWER, parse_palette, detect_color_depth, Color
+import json
+import os
+
+
+CACHE_DIR = "memory/themes"
+CACHE_VERSION = 1
+EXTENSION = ".dmqu"
+
+# CACHE: one json file per theme (<name>.json), only the selected theme is read
+#   version, mtime (ns) and size of the theme file when it was compiled
+#   palette: the (background, label) rgb colors of each tile
+#   pairs: the escape sequence of each tile at each color depth (see Color.pair)
+#   error: the reason why the theme is invalid (instead of palette and pairs)
+
+
+class ThemeRegistry:
+    """represent the themes of a directory, validated and compiled once in a cache keyed by their mtime"""
+
+    # methods:
+    def __init__(self, directory: str = "themes", cache_dir: str = CACHE_DIR):
+        """
+        ARGS:
+            - directory: the directory of the theme files
+            - cache_dir: the directory of the compiled themes (no cache if None)
+        """
+        self._directory = directory
+        self._cache_dir = cache_dir
+        self._names = None # scanned by the first call of names
+        self._compiled = 0
+
+    def names(self) -> list[str]:
+        """
+        return the names of the theme files of the directory (sorted)
+        """
+        if self._names is None:
+            try:
+                with os.scandir(self._directory) as entries:
+                    self._names = sorted(entry.name[:-len(EXTENSION)] for entry in entries
+                    if entry.name.endswith(EXTENSION) and entry.is_file())
+            except FileNotFoundError:
+                self._names = []
+        return self._names
+
+    def path(self, name: str) -> str:
+        """
+        return the path of the file of a theme
+        """
+        return os.path.join(self._directory, name + EXTENSION)
+
+    def _cache_path(self, name: str) -> str:
+        """
+        return the path of the compiled theme
+        """
+        return os.path.join(self._cache_dir, name + ".json")
+
+    def _read_cache(self, name: str, stat: os.stat_result) -> dict:
+        """
+        return the compiled theme if it matches the theme file, None otherwise
+        """
+        try:
+            with open(self._cache_path(name), mode="r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or [entry.get("version"), entry.get("mtime"), entry.get("size")] != [
+        CACHE_VERSION, stat.st_mtime_ns, stat.st_size]:
+            return None
+        return entry
+
+    def _write_cache(self, name: str, entry: dict) -> None:
+        """
+        store a compiled theme, never leaving a half written file (the cache
+        is only a speed up, it is skipped if it can not be written)
+        """
+        temp = self._cache_path(name) + f".{os.getpid()}.tmp"
+        try:
+            os.makedirs(self._cache_dir, exist_ok=True)
+            with open(temp, mode="w") as f:
+                json.dump(entry, f, separators=(",", ":"))
+            os.replace(temp, self._cache_path(name))
+        except OSError:
+            if os.path.exists(temp):
+                os.remove(temp)
+
+    def compile(self, name: str) -> dict:
+        """
+        return the compiled theme (see CACHE), from the cache if the theme
+        file did not change since it was compiled
+        ARG:
+            - name: the name of the theme
+        """
+        if name not in self.names():
+            raise ThemeError(f"unknown theme - {name}")
+        path = self.path(name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            raise ThemeError("no theme file found")
+        if self._cache_dir is not None:
+            entry = self._read_cache(name, stat)
+            if entry is not None:
+                return entry
+        entry = {"version": CACHE_VERSION, "mtime": stat.st_mtime_ns, "size": stat.st_size}
+        try:
+            with open(path, mode="r") as theme_file:
+                palette = parse_palette(theme_file.read())
+            colors = [(Color(*bg), Color(*label)) for bg, label in palette]
+            entry["palette"] = palette
+            entry["pairs"] = {depth: [bg.pair(label, depth) for bg, label in colors] for depth in COLOR_DEPTHS}
+        except ThemeError as error:
+            entry["error"] = str(error)
+        except (OSError, UnicodeDecodeError):
+            entry["error"] = "corrupted theme file"
+        self._compiled += 1
+        if self._cache_dir is not None:
+            self._write_cache(name, entry)
+        return entry
+
+    def get(self, name: str, color_depth: str = None) -> Theme:
+        """
+        return a theme built from its compiled palette (the theme file is not parsed)
+        ARGS:
+            - name: the name of the theme
+            - color_depth: the color depth of the terminal (see read_theme.COLOR_DEPTHS,
+            detected if None)
+        """
+        color_depth = detect_color_depth() if color_depth is None else color_depth
+        if color_depth not in COLOR_DEPTHS:
+            raise ThemeError(f"unknown color depth - {color_depth}")
+        entry = self.compile(name)
+        if "error" in entry:
+            raise ThemeError(entry["error"])
+        return Theme(self.path(name), color_depth, entry["palette"], entry["pairs"][color_depth])
+
+    def check(self) -> dict[str, str]:
+        """
+        return the error of each theme of the directory (None if it is valid)
+        """
+        return {name: self.compile(name).get("error") for name in self.names()}
+
+    def preview(self, name: str, color_depth: str = None, width: int = 6) -> str:
+        """
+        return a line with the tiles of a theme, from 2 to 2048
+        """
+        return "".join(self.get(name, color_depth).cells(width)[1:INDEX_TO_POWER.index(2048) + 1])
+
+    # getters:
+    @property
+    def directory(self) -> str:
+        """
+        return the directory of the theme files
+        """
+        return self._directory
+
+    @property
+    def compiled(self) -> int:
+        """
+        return the number of theme files parsed (not found in the cache)
+        """
+        return self._compiled
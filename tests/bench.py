@@ -0,0 +1,274 @@
+"""
+Author: Bilal Vandenberge
+Date: October 2026
+-> Benchmarks for source (throughput compared with a stored JSON baseline)
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "source"))
+from game import Game
+from bitboard import BitGame
+from compact_game import CompactGame
+from read_theme import Theme
+from theme_registry import ThemeRegistry
+import argparse as ap
+import contextlib
+import tempfile
+import platform
+import random
+import json
+import time
+import io
+
+THEMES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "themes")
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+ENGINES = [Game, BitGame, CompactGame]
+DIRECTIONS = ["up", "down", "left", "right"] # same order as Game.AVAILABLE_DIRECTIONS
+SIZES = [(3, 3), (4, 4), (5, 5), (6, 6)] # bigger random games outgrow INDEX_TO_POWER
+TOLERANCE = 0.25 # the slowdown allowed before a benchmark fails
+REPEAT = 5 # runs of each benchmark (the fastest is kept)
+POSITIONS = 500 # games of a batch
+
+
+def random_games(engine: type, number: int, width: int = 4, height: int = 4, seed: int = 0) -> list[Game]:
+    """
+    return games of the engine on random grids with a few free cells
+    """
+    rng = random.Random(seed)
+    games = []
+    for _ in range(number):
+        g = engine(width, height)
+        g.load([[rng.choice((0, 1, 1, 2, 2, 3, 4, 5)) for _ in range(width)] for _ in range(height)], max_tile=5)
+        games.append(g)
+    return games
+
+
+# BENCHMARKS: (setup, run) -> setup builds the data of a run (not timed),
+# run returns the number of operations done
+
+def bench_change_gravity(engine: type, orientation: int) -> tuple:
+    """
+    one move in a direction on random grids
+    """
+    def setup():
+        return random_games(engine, POSITIONS)
+    def run(games):
+        for g in games:
+            g.change_gravity(orientation)
+        return len(games)
+    return setup, run
+
+
+def bench_spawn_random(engine: type) -> tuple:
+    """
+    one spawn on random grids
+    """
+    def setup():
+        games = [g for g in random_games(engine, POSITIONS) if not g.is_full()]
+        for g in games: # the block of the stream is drawn once per 256 numbers, not timed here
+            g._stream.random()
+            g._stream.seek((0, 0))
+        return games
+    def run(games):
+        for g in games:
+            g.spawn_random(1)
+        return len(games)
+    return setup, run
+
+
+def bench_is_lost(engine: type) -> tuple:
+    """
+    the dead end check on random grids
+    """
+    def setup():
+        return random_games(engine, POSITIONS)
+    def run(games):
+        for g in games:
+            g.is_lost()
+        return len(games)
+    return setup, run
+
+
+def bench_legal_moves(engine: type) -> tuple:
+    """
+    the legal moves of random grids (computed once per position)
+    """
+    def setup():
+        return random_games(engine, POSITIONS)
+    def run(games):
+        for g in games:
+            g.legal_moves()
+        return len(games)
+    return setup, run
+
+
+def bench_display() -> tuple:
+    """
+    the colored display of random grids (written in memory)
+    """
+    def setup():
+        return random_games(Game, 100), Theme(os.path.join(THEMES_DIR, "base.dmqu"), "truecolor")
+    def run(data):
+        games, theme = data
+        with contextlib.redirect_stdout(io.StringIO()):
+            for g in games:
+                g.display(theme)
+        return len(games)
+    return setup, run
+
+
+def bench_theme_loading() -> tuple:
+    """
+    the parsing of every theme file
+    """
+    def setup():
+        return [os.path.join(THEMES_DIR, name) for name in sorted(os.listdir(THEMES_DIR)) if name.endswith(".dmqu")]
+    def run(paths):
+        for _ in range(20):
+            for path in paths:
+                Theme(path, "truecolor")
+        return 20 * len(paths)
+    return setup, run
+
+
+def bench_theme_cache(depth: str) -> tuple:
+    """
+    the loading of every theme from a warm theme cache
+    """
+    def setup():
+        cache = tempfile.TemporaryDirectory() # deleted with the data of the run
+        ThemeRegistry(THEMES_DIR, cache.name).check()
+        return cache
+    def run(cache):
+        for _ in range(20):
+            registry = ThemeRegistry(THEMES_DIR, cache.name)
+            for name in registry.names():
+                registry.get(name, depth)
+        return 20 * len(registry.names())
+    return setup, run
+
+
+def bench_simulation(engine: type, width: int, height: int) -> tuple:
+    """
+    random games on a board size (operations: moves)
+    """
+    def setup():
+        return random.Random(width * 100 + height)
+    def run(rng):
+        moves = 0
+        for game_id in range(3):
+            g = engine(width, height, seed=1, game_id=game_id)
+            g.spawn_random(2, "start")
+            while (legal := g.legal_moves()):
+                if g.change_gravity(rng.choice([orientation for orientation in range(4) if legal >> orientation & 1])):
+                    g.spawn_random(2)
+                moves += 1
+        return moves
+    return setup, run
+
+
+def all_benchmarks() -> dict:
+    """
+    return the benchmarks of the suite (name -> (setup, run))
+    """
+    benchmarks = {}
+    for engine in ENGINES:
+        for orientation, direction in enumerate(DIRECTIONS):
+            benchmarks[f"change_gravity[{engine.__name__},{direction}]"] = bench_change_gravity(engine, orientation)
+        benchmarks[f"spawn_random[{engine.__name__}]"] = bench_spawn_random(engine)
+        benchmarks[f"is_lost[{engine.__name__}]"] = bench_is_lost(engine)
+        benchmarks[f"legal_moves[{engine.__name__}]"] = bench_legal_moves(engine)
+    benchmarks["display[Game,base]"] = bench_display()
+    benchmarks["theme_loading"] = bench_theme_loading()
+    for depth in ("truecolor", "256"):
+        benchmarks[f"theme_cache[{depth}]"] = bench_theme_cache(depth)
+    for engine in ENGINES:
+        for width, height in SIZES:
+            if engine is BitGame and (width, height) != (4, 4):
+                continue
+            benchmarks[f"simulation[{engine.__name__},{width}x{height}]"] = bench_simulation(engine, width, height)
+    return benchmarks
+
+
+def measure(setup, run, repeat: int = REPEAT) -> float:
+    """
+    return the best throughput (operations per second) of a benchmark
+    """
+    best = 0.0
+    for _ in range(repeat):
+        data = setup()
+        start = time.perf_counter()
+        operations = run(data)
+        elapsed = time.perf_counter() - start
+        best = max(best, operations / elapsed if elapsed else 0.0)
+    return best
+
+
+def compare(results: dict[str, float], baseline: dict[str, float], tolerance: float = TOLERANCE) -> list[str]:
+    """
+    return the names of the benchmarks slower than their baseline beyond the tolerance
+    (the benchmarks without baseline never fail)
+    """
+    return [name for name, speed in results.items() if name in baseline and speed < baseline[name] * (1 - tolerance)]
+
+
+def read_baseline(path: str) -> dict[str, float]:
+    """
+    return the throughputs of a baseline file (empty if there is none)
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, mode="r") as f:
+        return json.load(f)["benchmarks"]
+
+
+def write_baseline(path: str, results: dict[str, float]) -> None:
+    """
+    store the throughputs in a baseline file (with the machine that measured them)
+    """
+    baseline = read_baseline(path)
+    baseline.update(results)
+    with open(path, mode="w") as f:
+        json.dump({"python": platform.python_version(), "machine": platform.platform(), "benchmarks": baseline}, f, indent=2, sort_keys=True)
+
+
+def build_parser() -> ap.ArgumentParser:
+    """
+    build the argument parser
+    """
+    parser = ap.ArgumentParser(description="run the benchmarks of 2048 and compare them with a baseline")
+    parser.add_argument("-k", help="run only the benchmarks whose name contains this text", default="")
+    parser.add_argument("--save", help="store the results as the new baseline", action="store_true")
+    parser.add_argument("--baseline", help="the baseline file", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", help="the slowdown allowed (0.25: 25%%)", type=float, default=TOLERANCE)
+    parser.add_argument("--repeat", help="the runs of each benchmark", type=int, default=REPEAT)
+    return parser
+
+
+def main() -> int:
+    """
+    run the benchmarks, print them next to the baseline
+    return 1 if one of them regressed, 0 otherwise
+    """
+    args = build_parser().parse_args()
+    baseline = read_baseline(args.baseline)
+    results = {}
+    for name, (setup, run) in all_benchmarks().items():
+        if args.k not in name:
+            continue
+        results[name] = measure(setup, run, args.repeat)
+        change = f"{results[name] / baseline[name] - 1:+7.1%}" if name in baseline else "    new"
+        print(f"{name:<36} {results[name]:>12.0f} ops/sec {change}")
+    if args.save:
+        write_baseline(args.baseline, results)
+        print(f"baseline saved in {args.baseline}")
+        return 0
+    slower = compare(results, baseline, args.tolerance)
+    for name in slower:
+        print(f"REGRESSION: {name} is {1 - results[name] / baseline[name]:.1%} slower than its baseline")
+    return 1 if slower else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1018 @@
+"""
+Author: Bilal Vandenberge
+Date: October 2026
+-> Tests for the game engines (source/game.py and co.)
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "source"))
+from game import Game, GameError, FreeSpots, SpawnStream, EVENT_MOVE, EVENT_MERGE, EVENT_SPAWN
+import bitboard
+from batch_game import BatchGame
+from compact_game import CompactGame
+from solver import Solver, spawn_probabilities, search_signature
+from monte_carlo import MonteCarloPlayer, rollouts
+from simulation import P2Quantile, SimulationStats, play_games, random_policy, build_policy, greedy_policy, move_gain
+from replay import ReplayWriter, ReplayReader, ENGINES
+from game import GameSettings
+from read_theme import Theme
+from theme_registry import ThemeRegistry
+import save
+import dataset
+from env import Env, VecEnv
+import symmetry
+import heuristic
+from position_db import PositionDB
+from hints import HintEngine
+from parallel_solver import ParallelSolver, SharedTable, sample_positions
+import bench
+from renderer import Renderer, CLEAR_SCREEN, move_to
+import io
+import threading
+import time
+import numpy as np
+import contextlib
+import tempfile
+import random
+import copy
+
+
+def make_game(grid: list[list[int]], engine: type = Game) -> Game:
+    """
+    return a game of the engine with the given grid of exponents
+    """
+    g = engine(len(grid[0]), len(grid))
+    for y, line in enumerate(grid):
+        for x, e in enumerate(line):
+            if e:
+                g._set_cell(y, x, e)
+                g._free_spots.remove(y * len(line) + x)
+    return g
+
+
+def random_grid(width: int = 4, height: int = 4) -> list[list[int]]:
+    """
+    return a random grid with a lot of mergeable neighbours
+    """
+    return [[random.choice((0, 0, 1, 1, 2, 3)) for _ in range(width)] for _ in range(height)]
+
+
+class TestBitGameClass:
+
+    def test1(self):
+        """
+        check that the BitGame moves exactly like the Game
+        """
+        for _ in range(500):
+            grid = random_grid()
+            for direction in range(4):
+                g = make_game(grid)
+                changed = g.change_gravity(direction)
+                board, score, max_merge = bitboard.move(bitboard.from_grid(grid), direction)
+                assert bitboard.to_grid(board) == g.grid
+                assert score == g.score
+                assert max(1, max_merge) == g.max_tile
+                assert (board != bitboard.from_grid(grid)) == changed
+
+    def test2(self):
+        """
+        check that the packing works as expected
+        """
+        grid = [[random.randint(0, 15) for _ in range(4)] for _ in range(4)]
+        board = bitboard.from_grid(grid)
+        assert bitboard.to_grid(board) == grid
+        assert bitboard.to_grid(bitboard.transpose(board)) == [list(c) for c in zip(*grid)]
+
+    def test3(self):
+        """
+        check that the BitGame refuses other grid sizes
+        """
+        try:
+            bitboard.BitGame(5, 4)
+        except GameError:
+            pass # expected
+        else:
+            raise Exception("the BitGame class let the user build a 5x4 grid")
+
+
+class TestBatchGameClass:
+
+    def test1(self):
+        """
+        check that the BatchGame moves exactly like the Game
+        """
+        for width, height in ((4, 4), (5, 3), (2, 6)):
+            batch = BatchGame(200, width, height, seed=1)
+            grids = [random_grid(width, height) for _ in range(200)]
+            orientations = [random.randrange(4) for _ in range(200)]
+            batch.grids[:] = grids
+            score, changed = batch.change_gravity(orientations)
+            for i in range(200):
+                g = make_game(grids[i])
+                assert g.change_gravity(orientations[i]) == changed[i]
+                assert g.grid == batch.grids[i].tolist()
+                assert g.score == score[i] == batch.scores[i]
+                assert g.max_tile == batch.max_tiles[i]
+
+    def test2(self):
+        """
+        check that the spawns and the lost flags work as expected
+        """
+        batch = BatchGame(300, seed=2)
+        batch.reset()
+        assert ((batch.grids != 0).sum((1, 2)) == 2).all()
+        batch.spawn_random(20, "hell", np.arange(300) % 2 == 0)
+        assert (batch.grids[0::2] != 0).all()
+        assert ((batch.grids[1::2] != 0).sum((1, 2)) == 2).all()
+        lost = batch.is_lost()
+        for i in range(300):
+            g = make_game(batch.grids[i].tolist())
+            assert lost[i] == all(not make_game(g.grid).change_gravity(d) for d in range(4))
+
+
+class TestSolverClass:
+
+    def test1(self):
+        """
+        check that the spawn probabilities follow Game.random_pow
+        """
+        for mode in ("start", "normal", "hell"):
+            probabilities = spawn_probabilities(mode)
+            assert abs(sum(p for p, _ in probabilities) - 1) < 1e-9
+        assert dict((power, round(p, 9)) for p, power in spawn_probabilities("hell")) == {6: 0.05, 2: 0.15, 1: 0.8}
+
+    def test2(self):
+        """
+        check that the solver only plays legal moves and respects its budget
+        """
+        s = Solver(time_budget=20)
+        for _ in range(10):
+            grid = random_grid()
+            legal = [d for d in range(4) if make_game(grid).change_gravity(d)]
+            move = s.best_move(grid)
+            assert move in legal if legal else move == -1
+        assert Solver().best_move([[1, 2, 1, 2], [2, 1, 2, 1]] * 2) == -1
+
+
+class TestMonteCarloPlayerClass:
+
+    def test1(self):
+        """
+        check that the rollouts only depend on their seed
+        """
+        board = bitboard.from_grid(random_grid())
+        assert rollouts(board, 2, 5, "seed") == rollouts(board, 2, 5, "seed")
+
+    def test2(self):
+        """
+        check that the player only plays legal moves
+        """
+        with MonteCarloPlayer(rollouts=4, workers=1, seed=0, batch=3) as player:
+            for _ in range(5):
+                grid = random_grid()
+                legal = [d for d in range(4) if make_game(grid).change_gravity(d)]
+                move = player.best_move(grid)
+                assert move in legal if legal else move == -1
+            assert player.rollouts_done > 0
+
+
+class TestSimulationClass:
+
+    def test1(self):
+        """
+        check that the streaming quantiles are close to the exact ones
+        """
+        values = [random.gauss(1000, 300) for _ in range(20000)]
+        estimators = [P2Quantile(q) for q in (0.5, 0.9, 0.99)]
+        for value in values:
+            for estimator in estimators:
+                estimator.add(value)
+        values.sort()
+        for q, estimator in zip((0.5, 0.9, 0.99), estimators):
+            assert abs(estimator.value - values[int(q * len(values))]) < 30
+
+    def test2(self):
+        """
+        check that the statistics count every game of the stream
+        """
+        stats = SimulationStats().consume(play_games(20, random_policy, bitboard.BitGame))
+        assert stats.games == 20 and sum(stats.max_tiles) == 20
+        assert stats.moves > 0 and stats.mean_score > 0
+
+    def test3(self):
+        """
+        check that closing a policy stops its processes and closes its database
+        """
+        tables = lambda: {name for name in os.listdir(tempfile.gettempdir()) if name.startswith("2048-table-")}
+        before = tables()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "positions.db")
+            with build_policy("expectimax", budget=5, workers=2, database=path) as policy:
+                g = bitboard.BitGame(seed=3)
+                g.spawn_random(2, "start")
+                assert 0 <= policy(g) < 4
+                assert len(tables() - before) == 1 # the shared table of the workers
+            assert tables() == before
+            with PositionDB(path, readonly=True) as database:
+                assert database.get(g.board) is not None
+            policy.close() # closing twice does nothing
+
+
+class TestCompactGameClass:
+
+    def test1(self):
+        """
+        check that the CompactGame moves exactly like the Game
+        """
+        for width, height in ((4, 4), (5, 3), (8, 8)):
+            for _ in range(100):
+                grid = random_grid(width, height)
+                for direction in range(4):
+                    g, c = make_game(grid), CompactGame(width, height)
+                    c.cells[:] = bytes(e for line in grid for e in line)
+                    assert g.change_gravity(direction) == c.change_gravity(direction)
+                    assert (g.grid, g.score, g.max_tile) == (c.grid, c.score, c.max_tile)
+
+    def test2(self):
+        """
+        check that the games of a size share their index maps and have no __dict__
+        """
+        a, b = CompactGame(16, 16), CompactGame(16, 16)
+        assert a._lines is b._lines
+        assert not hasattr(a, "__dict__")
+        a.spawn_random(256, "start")
+        assert a.is_full() and not a.is_lost()
+
+
+class TestLegalMovesClass:
+
+    def test1(self):
+        """
+        check that the legal moves of every engine match the moves that change the grid
+        """
+        for engine, sizes in ((Game, ((4, 4), (5, 3), (2, 7))), (CompactGame, ((4, 4), (6, 2))), (bitboard.BitGame, ((4, 4),))):
+            for width, height in sizes:
+                for seed in range(5):
+                    random.seed(seed)
+                    g = engine(width, height)
+                    g.spawn_random(2, "start")
+                    while True:
+                        expected = 0
+                        for direction in range(4):
+                            if copy.deepcopy(g).change_gravity(direction):
+                                expected |= 1 << direction
+                        assert g.legal_moves() == expected
+                        assert g.is_lost() == (not expected)
+                        if not expected:
+                            break
+                        g.change_gravity(random.choice([d for d in range(4) if expected >> d & 1]))
+                        g.spawn_random(2, "hell")
+
+    def test2(self):
+        """
+        check that every engine agrees on the empty, partially filled and lost grids
+        """
+        empty = [[0] * 4 for _ in range(4)]
+        partial = [[1, 2, 1, 2], [2, 1, 2, 1], [1, 2, 1, 2], [2, 1, 2, 0]]
+        lost = [[1, 2, 1, 2], [2, 1, 2, 1]] * 2
+        for engine in ENGINES.values():
+            games = [engine(4, 4) for _ in range(3)]
+            for g, grid in zip(games, (empty, partial, lost)):
+                g.load(grid, max_tile=2)
+            assert [g.is_lost() for g in games] == [False, False, True], engine.__name__
+            assert [g.legal_moves() for g in games] == [0, 0b1010, 0], engine.__name__
+            assert not engine(4, 4).is_lost() # built without load
+
+
+class TestFreeSpotsClass:
+
+    def test1(self):
+        """
+        check that the free spots follow the empty cells of the grid
+        """
+        for width, height in ((4, 4), (7, 3)):
+            random.seed(width)
+            g = Game(width, height)
+            g.spawn_random(2, "start")
+            while not g.is_lost():
+                g.change_gravity(random.randrange(4))
+                g.spawn_random(1, "normal")
+                empty = {y * width + x for y in range(height) for x in range(width) if not g.grid[y][x]}
+                assert set(g.free_spots) == empty and len(g.free_spots) == len(empty)
+                assert all(pos in g.free_spots for pos in empty)
+
+    def test2(self):
+        """
+        check that the random pick is uniform
+        """
+        spots = FreeSpots(10)
+        for pos in (0, 3, 7):
+            spots.remove(pos)
+        counts = {}
+        for _ in range(7000):
+            pos = spots.choice(random.random())
+            counts[pos] = counts.get(pos, 0) + 1
+        assert sorted(counts) == [1, 2, 4, 5, 6, 8, 9]
+        assert all(800 < count < 1200 for count in counts.values())
+
+
+class TestSpawnStreamClass:
+
+    def test1(self):
+        """
+        check that a seed and a game id always give the same game
+        """
+        for engine in (Game, bitboard.BitGame, CompactGame):
+            games = []
+            for game_id in (0, 0, 1):
+                g = engine(seed=42, game_id=game_id)
+                g.spawn_random(2, "start")
+                for direction in [0, 2, 1, 3] * 30:
+                    if g.change_gravity(direction):
+                        g.spawn_random(2, "hell")
+                games.append((g.grid, g.score))
+            assert games[0] == games[1] and games[0] != games[2]
+
+    def test2(self):
+        """
+        check that the stream can jump to any of its positions
+        """
+        stream = SpawnStream(7, 3)
+        values = [stream.random() for _ in range(1000)]
+        for index in (0, 255, 256, 700):
+            other = SpawnStream(7, 3)
+            other.seek(divmod(index, SpawnStream.BLOCK_SIZE))
+            assert other.random() == values[index]
+
+    def test3(self):
+        """
+        check that a released stream (an idle game) draws the same numbers again
+        """
+        stream = SpawnStream(7, 3)
+        values = [stream.random() for _ in range(600)]
+        other = SpawnStream(7, 3)
+        assert other._block is None # nothing drawn before the first number
+        found = []
+        for index in range(600):
+            if not index % 7:
+                other.release()
+                assert other._block is None
+            found.append(other.random())
+        assert found == values
+        for engine in (Game, bitboard.BitGame, CompactGame):
+            g, h = engine(seed=9), engine(seed=9)
+            for game in (g, h):
+                game.spawn_random(2, "start")
+            g.release()
+            assert g._stream._block is None
+            assert g.spawn_random(2) == h.spawn_random(2)
+
+
+class TestReplayClass:
+
+    def record(self, engine: type, path: str) -> list[tuple]:
+        """
+        record a random game in a replay file with a checkpoint every 16 moves
+        return the (grid, score) of the game after each move
+        """
+        g = engine(seed=5, game_id=2)
+        g.spawn_random(2, "start")
+        history = [(copy.deepcopy(g.grid), g.score)]
+        rng = random.Random(1)
+        with ReplayWriter(path, g, "hell", 2, spawn_records=True, interval=16) as writer:
+            while not g.is_lost():
+                direction = rng.randrange(4)
+                if g.change_gravity(direction):
+                    writer.record(g, direction, g.spawn_random(2, "hell"))
+                    history.append((copy.deepcopy(g.grid), g.score))
+        return history
+
+    def test1(self):
+        """
+        check that a replay gives back every position of the game
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "game.rpl")
+            for engine in (Game, bitboard.BitGame, CompactGame):
+                history = self.record(engine, path)
+                reader = ReplayReader(path)
+                assert reader.move_count == len(history) - 1
+                for move in range(len(history)):
+                    g = reader.game_at(move, verify=True)
+                    assert (g.grid, g.score) == history[move]
+
+    def test2(self):
+        """
+        check that a replay without its index is still read up to its last whole chunk
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "game.rpl")
+            history = self.record(Game, path)
+            with open(path, mode="rb") as f:
+                data = f.read()
+            with open(path, mode="wb") as f:
+                f.write(data[:-30])
+            reader = ReplayReader(path)
+            assert reader.move_count == len(history) - 1
+            assert reader.play().grid == history[-1][0]
+
+
+class TestJournalClass:
+
+    def test1(self):
+        """
+        check that undo and redo walk back and forth through the same positions
+        """
+        for engine in (Game, bitboard.BitGame, CompactGame):
+            g = engine(seed=3, journal=True)
+            g.spawn_random(2, "start")
+            rng = random.Random(2)
+            history = [(copy.deepcopy(g.grid), g.score, g.max_tile)]
+            while not g.is_lost():
+                if g.change_gravity(rng.randrange(4)):
+                    g.spawn_random(2, "normal")
+                    history.append((copy.deepcopy(g.grid), g.score, g.max_tile))
+            for position in reversed(history[:-1]):
+                assert g.undo()
+                assert (g.grid, g.score, g.max_tile) == position
+                assert g.legal_moves() == make_game(position[0]).legal_moves()
+            assert not g.undo()
+            for position in history[1:]:
+                assert g.redo()
+                assert (g.grid, g.score, g.max_tile) == position
+            assert not g.redo()
+
+    def test2(self):
+        """
+        check that a move played again after an undo draws the same spawn values
+        """
+        g = Game(seed=9, journal=True)
+        g.spawn_random(2, "start")
+        for direction in (0, 2, 1, 3):
+            if g.change_gravity(direction):
+                g.spawn_random(2, "normal")
+                break
+        after = copy.deepcopy(g.grid)
+        g.undo()
+        g.change_gravity(direction)
+        g.spawn_random(2, "normal")
+        assert not g.redo() # a new move clears the redo stack
+        assert sum(map(sum, g.grid)) == sum(map(sum, after))
+
+    def test3(self):
+        """
+        check that the games have no journal by default and that the greedy policy needs none
+        """
+        for engine in (Game, bitboard.BitGame, CompactGame):
+            g = engine(seed=4)
+            g.spawn_random(2, "start")
+            for direction in [0, 2, 1, 3] * 20:
+                journaled = engine(journal=True)
+                journaled.load(g.grid, g.score, g.max_tile)
+                gains = []
+                for orientation in range(4): # the trial moves of a journaled game
+                    changed = journaled.change_gravity(orientation)
+                    gains.append((changed, journaled.score - g.score))
+                    if changed:
+                        assert journaled.undo()
+                legal = g.legal_moves()
+                assert gains == [(bool(legal >> o & 1), move_gain(g.grid, o)) for o in range(4)]
+                if legal:
+                    assert greedy_policy(g) in [o for o in range(4) if gains[o] == max(gains)]
+                if g.change_gravity(direction):
+                    g.spawn_random(2)
+                assert g._deltas is None and g._journal is None
+            assert not g.undo() and not g.redo()
+
+
+class TestSaveClass:
+
+    THEMES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "themes")
+    REGISTRY = ThemeRegistry(THEMES, None) # without the cache of memory/themes
+
+    def settings(self) -> GameSettings:
+        """
+        return settings with a custom layout
+        """
+        theme = Theme(os.path.join(TestSaveClass.THEMES, "base.dmqu"))
+        return GameSettings("k", "j", "h", "l", theme, "hell", "French", "custom", "LUR\n D")
+
+    def test1(self):
+        """
+        check that a resumed game is the same game as the saved one
+        """
+        for engine in (Game, bitboard.BitGame, CompactGame):
+            g = engine(seed=11, game_id=4)
+            g.spawn_random(2, "start")
+            for direction in [0, 2, 1, 3] * 10:
+                if g.change_gravity(direction):
+                    g.spawn_random(2, "hell")
+            resumed, settings = save.load(save.dump(g, self.settings()), TestSaveClass.REGISTRY)
+            assert type(resumed) is engine and settings.layout == self.settings().layout
+            assert settings.difficulty == "hell" and settings.language == "French"
+            for direction in [3, 1, 2, 0] * 10: # the same spawns after the save
+                for h in (g, resumed):
+                    if h.change_gravity(direction):
+                        h.spawn_random(2, "hell")
+                assert (resumed.grid, resumed.score, resumed.max_tile) == (g.grid, g.score, g.max_tile)
+            resumed, _ = save.load(save.dump(g, self.settings()), TestSaveClass.REGISTRY, journal=True)
+            assert not g.undo() and not resumed.undo()
+            for direction in range(4): # the interactive game resumes with a journal
+                if resumed.change_gravity(direction):
+                    assert resumed.undo() and resumed.grid == g.grid
+                    break
+
+    def test2(self):
+        """
+        check that the autosaver writes the last snapshot and that a corrupted save is refused
+        """
+        g = Game(seed=1)
+        g.spawn_random(2, "start")
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "save")
+            with save.AutoSaver(path) as saver:
+                for direction in [0, 2, 1, 3] * 25:
+                    if g.change_gravity(direction):
+                        g.spawn_random(2, "normal")
+                    saver.save(g, self.settings())
+            assert 1 <= saver.writes <= 100 and os.listdir(directory) == ["save"]
+            assert save.read(path, TestSaveClass.REGISTRY)[0].grid == g.grid
+            with open(path, mode="r+b") as f:
+                f.seek(40)
+                f.write(b"\xff")
+            try:
+                save.read(path, TestSaveClass.REGISTRY)
+            except save.SaveError:
+                pass # expected
+            else:
+                raise Exception("the save module loaded a corrupted save")
+            with tempfile.TemporaryDirectory() as themes: # the theme goes through the registry
+                for content in (None, "not a theme"):
+                    if content is not None:
+                        with open(os.path.join(themes, "base.dmqu"), mode="w") as f:
+                            f.write(content)
+                    try:
+                        save.load(save.dump(g, self.settings()), ThemeRegistry(themes, None))
+                    except save.SaveError:
+                        pass # expected
+                    else:
+                        raise Exception(f"the save module loaded a game without its theme ({content})")
+
+    def test3(self):
+        """
+        check that a failed write does not stop the autosaver and is raised by close
+        """
+        g = Game(seed=1)
+        g.spawn_random(2, "start")
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "missing", "save") # an unwritable path
+            saver = save.AutoSaver(path)
+            saver.save(g, self.settings())
+            for _ in range(100):
+                if saver.error is not None:
+                    break
+                time.sleep(0.05)
+            assert isinstance(saver.error, OSError) and saver._thread.is_alive()
+            saver.save(g, self.settings())
+            try:
+                saver.close()
+            except save.SaveError:
+                pass # expected
+            else:
+                raise Exception("the AutoSaver class hid a failed write")
+            assert saver.writes == 0 and os.listdir(directory) == []
+            with save.AutoSaver(path) as saver: # the next write clears the error
+                saver.save(g, self.settings())
+                while saver.error is None:
+                    time.sleep(0.01)
+                os.mkdir(os.path.join(directory, "missing"))
+                saver.save(g, self.settings())
+            assert saver.writes == 1 and save.read(path, TestSaveClass.REGISTRY)[0].grid == g.grid
+            saver = save.AutoSaver(os.path.join(directory, "missing", "unwritable", "save"))
+            saver.save(g, self.settings())
+            saver.discard() # the game is over, the failed save does not matter
+
+
+class TestDatasetClass:
+
+    def test1(self):
+        """
+        check that every record of a dataset is a move of a game
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            random.seed(0)
+            rows = dataset.export(directory, 5, random_policy, seed=2)
+            rows += dataset.export(directory, 2, random_policy, seed=3) # appended
+            columns = dataset.load(directory)
+            assert all(len(column) == rows for column in columns.values())
+            assert columns["done"].sum() == 7
+            for board, action, reward, afterstate in zip(columns["boards"], columns["actions"], columns["rewards"], columns["afterstates"]):
+                new, score, _ = bitboard.move(bitboard.from_grid(board.reshape(4, 4).tolist()), int(action))
+                assert bitboard.to_grid(new) == afterstate.reshape(4, 4).tolist() and score == reward
+
+    def test2(self):
+        """
+        check that a column keeps its rows when it grows past its capacity
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "column.npy")
+            column = dataset.NpyColumn(path, np.int32, (3,), capacity=4)
+            for first in range(0, 30, 5):
+                column.append(np.arange(first * 3, (first + 5) * 3, dtype=np.int32).reshape(5, 3))
+            column.close()
+            assert (np.load(path) == np.arange(90).reshape(30, 3)).all()
+
+
+class TestEnvClass:
+
+    def test1(self):
+        """
+        check that the environments follow their games and restart the lost ones
+        """
+        for engine in (Game, bitboard.BitGame, CompactGame):
+            envs = VecEnv(8, engine=engine)
+            observations = envs.reset(5)
+            rng = np.random.default_rng(0)
+            finished = 0
+            for _ in range(300):
+                scores = [g.score for g in envs.games]
+                observations, rewards, dones, legal = envs.step(rng.integers(0, 4, 8))
+                for index, g in enumerate(envs.games):
+                    assert (observations[index] == np.array(g.grid)).all()
+                    assert legal[index].tolist() == [bool(g.legal_moves() >> d & 1) for d in range(4)]
+                    if dones[index]:
+                        assert envs.final_scores[index] == scores[index] + rewards[index]
+                    else:
+                        assert g.score == scores[index] + rewards[index]
+                finished += dones.sum()
+            assert finished > 0 and observations.flags["C_CONTIGUOUS"]
+
+    def test2(self):
+        """
+        check that an environment is reproducible from its seed
+        """
+        runs = []
+        for _ in range(2):
+            env = Env(engine=bitboard.BitGame)
+            env.reset(seed=8, game_id=1)
+            legal, total, done = env.legal, 0, False
+            while not done:
+                observation, reward, done, legal = env.step(int(np.argmax(legal)))
+                total += reward
+            runs.append((total, observation.tolist()))
+        assert runs[0] == runs[1]
+
+
+class TestSymmetryClass:
+
+    def test1(self):
+        """
+        check that a move on a transformed board is the transformed move of the real board
+        """
+        for _ in range(200):
+            board = bitboard.from_grid(random_grid())
+            for transform in range(8):
+                transformed = symmetry.transform_board(board, transform)
+                assert bitboard.to_grid(transformed) == symmetry.transform_grid(bitboard.to_grid(board), transform)
+                for direction in range(4):
+                    real = symmetry.real_direction(direction, transform)
+                    moved, score, _ = bitboard.move(board, real)
+                    assert bitboard.move(transformed, direction)[:2] == (symmetry.transform_board(moved, transform), score)
+
+    def test2(self):
+        """
+        check that the 8 symmetric boards share the same canonical board
+        """
+        for _ in range(200):
+            grid = random_grid()
+            canonical, transform = symmetry.canonical_grid(grid)
+            assert symmetry.transform_grid(grid, transform) == canonical
+            for other in range(8):
+                assert symmetry.canonical_grid(symmetry.transform_grid(grid, other))[0] == canonical
+            wide = random_grid(5, 3) # only 4 symmetries
+            canonical, transform = symmetry.canonical_grid(wide)
+            assert transform < 4 and symmetry.transform_grid(wide, transform) == canonical
+
+
+class TestHeuristicClass:
+
+    def test1(self):
+        """
+        check that a board is worth the weighted terms of its lines and columns
+        """
+        weights = {"smoothness": 30.0, "corner": 150.0, "sum": 0.0}
+        h = heuristic.Heuristic(weights)
+        for _ in range(100):
+            grid = random_grid()
+            board = bitboard.from_grid(grid)
+            expected = 0.0
+            for line in grid + [list(column) for column in zip(*grid)]:
+                expected += sum(h.weights[name] * term for name, term in zip(heuristic.TERMS, heuristic.row_terms(line)))
+            assert abs(h.evaluate(board) - expected) < 1e-6 * abs(expected)
+            for transform in range(8):
+                value = h.evaluate(symmetry.transform_board(board, transform))
+                assert abs(value - h.evaluate(board)) < 1e-6 * abs(expected)
+
+    def test2(self):
+        """
+        check that the weights can change and that unknown terms are refused
+        """
+        h = heuristic.Heuristic()
+        board = bitboard.from_grid([[1, 2, 3, 4], [0, 0, 1, 1], [0, 0, 0, 0], [5, 0, 0, 5]])
+        before = h.evaluate(board)
+        h.set_weights({"empty": 0.0})
+        assert abs(h.evaluate(board) - (before - 270.0 * 8 * 2)) < 1e-6 # each empty cell is in a line and a column
+        try:
+            h.set_weights({"luck": 1.0})
+        except GameError:
+            pass # expected
+        else:
+            raise Exception("the Heuristic class let the user weight an unknown term")
+
+
+class TestPositionDBClass:
+
+    def test1(self):
+        """
+        check that a solved position is found again from any of its symmetric boards
+        """
+        boards = list({symmetry.canonical_board(bitboard.from_grid(random_grid()))[0]: None for _ in range(300)})
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "positions.db")
+            with PositionDB(path, bits=10) as database:
+                for index, board in enumerate(boards):
+                    assert database.put(board, index % 4, float(index), 3)
+                assert not database.put(boards[0], 1, 0.0, 2) # a shallower search is not kept
+            with PositionDB(path, readonly=True) as database:
+                for index, board in enumerate(boards):
+                    transform = index % 8
+                    solved = database.get(symmetry.transform_board(board, transform))
+                    assert solved == (symmetry.TRANSFORMED_DIRECTIONS[transform][index % 4], float(index), 3)
+
+    def test2(self):
+        """
+        check that the solver reuses the positions of the database that were searched deep enough
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            board = bitboard.from_grid([[1, 2, 0, 0], [0, 3, 0, 1], [0, 0, 0, 0], [2, 0, 0, 0]])
+            with PositionDB(os.path.join(directory, "positions.db"), bits=10, signature=search_signature()) as database:
+                first = list(Solver(database=database, max_depth=2).iterate(board))[-1]
+                assert database.get(board) == (first[1], first[2], first[0])
+                solver = Solver(database=database, max_depth=2)
+                assert solver.best_move(symmetry.transform_board(board, 6)) == symmetry.TRANSFORMED_DIRECTIONS[6][first[1]]
+                assert solver.nodes == 0
+                deeper = Solver(database=database, max_depth=3) # the depth 2 record is not enough
+                found = list(deeper.iterate(board))
+                assert [depth for depth, _, _ in found] == [2, 3] and deeper.nodes > 0
+                assert found[-1] == list(Solver(max_depth=3).iterate(board))[-1]
+                assert database.get(board)[2] == 3
+
+    def test3(self):
+        """
+        check that a database is only used by the search it was built for
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "positions.db")
+            with PositionDB(path, bits=10, signature=search_signature("hell")) as database:
+                assert database.signature == search_signature("hell") != search_signature()
+                for mode, evaluation in (("normal", None), ("hell", heuristic.Heuristic({"empty": 1.0}))):
+                    try:
+                        Solver(mode=mode, heuristic=evaluation, database=database)
+                    except GameError:
+                        pass # expected
+                    else:
+                        raise Exception(f"the Solver class used the database of another search ({mode})")
+                Solver(mode="hell", database=database)
+            try:
+                PositionDB(path, signature=search_signature("normal"))
+            except GameError:
+                pass # expected
+            else:
+                raise Exception("the PositionDB class opened the database of another search")
+
+
+class TestHintsClass:
+
+    def test1(self):
+        """
+        check that the hint thread finds the move of a plain search
+        """
+        board = bitboard.from_grid([[1, 2, 0, 0], [0, 3, 0, 1], [0, 0, 0, 0], [2, 0, 0, 0]])
+        updates = []
+        found = threading.Event()
+        def on_update(depth, orientation, value):
+            updates.append((depth, orientation, value))
+            if depth == 2:
+                found.set()
+        with HintEngine(on_update, max_depth=2) as engine:
+            engine.search(board)
+            assert found.wait(30)
+        assert [depth for depth, _, _ in updates] == [1, 2]
+        assert updates == [(depth, orientation, value) for depth, orientation, value in Solver(max_depth=2).iterate(board)]
+
+    def test2(self):
+        """
+        check that no hint is shown after a cancel and that close stops the thread
+        """
+        updates = []
+        with HintEngine(lambda *hint: updates.append(hint), max_depth=12) as engine:
+            for _ in range(5):
+                engine.search(bitboard.from_grid(random_grid())) # replaces the previous search
+            time.sleep(0.05)
+            engine.cancel()
+            shown = len(updates)
+            time.sleep(0.2)
+            assert len(updates) == shown
+        assert not engine._thread.is_alive()
+
+    def test3(self):
+        """
+        check that a cancelled search is not stored in the database
+        """
+        board = bitboard.from_grid([[1, 2, 0, 0], [0, 3, 0, 1], [0, 0, 0, 0], [2, 0, 0, 0]])
+        with tempfile.TemporaryDirectory() as directory:
+            with PositionDB(os.path.join(directory, "positions.db"), bits=10, signature=search_signature()) as database:
+                engine = HintEngine(lambda *hint: engine.cancel(), max_depth=3, database=database)
+                with engine: # the search is cancelled after its first iteration
+                    engine.search(board)
+                    time.sleep(0.2)
+                assert database.get(board) is None
+                with HintEngine(lambda *hint: None, max_depth=2, database=database) as engine:
+                    engine.search(board)
+                    for _ in range(300):
+                        if database.get(board) is not None:
+                            break
+                        time.sleep(0.1)
+                assert database.get(board)[2] == 2
+
+
+class TestParallelSolverClass:
+
+    def test1(self):
+        """
+        check that the parallel search gives the values of the plain search
+        """
+        positions = sample_positions(4, 7)
+        with ParallelSolver(max_depth=2, workers=2) as parallel:
+            for board in positions:
+                expected = list(Solver(max_depth=2).iterate(board))
+                found = list(parallel.iterate(board))
+                assert [(depth, orientation) for depth, orientation, _ in found] == [(depth, orientation) for depth, orientation, _ in expected]
+                assert all(abs(a[2] - b[2]) < 1e-6 * abs(b[2]) for a, b in zip(found, expected))
+                assert parallel.nodes > 0
+            assert parallel.best_move([[1, 2, 1, 2], [2, 1, 2, 1]] * 2) == -1
+
+    def test2(self):
+        """
+        check that the shared table forgets the older searches and the damaged records
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "table")
+            table, other = SharedTable(path, bits=8), SharedTable(path, bits=8)
+            table[12345] = (3, 1.5)
+            assert other.get(12345) == (3, 1.5) # the same file
+            assert other.get(54321) is None
+            other.clear()
+            assert other.get(12345) is None
+            table.clear()
+            table[12345] = (2, 4.0)
+            for offset in range(0, 256 * 24, 24): # a half written record
+                if table._map[offset:offset + 24] != bytes(24):
+                    table._map[offset + 8:offset + 16] = bytes(8)
+            assert table.get(12345) is None
+            table.close()
+            other.close()
+
+
+class TestBenchClass:
+
+    def test1(self):
+        """
+        check that only the benchmarks slower than the tolerance fail
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "baseline.json")
+            assert bench.read_baseline(path) == {}
+            bench.write_baseline(path, {"a": 100.0, "b": 100.0})
+            bench.write_baseline(path, {"c": 10.0}) # added to the others
+            baseline = bench.read_baseline(path)
+        assert baseline == {"a": 100.0, "b": 100.0, "c": 10.0}
+        assert bench.compare({"a": 80.0, "b": 70.0, "d": 1.0}, baseline, 0.25) == ["b"]
+
+    def test2(self):
+        """
+        check that every benchmark runs
+        """
+        for name, (setup, run) in bench.all_benchmarks().items():
+            assert run(setup()) > 0, name
+
+
+class TestRendererClass:
+
+    def test1(self):
+        """
+        check that a frame only rewrites its changed lines and cells
+        """
+        out = io.StringIO()
+        screen = Renderer(out)
+        screen.draw([(["a ", "b "], 2), "score: 4", "keys"])
+        first = out.getvalue()
+        assert first.startswith(CLEAR_SCREEN) and "a b " in first and "keys" in first
+        out.seek(0)
+        out.truncate()
+        screen.draw([(["a ", "c "], 2), "score: 8", "keys"])
+        second = out.getvalue()
+        assert move_to(0, 2) + "c " in second # only the changed cell
+        assert "a " not in second and "keys" not in second
+        assert move_to(1) + "score: 8" in second
+        screen.invalidate()
+        assert screen.render(["keys"]).startswith(CLEAR_SCREEN)
+
+    def test2(self):
+        """
+        check that the frame of a game holds the text of its display
+        """
+        g = make_game([[1, 0, 3, 0], [0, 0, 0, 0], [11, 0, 0, 2], [0, 0, 0, 0]])
+        theme = Theme(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "themes", "base.dmqu"))
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            g.display(theme)
+        lines = g.frame(theme)
+        assert out.getvalue() == "".join("".join(cells) + "\n" for cells, width in lines)
+        assert all(width == len(str(2 ** g.max_tile)) + 1 for cells, width in lines)
+        assert g.frame()[2] == "2048 . . 4"
+
+    def test3(self):
+        """
+        check that every engine draws the same frame and display
+        """
+        theme = Theme(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "themes", "base.dmqu"))
+        grid = [[1, 0, 3, 0], [0, 0, 0, 0], [11, 0, 0, 2], [0, 0, 0, 0]]
+        games = [engine(4, 4) for engine in ENGINES.values()]
+        for g in games:
+            g.load(grid, max_tile=11)
+        expected = games[0]
+        assert expected.frame()[2] == "2048 . . 4"
+        for engine, g in zip(ENGINES.values(), games):
+            assert g.frame() == expected.frame(), engine.__name__
+            assert g.frame(theme) == expected.frame(theme), engine.__name__
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                g.display(theme)
+            assert out.getvalue() == "".join("".join(cells) + "\n" for cells, width in expected.frame(theme))
+
+
+def apply_events(cells: list[int], events: list) -> list[int]:
+    """
+    return the flat grid after the events of a move or a spawn
+    """
+    cells = list(cells)
+    for event in events:
+        if event[0] == EVENT_MOVE:
+            cells[event[2]], cells[event[1]] = cells[event[1]], 0
+        elif event[0] == EVENT_MERGE:
+            assert cells[event[1]] == cells[event[2]] == event[3] - 1
+            cells[event[2]], cells[event[1]] = event[3], 0
+        else:
+            assert not cells[event[1]]
+            cells[event[1]] = event[2]
+    return cells
+
+
+class TestEventsClass:
+
+    def test1(self):
+        """
+        check that the events of a move turn the old grid into the new one, the same on every engine
+        """
+        for _ in range(100):
+            grid = random_grid()
+            for orientation in range(4):
+                found = []
+                for engine in (Game, bitboard.BitGame, CompactGame):
+                    g = engine()
+                    g.load(grid)
+                    before = [e for line in g.grid for e in line]
+                    events = []
+                    changed = g.change_gravity(orientation, events)
+                    assert apply_events(before, events) == [e for line in g.grid for e in line]
+                    assert bool(events) == changed
+                    found.append(events)
+                assert found[0] == found[1] == found[2]
+
+    def test2(self):
+        """
+        check that the spawns are events too and that a move without listener has none
+        """
+        for engine in (Game, bitboard.BitGame, CompactGame):
+            g = engine(4, 4, seed=3)
+            events = []
+            spawned = g.spawn_random(2, "start", events)
+            assert events == [(EVENT_SPAWN, pos, e) for pos, e in spawned]
+            g.change_gravity(0)
+            assert getattr(g, "_events", None) is None
+        g = make_game([[1, 1, 2, 0], [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0]], Game)
+        events = []
+        g.change_gravity(2, events)
+        assert events == [(EVENT_MERGE, 1, 0, 2), (EVENT_MERGE, 2, 0, 3)] # the repo rules chain the merges
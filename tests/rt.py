@@ -6,10 +6,16 @@ Date: June 2024
 
 # Color class tests:
 
+import os
 import sys
-sys.path.append('/home/B612/Devloper/2048/source')
-from read_theme import Color, Theme, ColorError
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "source"))
+from read_theme import Color, Theme, ColorError, ThemeError, detect_color_depth, color_params
+from theme_registry import ThemeRegistry
+import tempfile
 import random
+import shutil
+
+THEMES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "themes")
 
 class TestColorClass:
     # def __init__(self):
@@ -68,10 +74,11 @@ class TestColorClass:
 
     def test5(self):
         """
-        check that the colored method works as expected
+        check that the bg and fg methods work as expected
         """
         c1 = Color(255, 0, 0)
-        c1.colored("Hello") == "\x1b[48;2;255;0;0mHello\033[0m"
+        assert c1.bg("Hello") == "\x1b[48;2;255;0;0mHello\033[0m"
+        assert c1.fg("Hello") == "\x1b[38;2;255;0;0mHello\033[0m"
 
 class TestThemeClass():
     
@@ -79,9 +86,109 @@ class TestThemeClass():
         """
         check that the init works as expected
         """
-        t1 = Theme("themes/base.dmqu")
+        t1 = Theme(os.path.join(THEMES_DIR, "base.dmqu"))
         t1.display()
 
+    def test2(self):
+        """
+        check that the cells combine the colors of a tile in one sequence and are cached per width
+        """
+        t1 = Theme(os.path.join(THEMES_DIR, "base.dmqu"), "truecolor")
+        cells = t1.cells(5)
+        bg, label = t1.index(11)
+        assert cells[11] == "\x1b[48;2;" + ";".join(map(str, (bg.red, bg.green, bg.blue))) + ";38;2;" + ";".join(map(str, (label.red, label.green, label.blue))) + "m 2048\033[0m"
+        assert cells[0].endswith("    .\033[0m")
+        assert t1.cells(5) is cells
+        assert t1.cells(6)[11].endswith("  2048\033[0m")
+
+    def test3(self):
+        """
+        check that the color depth is detected from the terminal and changes the cells
+        """
+        assert detect_color_depth({"TERM": "xterm-256color", "COLORTERM": "truecolor"}, True) == "truecolor"
+        assert detect_color_depth({"TERM": "xterm-256color"}, True) in ("256", "truecolor") # truecolor on Windows
+        assert detect_color_depth({"TERM": "xterm-256color", "NO_COLOR": "1"}, True) == "none"
+        assert detect_color_depth({"TERM": "xterm-256color"}, False) == "none"
+        assert color_params((255, 0, 0), "256", True) == "48;5;196"
+        assert color_params((255, 255, 255), "16", False) == "97"
+        assert color_params((0, 0, 0), "16", True) == "40"
+        cells = {depth: Theme(os.path.join(THEMES_DIR, "base.dmqu"), depth).cells(5) for depth in ("truecolor", "256", "16", "none")}
+        assert cells["none"][11] == " 2048"
+        assert cells["16"][11].startswith("\x1b[") and cells["16"][11].endswith(" 2048\033[0m")
+        assert len(cells["none"][11]) < len(cells["16"][11]) < len(cells["256"][11]) < len(cells["truecolor"][11])
+        try:
+            Theme(os.path.join(THEMES_DIR, "base.dmqu"), "8")
+        except ThemeError:
+            pass # expected
+        else:
+            raise Exception("the Theme class let the user use an unknown color depth")
+
+class TestThemeRegistryClass:
+
+    def test1(self):
+        """
+        check that the registry validates the themes and builds the same theme as the file
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            shutil.copy(os.path.join(THEMES_DIR, "base.dmqu"), directory)
+            with open(os.path.join(THEMES_DIR, "base.dmqu"), mode="r") as f:
+                lines = f.read().split("\n")
+            with open(os.path.join(directory, "newline.dmqu"), mode="w") as f:
+                f.write("\n".join(lines) + "\n") # a final newline is allowed
+            with open(os.path.join(directory, "short.dmqu"), mode="w") as f:
+                f.write("\n".join(lines[:10]))
+            with open(os.path.join(directory, "hex.dmqu"), mode="w") as f:
+                f.write("\n".join(lines[:3] + ["#zzzzzz, #ffffff"] + lines[4:]))
+            registry = ThemeRegistry(directory, None)
+            assert registry.names() == ["base", "hex", "newline", "short"]
+            errors = registry.check()
+            assert errors["base"] is None and errors["newline"] is None
+            assert "10 lines" in errors["short"] and "line 4" in errors["hex"]
+            for name in ("short", "hex", "missing"):
+                try:
+                    registry.get(name, "truecolor")
+                except ThemeError:
+                    pass # expected
+                else:
+                    raise Exception(f"the ThemeRegistry class built the invalid theme {name}")
+            try:
+                Theme(os.path.join(directory, "short.dmqu"))
+            except ThemeError:
+                pass # expected
+            else:
+                raise Exception("the Theme class accepted a theme file with missing lines")
+            for depth in ("truecolor", "256", "16", "none"):
+                theme = registry.get("base", depth)
+                assert theme.name == "base" and theme.color_depth == depth
+                assert theme.cells(5) == Theme(os.path.join(THEMES_DIR, "base.dmqu"), depth).cells(5)
+            assert registry.get("newline", "256").cells(5) == registry.get("base", "256").cells(5)
+
+    def test2(self):
+        """
+        check that the compiled themes are read from the cache until their file changes
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            cache = os.path.join(directory, "cache")
+            shutil.copy(os.path.join(THEMES_DIR, "base.dmqu"), directory)
+            shutil.copy(os.path.join(THEMES_DIR, "greyscale.dmqu"), directory)
+            first = ThemeRegistry(directory, cache)
+            first.get("base", "16")
+            assert first.compiled == 1 and os.listdir(cache) == ["base.json"] # only the selected theme
+            second = ThemeRegistry(directory, cache)
+            theme = second.get("base", "16")
+            assert second.compiled == 0
+            assert theme.cells(5) == Theme(os.path.join(THEMES_DIR, "base.dmqu"), "16").cells(5)
+            with open(os.path.join(directory, "base.dmqu"), mode="a") as f:
+                f.write("\n#000000, #ffffff") # a 19th line
+            os.utime(os.path.join(directory, "base.dmqu"), ns=(0, 0))
+            third = ThemeRegistry(directory, cache)
+            assert third.check()["base"] is not None and third.compiled == 2
+            with open(os.path.join(cache, "greyscale.json"), mode="w") as f:
+                f.write("{") # a broken cache is compiled again
+            fourth = ThemeRegistry(directory, cache)
+            assert fourth.check()["greyscale"] is None and fourth.compiled == 1
+
 if __name__ == "__main__":
     TestColorClass()
-    TestThemeClass()
\ No newline at end of file
+    TestThemeClass()
+    TestThemeRegistryClass()
\ No newline at end of file
@@ -4,8 +4,32 @@ Date: June 2024
 -> Tests for source
 """
 
-from rt import TestColorClass, TestThemeClass
+from rt import TestColorClass, TestThemeClass, TestThemeRegistryClass
+from gt import TestBitGameClass, TestBatchGameClass, TestSolverClass, TestMonteCarloPlayerClass, TestSimulationClass, TestCompactGameClass, TestLegalMovesClass, TestFreeSpotsClass, TestSpawnStreamClass, TestReplayClass, TestJournalClass, TestSaveClass, TestDatasetClass, TestEnvClass, TestSymmetryClass, TestHeuristicClass, TestPositionDBClass, TestHintsClass, TestParallelSolverClass, TestBenchClass, TestRendererClass, TestEventsClass
 
 if __name__ == "__main__":
     TestColorClass()
-    TestThemeClass()
\ No newline at end of file
+    TestThemeClass()
+    TestThemeRegistryClass()
+    TestBitGameClass()
+    TestBatchGameClass()
+    TestSolverClass()
+    TestMonteCarloPlayerClass()
+    TestSimulationClass()
+    TestCompactGameClass()
+    TestLegalMovesClass()
+    TestFreeSpotsClass()
+    TestSpawnStreamClass()
+    TestReplayClass()
+    TestJournalClass()
+    TestSaveClass()
+    TestDatasetClass()
+    TestEnvClass()
+    TestSymmetryClass()
+    TestHeuristicClass()
+    TestPositionDBClass()
+    TestHintsClass()
+    TestParallelSolverClass()
+    TestBenchClass()
+    TestRendererClass()
+    TestEventsClass()
\ No newline at end of file